@@ -1,87 +1,266 @@
+from events import EventSource
+from itertools import islice
 from playback_history import PlaybackHistory
 from playlist_engine import Playlist, SongNode
 
 class RatingNode:
     def __init__(self, rating):
         self.rating = rating
-        self.songs = []  # List of SongNode references
+        self.songs = {}  # song_id → SongNode (insertion ordered, O(1) delete)
         self.left = None
         self.right = None
+        self.height = 1
 
-class RatingBST:
+class RatingBST(EventSource):
+    # AVL tree keyed by rating (fractional ratings allowed), so height stays
+    # O(log k) whatever order ratings arrive in. All walks are iterative.
+    # Publishes on_rating_added / on_rating_removed to subscribed listeners.
     def __init__(self):
         # Time: O(1), Space: O(1)
+        super().__init__()
         self.root = None
+        self.song_ratings = {}  # song_id → rating, back-reference for O(log k) delete
+        self.counts = {}        # rating → number of songs, O(1) per-bucket counts
+
+    def __len__(self):
+        return len(self.song_ratings)
 
     def insert_song(self, song_node, rating):
-        # Average Time: O(log k), Worst: O(k), Space: O(1), where k is number of unique ratings
+        # Time: O(log k), Space: O(log k), where k is number of unique ratings
         if rating < 1 or rating > 5:
             print("Rating must be between 1 and 5.")
             return
-        self.root = self._insert(self.root, song_node, rating)
+        if song_node.id in self.song_ratings:
+            # Re-rating moves the song to its new bucket
+            old_rating = self._remove_from_bucket(song_node.id)
+            self.emit("on_rating_removed", song_node, old_rating)
+        self._insert(song_node, rating)
+        self.song_ratings[song_node.id] = rating
+        self.counts[rating] = self.counts.get(rating, 0) + 1
+        self.emit("on_rating_added", song_node, rating)
 
-    def _insert(self, node, song_node, rating):
-        # Average Time: O(log k), Worst: O(k), Space: O(1)
-        if not node:
-            new_node = RatingNode(rating)
-            new_node.songs.append(song_node)
-            return new_node
-        if rating < node.rating:
-            node.left = self._insert(node.left, song_node, rating)
-        elif rating > node.rating:
-            node.right = self._insert(node.right, song_node, rating)
-        else:
-            node.songs.append(song_node)
-        return node
+    def _insert(self, song_node, rating):
+        # Iterative descent; the recorded path is rebalanced bottom-up
+        # Time: O(log k), Space: O(log k)
+        path = []
+        node = self.root
+        while node:
+            if rating == node.rating:
+                node.songs[song_node.id] = song_node
+                return
+            went_left = rating < node.rating
+            path.append((node, went_left))
+            node = node.left if went_left else node.right
+        new_node = RatingNode(rating)
+        new_node.songs[song_node.id] = song_node
+        self.root = _rebalance_path(path, new_node)
 
     def search_by_rating(self, rating):
-        # Average Time: O(log k), Worst: O(k), Space: O(1)
-        node = self._search(self.root, rating)
+        # Time: O(log k), Space: O(1)
+        node = self._search(rating)
         if node:
-            return node.songs
+            return list(node.songs.values())
         return []
 
-    def _search(self, node, rating):
-        # Average Time: O(log k), Worst: O(k), Space: O(1)
-        if not node:
-            return None
-        if rating == node.rating:
-            return node
-        elif rating < node.rating:
-            return self._search(node.left, rating)
-        else:
-            return self._search(node.right, rating)
+    def _search(self, rating):
+        # Time: O(log k), Space: O(1)
+        node = self.root
+        while node and node.rating != rating:
+            node = node.left if rating < node.rating else node.right
+        return node
+
+    def count(self, rating):
+        # Time: O(1)
+        return self.counts.get(rating, 0)
+
+    def rating_of(self, song_id):
+        # Time: O(1)
+        return self.song_ratings.get(song_id)
+
+    def iter_buckets(self, low=None, high=None, descending=False):
+        # Streams RatingNodes in rating order, skipping subtrees outside low..high.
+        # Don't insert or delete while iterating.
+        # Time: O(log k + b) for b buckets yielded, Space: O(log k)
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                if descending:
+                    if high is not None and node.rating > high:
+                        node = node.left
+                        continue
+                    stack.append(node)
+                    node = node.right
+                else:
+                    if low is not None and node.rating < low:
+                        node = node.right
+                        continue
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return  # the pruned descent ran off the tree: nothing left in range
+            node = stack.pop()
+            if descending:
+                if low is not None and node.rating < low:
+                    return
+            elif high is not None and node.rating > high:
+                return
+            yield node
+            node = node.left if descending else node.right
+
+    def iter_inorder(self, descending=False):
+        # (rating, song) pairs in rating order
+        # Time: O(n) for a full pass, Space: O(log k)
+        for bucket in self.iter_buckets(descending=descending):
+            for song in bucket.songs.values():
+                yield bucket.rating, song
+
+    def iter_range(self, low, high, descending=False):
+        # (rating, song) pairs with low <= rating <= high
+        # Time: O(log k + m) for m pairs consumed, Space: O(log k)
+        for bucket in self.iter_buckets(low, high, descending):
+            for song in bucket.songs.values():
+                yield bucket.rating, song
+
+    def range_query(self, low, high, limit=None, descending=True):
+        # Songs rated low..high (inclusive), best first by default, at most `limit`
+        # Time: O(log k + m) for m songs returned, Space: O(m)
+        pairs = islice(self.iter_range(low, high, descending), limit)
+        return [song for _, song in pairs]
 
     def delete_song(self, song_id):
-        # Time: O(n), Space: O(h), n = total songs, h = tree height
-        self._delete_song(self.root, song_id)
+        # Time: O(log k), Space: O(log k) - full song id, no scan over songs
+        if song_id not in self.song_ratings:
+            print("Song not found in rating tree.")
+            return
+        rating = self.song_ratings[song_id]
+        song = self._search(rating).songs[song_id]
+        print(f"Deleting song: {song.title} from rating {rating}")
+        self._remove_from_bucket(song_id)
+        self.emit("on_rating_removed", song, rating)
+
+    def _remove_from_bucket(self, song_id):
+        # Returns the rating the song had
+        # Time: O(log k)
+        rating = self.song_ratings.pop(song_id)
+        node = self._search(rating)
+        del node.songs[song_id]
+        self.counts[rating] -= 1
+        if not node.songs:
+            del self.counts[rating]
+            self._remove_node(rating)
+        return rating
 
-    def _delete_song(self, node, song_id):
-        # Time: O(n), Space: O(h)
+    def _remove_node(self, rating):
+        # AVL delete of the (now empty) rating bucket, iterative
+        # Time: O(log k), Space: O(log k)
+        path = []
+        node = self.root
+        while node and node.rating != rating:
+            went_left = rating < node.rating
+            path.append((node, went_left))
+            node = node.left if went_left else node.right
         if not node:
             return
-        for i, song in enumerate(node.songs):
-            if song.id[:8] == song_id:
-                print(f"Deleting song: {song.title} from rating {node.rating}")
-                del node.songs[i]
-                break
-        self._delete_song(node.left, song_id)
-        self._delete_song(node.right, song_id)
+
+        if node.left and node.right:
+            # Take over the in-order successor's bucket, then unlink the successor
+            path.append((node, False))
+            successor = node.right
+            while successor.left:
+                path.append((successor, True))
+                successor = successor.left
+            node.rating, node.songs = successor.rating, successor.songs
+            replacement = successor.right
+        else:
+            replacement = node.left or node.right
+        self.root = _rebalance_path(path, replacement)
+
+    #----------------catalog hooks--------------------------------
+
+    def on_songs_removed(self, catalog, songs):
+        # Quietly drop ratings of songs that left the catalog
+        # Time: O(m log k)
+        for song in songs:
+            if song.id in self.song_ratings:
+                rating = self._remove_from_bucket(song.id)
+                self.emit("on_rating_removed", song, rating)
+
+    def on_songs_unloaded(self, catalog, songs):
+        # The tree holds resident songs; the library keeps the ratings
+        self.on_songs_removed(catalog, songs)
+
+    def on_songs_updated(self, catalog, updates):
+        # Time: O(m log k)
+        for song, changes, _ in updates:
+            if "rating" in changes:
+                self.insert_song(song, changes["rating"])
 
     def print_all_ratings(self):
-        # Time: O(n), Space: O(h)
+        # Time: O(n), Space: O(log k)
         print("\n--- Song Ratings Tree ---")
-        self._inorder_print(self.root)
+        for bucket in self.iter_buckets():
+            print(f"Rating {bucket.rating}:")
+            for song in bucket.songs.values():
+                print(f"  - [{song.short_id}] {song.title} by {song.artist} ({song.duration})")
         print("-------------------------\n")
 
-    def _inorder_print(self, node):
-        # Time: O(n), Space: O(h)
-        if node:
-            self._inorder_print(node.left)
-            print(f"Rating {node.rating}:")
-            for song in node.songs:
-                print(f"  - [{song.id[:8]}] {song.title} by {song.artist} ({song.duration})")
-            self._inorder_print(node.right)
+
+def _rebalance_path(path, child):
+    # Re-attaches `child` under the last node of a root-to-leaf path and
+    # rebalances each ancestor on the way up; returns the new root
+    # Time: O(log k), Space: O(1)
+    for parent, went_left in reversed(path):
+        if went_left:
+            parent.left = child
+        else:
+            parent.right = child
+        child = _rebalance(parent)
+    return child
+
+
+def _height(node):
+    return node.height if node else 0
+
+
+def _update_height(node):
+    node.height = 1 + max(_height(node.left), _height(node.right))
+
+
+def _rotate_right(node):
+    # Time: O(1)
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _update_height(node)
+    _update_height(pivot)
+    return pivot
+
+
+def _rotate_left(node):
+    # Time: O(1)
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _update_height(node)
+    _update_height(pivot)
+    return pivot
+
+
+def _rebalance(node):
+    # Restores the AVL balance factor (-1..1) at node
+    # Time: O(1)
+    _update_height(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
 
 
 
@@ -129,9 +308,8 @@ def main():
         print(f"- {song.title} by {song.artist}")
 
     # Delete a song by ID
-    id=input("Enter song ID to delete (first 8 characters): ")
-    song_id = id
-    print(f"[ Deleting Song from Rating Tree: {song_id} ]")
+    song_id = playlist.head.next.id
+    print(f"[ Deleting Song from Rating Tree: {song_id:032x} ]")
     rating_tree.delete_song(song_id)
 
 
@@ -145,3 +323,60 @@ def main():
 
 
 # main()
+
+
+def test_range():
+    # Ranges that miss every rating, above and below, in both directions
+    rating_tree = RatingBST()
+    playlist = Playlist(None)
+    for title, rating in (("High", 5), ("Higher", 4.5)):
+        rating_tree.insert_song(playlist.add_song(title, "Artist", "3:00"), rating)
+    print("1-3 best first:", rating_tree.range_query(1, 3))
+    print("1-3 ascending:", rating_tree.range_query(1, 3, descending=False))
+    print("6-7 both ways:", rating_tree.range_query(6, 7), rating_tree.range_query(6, 7, descending=False))
+    print("4-5:", [song.title for song in rating_tree.range_query(4, 5)])
+
+# test_range()
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(n=1_000_000, deletes=10_000):
+    # AVL rating index at n rated songs with one-decimal fractional ratings
+    import random
+    import time
+
+    rng = random.Random(n)
+    songs = [SongNode(f"Song {i}", f"Artist {i % 1000}", 180 + i % 240) for i in range(n)]
+    ratings = [rng.randrange(10, 51) / 10 for _ in range(n)]
+    tree = RatingBST()
+
+    start = time.perf_counter()
+    for song, rating in zip(songs, ratings):
+        tree.insert_song(song, rating)
+    insert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        tree.count(4.5)
+    count_time = (time.perf_counter() - start) / 1000
+
+    start = time.perf_counter()
+    for _ in range(100):
+        top = tree.range_query(3.5, 5, limit=100)
+    range_time = (time.perf_counter() - start) / 100
+
+    victims = rng.sample(songs, deletes)
+    start = time.perf_counter()
+    for song in victims:
+        tree._remove_from_bucket(song.id)  # delete_song minus the print
+    delete_time = (time.perf_counter() - start) / deletes
+
+    print(f"\n--- RatingBST benchmark ({n} songs, {len(tree.counts)} rating buckets, height {tree.root.height}) ---")
+    print(f"insert (total)          {insert_time:>10.3f} s")
+    print(f"count(rating)           {count_time * 1e6:>10.2f} us")
+    print(f"range 3.5..5, top 100   {range_time * 1e6:>10.2f} us ({len(top)} songs)")
+    print(f"delete by id            {delete_time * 1e6:>10.2f} us")
+    print("------------------------------------------------------------------\n")
+
+# benchmark()
@@ -0,0 +1,375 @@
+# benchmark.py - regression benchmarks for the core data structures
+#
+#   python benchmark.py                                   # 1k, 10k, 100k songs
+#   python benchmark.py --sizes 1k,1M --cases playlist,lookup --json run.json
+#   python benchmark.py --baseline run.json               # compare, exit 1 on regressions
+#
+# Every case builds its structure from the same synthetic catalog, then times
+# a batch of each operation and reports the cost per operation. With two or
+# more sizes, the growth of that cost is fitted as n^exponent and checked
+# against the complexity the code claims (an O(1) / O(log n) operation should
+# stay near exponent 0, an O(n) one near 1).
+
+from collections import namedtuple
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from instant_song_lookup import SongLookup
+from mergesort import sort_by
+from playback_history import PlaybackHistory
+from playlist_engine import Playlist, SongNode, new_song_ids
+from snapshot import SnapshotDashboard
+from SongRating_tree import RatingBST
+from volumecontrol import VolumeNormalizer, np
+
+# One timed step of a case: `fn` performs `count` operations claimed to cost
+# `complexity` each. Only pure steps are repeated (best run kept); the others
+# change the structure and run once.
+Op = namedtuple("Op", "name complexity count fn pure")
+
+SAMPLE = 1_000       # operations timed per step
+MIN_SECONDS = 0.02   # read-only steps repeat (up to 100 runs) until this much time is spent
+NOISE_FLOOR = 0.001  # steps that ran once and took less than this are not compared
+BASELINE = "benchmark_baseline.json"  # compared against by default when present
+MAX_EXPONENT = {     # highest n^exponent growth accepted for a claimed complexity
+    "O(1)": 0.3,
+    "O(log n)": 0.3,
+    "O(k)": 0.3,
+    "O(n)": 1.3,
+    "O(n log n)": 1.4,
+}
+
+
+def synthetic_rows(n, seed=1, artists=None):
+    # (title, artist, seconds, rating, volume) rows: Zipf-like artist sizes,
+    # titles with shared words for prefix search, lengths of 1-10 minutes
+    # Time: O(n), lazily
+    rng = random.Random(seed)
+    artists = artists or max(10, n // 20)
+    words = ("love", "night", "dil", "tum", "rain", "dance", "heart", "sky", "dream", "fire")
+    for i in range(n):
+        title = f"{words[i % 10]} {words[(i // 10) % 10]} {i}"
+        artist = f"Artist {int(artists * rng.random() ** 2)}"
+        yield title, artist, rng.randint(60, 600), rng.randint(1, 10) / 2, rng.randint(0, 100)
+
+
+def synthetic_songs(n, seed=1):
+    # SongNodes for the rows, ids from one os.urandom call; returns (songs, ratings)
+    # Time: O(n)
+    songs, ratings = [], []
+    for song_id, (title, artist, seconds, rating, volume) in zip(new_song_ids(n), synthetic_rows(n, seed)):
+        songs.append(SongNode(title, artist, seconds, volume, song_id))
+        ratings.append(rating if rating >= 1 else 1)
+    return songs, ratings
+
+
+#----------------cases--------------------------------
+# Each case is a generator of Ops over one size; later steps see the state
+# earlier ones left behind, so builds come first and deletes last.
+
+def _playlist(n, rng):
+    rows = [(title, artist, seconds, volume) for title, artist, seconds, _, volume in synthetic_rows(n)]
+    playlist = Playlist(None)
+    yield Op("add_songs", "O(1)", n, lambda: playlist.add_songs(rows), False)
+    extra = [(f"Late {i}", "Late", 200, 50) for i in range(SAMPLE)]
+    yield Op("add_song", "O(log n)", SAMPLE, lambda: [playlist.add_song(*row) for row in extra], False)
+    indexes = [rng.randrange(n) for _ in range(SAMPLE)]
+    yield Op("get_song", "O(log n)", SAMPLE, lambda: [playlist.get_song(i) for i in indexes], True)
+    ids = [playlist.get_song(i).id for i in indexes]
+    yield Op("find_song", "O(1)", SAMPLE, lambda: [playlist.find_song(song_id) for song_id in ids], True)
+    moves = [(rng.randrange(n), rng.randrange(n)) for _ in range(SAMPLE)]
+    yield Op("move_song", "O(log n)", SAMPLE,
+             lambda: [playlist.move_song(a, b) for a, b in moves if a != b], False)
+    # Reversed twice so the step can repeat and later steps see the original order
+    yield Op("reverse_playlist", "O(n)", 2, lambda: (playlist.reverse_playlist(), playlist.reverse_playlist()), True)
+    yield Op("sort_playlist", "O(n log n)", 1, lambda: playlist.sort_playlist("artist,-duration"), False)
+    yield Op("delete_song", "O(log n)", min(n, SAMPLE),
+             lambda: [playlist.delete_song(rng.randrange(playlist.length)) for _ in range(min(n, SAMPLE))], False)
+
+
+def _merge_sort(n, rng):
+    songs, _ = synthetic_songs(n)
+    keys = [(lambda song: song.artist, True), (lambda song: song.seconds, False)]
+    yield Op("sort_by", "O(n log n)", 1, lambda: sort_by(songs, keys), True)
+    yield Op("sort_by_presorted", "O(n log n)", 1, lambda: sort_by(sort_by(songs, keys), keys), True)
+
+
+def _rating_tree(n, rng):
+    songs, ratings = synthetic_songs(n)
+    tree = RatingBST()
+    yield Op("insert_song", "O(log n)", n, lambda: [tree.insert_song(s, r) for s, r in zip(songs, ratings)], False)
+    queries = [rng.randint(1, 10) / 2 for _ in range(SAMPLE)]
+    queries = [q if q >= 1 else 1 for q in queries]
+    yield Op("count", "O(1)", SAMPLE, lambda: [tree.count(q) for q in queries], True)
+    yield Op("range_query_top10", "O(log n)", SAMPLE,
+             lambda: [tree.range_query(q, 5, limit=10) for q in queries], True)
+    victims = [song.id for song in rng.sample(songs, min(n, SAMPLE))]
+    yield Op("delete_song", "O(log n)", len(victims), lambda: [tree.delete_song(i) for i in victims], False)
+
+
+def _lookup(n, rng):
+    songs, _ = synthetic_songs(n)
+    lookup = SongLookup()
+    yield Op("add_songs", "O(1)", n, lambda: lookup.add_songs(songs), False)
+    picks = [songs[rng.randrange(n)] for _ in range(SAMPLE)]
+    yield Op("get_by_id", "O(1)", SAMPLE, lambda: [lookup.get_by_id(s.id) for s in picks], True)
+    yield Op("get_by_title", "O(1)", SAMPLE, lambda: [lookup.get_by_title(s.title) for s in picks], True)
+    prefixes = [s.title[:6] for s in picks]
+    yield Op("search_prefix", "O(log n)", SAMPLE, lambda: [lookup.search_prefix(p) for p in prefixes], True)
+    victims = [s.id for s in rng.sample(songs, min(n, SAMPLE))]
+    yield Op("remove_song", "O(1)", len(victims), lambda: [lookup.remove_song(i) for i in victims], False)
+
+
+def _dashboard(n, rng):
+    songs, ratings = synthetic_songs(n)
+    playlist = Playlist(None)
+    playlist.add_nodes(songs)
+    tree = RatingBST()
+    for song, rating in zip(songs, ratings):
+        tree.insert_song(song, rating)
+    history = PlaybackHistory(capacity=SAMPLE, spill=False)
+    holder = []
+    yield Op("seed", "O(n)", 1, lambda: holder.append(SnapshotDashboard(playlist, history, tree)), False)
+    dashboard = holder[0]
+    plays = [songs[rng.randrange(n)] for _ in range(SAMPLE)]
+    yield Op("on_play", "O(1)", SAMPLE, lambda: [history.push(song) for song in plays], True)
+    extra = [SongNode(f"Late {i}", "Late", 700 + i, 50) for i in range(SAMPLE)]
+    yield Op("on_song_added", "O(log n)", SAMPLE, lambda: [playlist.add_nodes([song]) for song in extra], False)
+    yield Op("export_snapshot", "O(k)", SAMPLE, lambda: [dashboard.export_snapshot() for _ in range(SAMPLE)], True)
+    dashboard.close()
+
+
+def _volume(n, rng):
+    playlist = Playlist(None)
+    playlist.add_songs([(title, artist, seconds, volume) for title, artist, seconds, _, volume in synthetic_rows(n)])
+    for mode in ("mean", "median"):
+        normalizer = VolumeNormalizer(playlist, mode=mode)
+        yield Op(f"normalize_{mode}", "O(n)" if mode == "mean" else "O(n log n)", 1, normalizer.normalize, True)
+    normalizer = VolumeNormalizer(mode="mean")
+    yield Op("follow", "O(n)", 1, lambda: normalizer.follow(playlist), False)
+    extra = [(f"Late {i}", "Late", 200, rng.randint(0, 100)) for i in range(SAMPLE)]
+    yield Op("followed_add_song", "O(1)", SAMPLE, lambda: [playlist.add_song(*row) for row in extra], False)
+
+
+def _history(n, rng):
+    songs, _ = synthetic_songs(min(n, SAMPLE))
+    history = PlaybackHistory(capacity=SAMPLE, spill=False)
+    plays = [songs[i % len(songs)] for i in range(n)]
+    yield Op("push", "O(1)", n, lambda: [history.push(song) for song in plays], False)
+    yield Op("recent_page", "O(1)", SAMPLE, lambda: [history.recent(0, 20) for _ in range(SAMPLE)], True)
+
+
+CASES = {
+    "playlist": _playlist,
+    "merge_sort": _merge_sort,
+    "rating_tree": _rating_tree,
+    "lookup": _lookup,
+    "dashboard": _dashboard,
+    "volume": _volume,
+    "history": _history,
+}
+
+
+#----------------runner--------------------------------
+
+def run(sizes=(1_000, 10_000, 100_000), cases=None, repeat=3, memory=True, seed=1):
+    # Runs every case at every size; returns the JSON-ready report. With
+    # `memory`, each case runs a second time under tracemalloc (which slows
+    # it down too much to time) for per-step allocations.
+    # Time: dominated by the cases themselves
+    results = []
+    for case in cases or CASES:
+        _time_case(CASES[case], min(sizes), 1, seed)  # warm-up: imports, caches, lazy setup
+        for n in sizes:
+            print(f"[bench] {case} n={n:,}", file=sys.stderr)
+            rows = _time_case(CASES[case], n, repeat, seed)
+            if memory:
+                for row, used in zip(rows, _memory_case(CASES[case], n, seed)):
+                    row.update(used)
+            for row in rows:
+                row.update(case=case, n=n)
+            results.extend(rows)
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__ if np is not None else None,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+    report["scaling"] = scaling(results)
+    return report
+
+
+def _time_case(case, n, repeat, seed):
+    # The collector is paused while a step runs, as timeit does: a full
+    # collection over a large structure would otherwise land in random steps
+    rows = []
+    with _quiet():
+        for op in case(n, random.Random(seed)):
+            best, spent, runs = math.inf, 0.0, 0
+            gc.collect()
+            gc.disable()
+            try:
+                while runs < (repeat if op.pure else 1) or (op.pure and spent < MIN_SECONDS and runs < 100):
+                    start = time.perf_counter()
+                    op.fn()
+                    elapsed = time.perf_counter() - start
+                    best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+            finally:
+                gc.enable()
+            rows.append({"op": op.name, "complexity": op.complexity, "count": op.count, "runs": runs,
+                         "seconds": best, "per_op_us": best / op.count * 1e6})
+    return rows
+
+
+def _memory_case(case, n, seed):
+    # Bytes each step left allocated, and its peak above the starting point
+    used = []
+    tracemalloc.start()
+    try:
+        with _quiet():
+            for op in case(n, random.Random(seed)):
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                op.fn()
+                current, peak = tracemalloc.get_traced_memory()
+                used.append({"retained_bytes": current - before, "peak_bytes": peak - before})
+    finally:
+        tracemalloc.stop()
+    return used
+
+
+@contextlib.contextmanager
+def _quiet():
+    # The structures report to stdout; keep the timings clean of it
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        yield
+
+
+def scaling(results):
+    # Per (case, op): n^exponent fitted between the smallest and largest size,
+    # and whether that stays within the claimed complexity
+    # Time: O(r)
+    by_op = {}
+    for row in results:
+        by_op.setdefault((row["case"], row["op"]), []).append(row)
+    fits = []
+    for (case, op), rows in by_op.items():
+        rows = sorted(rows, key=lambda row: row["n"])
+        small, large = rows[0], rows[-1]
+        if large["n"] == small["n"] or not small["per_op_us"]:
+            continue
+        exponent = math.log(large["per_op_us"] / small["per_op_us"]) / math.log(large["n"] / small["n"])
+        claimed = small["complexity"]
+        limit = MAX_EXPONENT.get(claimed)
+        fits.append({"case": case, "op": op, "complexity": claimed, "exponent": round(exponent, 3),
+                     "ok": limit is None or exponent <= limit})
+    return fits
+
+
+def compare(report, baseline, tolerance=0.25):
+    # Steps whose per-operation time grew by more than `tolerance` against a
+    # baseline report, matched on (case, op, n). Single-run steps cannot take
+    # a best-of, so they get twice the tolerance, and those too short to time
+    # reliably get a ratio but are never flagged.
+    # Time: O(r)
+    before = {(row["case"], row["op"], row["n"]): row for row in baseline["results"]}
+    regressions = []
+    for row in report["results"]:
+        old = before.get((row["case"], row["op"], row["n"]))
+        if old is None or not old["per_op_us"]:
+            continue
+        ratio = row["per_op_us"] / old["per_op_us"]
+        row["baseline_us"] = old["per_op_us"]
+        row["ratio"] = round(ratio, 3)
+        single = row.get("runs", 1) == 1
+        if single and max(row["seconds"], old["seconds"]) < NOISE_FLOOR:
+            continue
+        if ratio > 1 + (2 * tolerance if single else tolerance):
+            regressions.append(row)
+    return regressions
+
+
+def print_report(report):
+    print(f"\n{'case':<12} {'operation':<20} {'n':>10} {'claimed':>10} {'per op':>12} {'retained':>10} {'vs base':>8}")
+    for row in report["results"]:
+        retained = f"{row['retained_bytes'] / 2 ** 20:.1f}M" if "retained_bytes" in row else "-"
+        ratio = f"{row['ratio']:.2f}x" if "ratio" in row else "-"
+        print(f"{row['case']:<12} {row['op']:<20} {row['n']:>10,} {row['complexity']:>10} "
+              f"{row['per_op_us']:>9.2f} us {retained:>10} {ratio:>8}")
+    if report["scaling"]:
+        print(f"\n{'case':<12} {'operation':<20} {'claimed':>10} {'fitted':>10}")
+        for fit in report["scaling"]:
+            flag = "" if fit["ok"] else "   <-- grows faster than claimed"
+            print(f"{fit['case']:<12} {fit['op']:<20} {fit['complexity']:>10} {'n^' + str(fit['exponent']):>10}{flag}")
+
+
+def parse_size(text):
+    # "1k" → 1000, "10M" → 10000000
+    text = text.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PlayWise data structure benchmarks")
+    parser.add_argument("--sizes", default="1k,10k,100k", help="comma-separated sizes, e.g. 1k,100k,1M,10M")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"any of {', '.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each read-only step (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", default=BASELINE if os.path.exists(BASELINE) else None,
+                        help=f"report to compare against (default: {BASELINE} when present)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write the report to {BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    parser.add_argument("--check-scaling", action="store_true",
+                        help="also exit 1 when a step grows faster than its claimed complexity")
+    args = parser.parse_args(argv)
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+
+    report = run(sizes, cases, args.repeat, not args.no_memory)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        report["regressions"] = [(row["case"], row["op"], row["n"]) for row in regressions]
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=1)
+        print(f"\nReport written to {args.json}")
+    if args.save_baseline:
+        with open(BASELINE, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=1)
+        print(f"Baseline saved to {BASELINE}")
+
+    slow = [fit for fit in report["scaling"] if not fit["ok"]]
+    if regressions:
+        print(f"\n{len(regressions)} step(s) slower than the baseline by more than {args.tolerance:.0%}:")
+        for row in regressions:
+            print(f" - {row['case']}.{row['op']} n={row['n']:,}: {row['ratio']:.2f}x")
+    if slow:
+        print(f"\n{len(slow)} step(s) scale worse than their claimed complexity.")
+    return 1 if regressions or (slow and args.check_scaling) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+from events import EventSource
+from playlist_engine import check_volume
+import sys
+
+# Song fields that update_song may change, besides "rating"
+UPDATABLE = ("title", "artist", "volume")
+
+
+class Catalog(EventSource):
+    # Single owner of every SongNode across playlists. Playlists report
+    # membership changes as events; the catalog records them and fans each one
+    # out, in one call, to every registered index (SongLookup, RatingBST, ...).
+    # An index implements whichever of these hooks it needs:
+    #   on_songs_added(catalog, songs)
+    #   on_songs_removed(catalog, songs)
+    #   on_songs_updated(catalog, updates)  # [(song, changes, previous), ...]
+    #   on_songs_unloaded(catalog, songs)   # left memory, still in the library
+    # Hooks always receive lists, so bulk operations reach an index as one batch.
+    def __init__(self):
+        # Time: O(1), Space: O(1)
+        super().__init__()
+        self.songs = {}        # song_id → SongNode
+        self.playlist_of = {}  # song_id → Playlist holding the song
+        self.playlists = {}    # playlist id → Playlist
+
+    def __len__(self):
+        return len(self.songs)
+
+    def register(self, index):
+        # Plug in an index; it is seeded with the songs already in the catalog
+        # Time: O(n) for the seeding batch
+        self.subscribe(index)
+        handler = getattr(index, "on_songs_added", None)
+        if handler and self.songs:
+            handler(self, list(self.songs.values()))
+
+    def unregister(self, index):
+        # Time: O(l)
+        self.unsubscribe(index)
+
+    def attach(self, playlist):
+        # Track a playlist and everything already in it
+        # Time: O(n) for n songs in the playlist
+        if playlist.id in self.playlists:
+            return
+        self.playlists[playlist.id] = playlist
+        playlist.subscribe(self)
+        songs = []
+        node = playlist.head
+        while node:
+            songs.append(node)
+            node = node.next
+        if songs:
+            self._track(playlist, songs)
+
+    def detach(self, playlist):
+        # Stop tracking a playlist; its songs leave every index
+        # Time: O(n)
+        if self.playlists.pop(playlist.id, None) is None:
+            return
+        playlist.unsubscribe(self)
+        songs = [song for song_id, song in self.songs.items() if self.playlist_of[song_id] is playlist]
+        if songs:
+            self._untrack(songs)
+
+    def unload(self, playlist):
+        # Stop tracking a playlist that is leaving memory but not the library
+        # (an evicted playlist): indexes get on_songs_unloaded, not a removal,
+        # so a store keeps the songs while in-memory indexes drop them
+        # Time: O(n) for n songs in the playlist
+        if self.playlists.pop(playlist.id, None) is None:
+            return
+        playlist.unsubscribe(self)
+        songs = []
+        node = playlist.head
+        while node:
+            songs.append(node)
+            node = node.next
+        for song in songs:
+            self.songs.pop(song.id, None)
+            self.playlist_of.pop(song.id, None)
+        if songs:
+            self.emit("on_songs_unloaded", songs)
+
+    def get(self, song_id):
+        # Time: O(1)
+        return self.songs.get(song_id)
+
+    def add_song(self, playlist, title, artist, duration, rating=None, volume=50):
+        # Append to `playlist` and index everywhere; returns the new SongNode
+        # Time: O(log n) for the playlist plus one call per index
+        self.attach(playlist)
+        song = playlist.add_song(title, artist, duration, volume)
+        if rating is not None:
+            self.emit("on_songs_updated", [(song, {"rating": rating}, {})])
+        return song
+
+    def add_songs(self, playlist, rows):
+        # Bulk add of (title, artist, duration[, rating[, volume]]) rows. Every
+        # index gets one batch of songs and one batch of ratings.
+        # Time: O(m + log n) for the playlist plus one call per index
+        self.attach(playlist)
+        ratings = []
+        songs = []
+        for row in rows:
+            title, artist, duration = row[:3]
+            ratings.append(row[3] if len(row) > 3 else None)
+            songs.append((title, artist, duration, row[4]) if len(row) > 4 else (title, artist, duration))
+        songs = playlist.add_songs(songs)
+        updates = [(song, {"rating": rating}, {}) for song, rating in zip(songs, ratings) if rating is not None]
+        if updates:
+            self.emit("on_songs_updated", updates)
+        return songs
+
+    def remove_song(self, song_id):
+        # Remove from its playlist and from every index; returns the SongNode
+        # Time: O(log n) plus one call per index
+        playlist = self.playlist_of.get(song_id)
+        if playlist is None:
+            print("Song not found in catalog.")
+            return None
+        return playlist.remove_song(song_id)
+
+    def remove_songs(self, song_ids):
+        # Bulk remove; one batch per playlist reaches each index
+        # Time: O(m log n)
+        by_playlist = {}
+        for song_id in song_ids:
+            playlist = self.playlist_of.get(song_id)
+            if playlist is not None:
+                by_playlist.setdefault(playlist.id, (playlist, []))[1].append(song_id)
+        removed = []
+        for playlist, ids in by_playlist.values():
+            removed.extend(playlist.remove_songs(ids))
+        return removed
+
+    def update_song(self, song_id, **changes):
+        # Change title / artist / volume and/or rating, e.g. update_song(i, rating=4.5)
+        # Time: O(1) plus one call per index
+        song = self.songs.get(song_id)
+        if song is None:
+            print("Song not found in catalog.")
+            return None
+        unknown = [field for field in changes if field not in UPDATABLE and field != "rating"]
+        if unknown:
+            print(f"[Error] Cannot update: {', '.join(unknown)}")
+            return None
+
+        if "volume" in changes:
+            try:
+                check_volume(changes["volume"])
+            except ValueError as error:
+                print(f"[Error] {error}")
+                return None
+
+        previous = {field: getattr(song, field) for field in changes if field in UPDATABLE}
+        for field in previous:
+            value = changes[field]
+            setattr(song, field, sys.intern(value) if field == "artist" else value)
+        if "title" in previous or "artist" in previous:
+            self.playlist_of[song_id].views.clear()  # cached sort orders used the old text
+        self.emit("on_songs_updated", [(song, changes, previous)])
+        return song
+
+    def _track(self, playlist, songs):
+        # Time: O(m) plus one call per index
+        for song in songs:
+            self.songs[song.id] = song
+            self.playlist_of[song.id] = playlist
+        self.emit("on_songs_added", songs)
+
+    def _untrack(self, songs):
+        # Time: O(m) plus one call per index
+        for song in songs:
+            self.songs.pop(song.id, None)
+            self.playlist_of.pop(song.id, None)
+        self.emit("on_songs_removed", songs)
+
+    #----------------playlist event handlers--------------------------------
+
+    def on_song_added(self, playlist, song):
+        self._track(playlist, [song])
+
+    def on_songs_added(self, playlist, songs):
+        self._track(playlist, songs)
+
+    def on_song_removed(self, playlist, song):
+        self._untrack([song])
+
+    def on_songs_removed(self, playlist, songs):
+        self._untrack(songs)
+
+
+#----------------test--------------------------------
+
+def test1():
+    from playlist_engine import Playlist
+    from SongRating_tree import RatingBST
+    from instant_song_lookup import SongLookup
+
+    catalog = Catalog()
+    lookup = SongLookup()
+    rating_tree = RatingBST()
+    catalog.register(lookup)
+    catalog.register(rating_tree)
+
+    playlist = Playlist(None, name="Test")
+    catalog.add_songs(playlist, [
+        ("Tum Hi Ho", "Arijit Singh", "4:20", 5),
+        ("Kesariya", "Arijit Singh", "4:30", 4),
+        ("Pehla Nasha", "Udit Narayan", "4:50", 5, 80),
+    ])
+    song = catalog.add_song(playlist, "Kabira", "Tochi Raina", "3:43", 5)
+    print("5 stars:", [s.title for s in rating_tree.search_by_rating(5)])
+
+    # Deleting through the playlist still reaches the lookup and the rating tree
+    playlist.delete_song(0)
+    print("Lookup 'Tum Hi Ho':", lookup.get_by_title("Tum Hi Ho"))
+    print("5 stars:", [s.title for s in rating_tree.search_by_rating(5)])
+
+    catalog.update_song(song.id, title="Kabira (Encore)", rating=4)
+    print("Lookup 'kabira (encore)':", [s.title for s in lookup.get_by_title("kabira (encore)")])
+    print("4 stars:", [s.title for s in rating_tree.search_by_rating(4)])
+
+# test1()
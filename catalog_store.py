@@ -0,0 +1,142 @@
+from array import array
+from playlist_engine import SongNode, check_volume
+import uuid
+
+_MASK_64 = (1 << 64) - 1
+_MAX_SECONDS = (1 << 32) - 1  # the "I" seconds column
+
+
+class CatalogStore:
+    # Struct-of-arrays song catalog: one row per song, every column a typed
+    # array, so a catalog entry costs a few dozen bytes instead of a full object.
+    # Playlists can keep an array("I") of row numbers instead of nodes.
+    def __init__(self):
+        # Time: O(1), Space: O(1)
+        self.ids_hi = array("Q")        # upper 64 bits of the 128-bit song id
+        self.ids_lo = array("Q")        # lower 64 bits
+        self.seconds = array("I")       # duration in whole seconds
+        self.volumes = array("B")       # 0–100 scale
+        self.artist_ids = array("I")    # row → index into self.artists
+        self.title_offsets = array("Q", [0])  # title i is text[offsets[i]:offsets[i + 1]]
+        self.text = bytearray()         # UTF-8 title heap
+        self.artists = []               # artist_id → name
+        self._artist_rows = {}          # name → artist_id
+        self._row_by_id = None          # built lazily by find()
+
+    def __len__(self):
+        return len(self.seconds)
+
+    def add(self, title, artist, seconds, volume=50, song_id=None):
+        # Every field is checked and encoded before any column grows, so a bad
+        # row raises ValueError and leaves the columns aligned
+        # Time: O(1) amortized, Space: O(1)
+        if song_id is None:
+            song_id = uuid.uuid4().int
+        if not 0 <= song_id < 1 << 128:
+            raise ValueError(f"Invalid song id {song_id!r}: must fit in 128 bits")
+        if not 0 <= seconds <= _MAX_SECONDS:
+            raise ValueError(f"Invalid duration {seconds!r}: must be 0 to {_MAX_SECONDS} seconds")
+        check_volume(volume)
+        title = title.encode("utf-8")
+        artist_id = self._artist_rows.get(artist)
+        if artist_id is None:
+            artist_id = self._artist_rows[artist] = len(self.artists)
+            self.artists.append(artist)
+
+        row = len(self.seconds)
+        self.ids_hi.append(song_id >> 64)
+        self.ids_lo.append(song_id & _MASK_64)
+        self.seconds.append(seconds)
+        self.volumes.append(volume)
+        self.artist_ids.append(artist_id)
+        self.text += title
+        self.title_offsets.append(len(self.text))
+        if self._row_by_id is not None:
+            self._row_by_id[song_id] = row
+        return row
+
+    def song_id(self, row):
+        # Time: O(1)
+        return (self.ids_hi[row] << 64) | self.ids_lo[row]
+
+    def title(self, row):
+        # Time: O(len(title))
+        return self.text[self.title_offsets[row]:self.title_offsets[row + 1]].decode("utf-8")
+
+    def artist(self, row):
+        # Time: O(1)
+        return self.artists[self.artist_ids[row]]
+
+    def row(self, row):
+        # (id, title, artist, seconds, volume)
+        # Time: O(1)
+        return (self.song_id(row), self.title(row), self.artist(row),
+                self.seconds[row], self.volumes[row])
+
+    def find(self, song_id):
+        # First call builds the id → row map, O(n); afterwards O(1)
+        if self._row_by_id is None:
+            self._row_by_id = {self.song_id(row): row for row in range(len(self))}
+        return self._row_by_id.get(song_id)
+
+    def to_node(self, row):
+        # Materialise a SongNode (same id) for a row, e.g. when a playlist loads
+        # Time: O(1)
+        song_id, title, artist, seconds, volume = self.row(row)
+        return SongNode(title, artist, seconds, volume, song_id)
+
+
+#----------------memory report--------------------------------
+
+def memory_report(n=100_000):
+    # Bytes per song measured with tracemalloc for the old dict-backed node,
+    # the slotted SongNode, and a CatalogStore row
+    import tracemalloc
+
+    class DictSongNode:
+        # The original SongNode layout, kept here only for comparison
+        def __init__(self, title, artist, duration, volume=50):
+            self.id = str(uuid.uuid4())
+            self.title = title
+            self.artist = artist
+            self.duration = duration
+            self.volume = volume
+            self.adjusted_volume = None
+            self.prev = None
+            self.next = None
+
+    titles = [f"Song number {i}" for i in range(n)]
+    artists = [f"Artist {i % 1000}" for i in range(1000)]
+
+    def measure(build):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        keep = build()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del keep
+        return (after - before) / n
+
+    results = {
+        "dict SongNode (str uuid, 'MM:SS')": measure(
+            lambda: [DictSongNode(titles[i], artists[i % 1000], f"{i % 10}:{i % 60:02d}") for i in range(n)]),
+        "slotted SongNode (int id, seconds)": measure(
+            lambda: [SongNode(titles[i], artists[i % 1000], i % 600) for i in range(n)]),
+    }
+
+    def build_store():
+        store = CatalogStore()
+        for i in range(n):
+            store.add(titles[i], artists[i % 1000], i % 600)
+        return store
+    results["CatalogStore row"] = measure(build_store)
+
+    # Title strings are built up front and shared by both node layouts; the
+    # store copies them into its UTF-8 heap, so only its figure includes them
+    print(f"\n--- Bytes per song ({n} songs) ---")
+    for name, per_song in results.items():
+        print(f"{name:<36} {per_song:>8.1f}")
+    print("------------------------------------\n")
+    return results
+
+# memory_report()
@@ -0,0 +1,324 @@
+from contextlib import contextmanager
+import threading
+import time
+
+
+class RWLock:
+    # Many readers or one writer. Writers are preferred (new readers queue
+    # behind a waiting writer) so a steady stream of reads cannot starve edits.
+    # The writing thread may re-enter for reads or writes.
+    # Contention is counted: how often each side had to wait, and for how long.
+    def __init__(self):
+        # Time: O(1), Space: O(1)
+        self.cond = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = None         # thread ident holding the write lock
+        self.depth = 0             # writer re-entries
+        self.waiting_writers = 0
+        self.reads = self.writes = 0
+        self.read_waits = self.write_waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self.cond:
+            if self.writer == me:
+                self.depth += 1
+                return
+            if self.writer is not None or self.waiting_writers:
+                self.read_waits += 1
+                start = time.perf_counter()
+                while self.writer is not None or self.waiting_writers:
+                    self.cond.wait()
+                self._waited(start)
+            self.readers += 1
+            self.reads += 1
+
+    def release_read(self):
+        with self.cond:
+            if self.writer == threading.get_ident():
+                self.depth -= 1
+                return
+            self.readers -= 1
+            if not self.readers:
+                self.cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self.cond:
+            if self.writer == me:
+                self.depth += 1
+                return
+            if self.writer is not None or self.readers:
+                self.write_waits += 1
+                start = time.perf_counter()
+                self.waiting_writers += 1
+                while self.writer is not None or self.readers:
+                    self.cond.wait()
+                self.waiting_writers -= 1
+                self._waited(start)
+            self.writer = me
+            self.writes += 1
+
+    def release_write(self):
+        with self.cond:
+            if self.depth:
+                self.depth -= 1
+                return
+            self.writer = None
+            self.cond.notify_all()
+
+    def stats(self):
+        # Contention metrics since creation
+        with self.cond:
+            return {
+                "reads": self.reads,
+                "writes": self.writes,
+                "read_waits": self.read_waits,
+                "write_waits": self.write_waits,
+                "wait_seconds": self.wait_seconds,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+    def _waited(self, start):
+        # Caller holds self.cond
+        waited = time.perf_counter() - start
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+# Playlist methods that only read under a read lock; everything that relinks
+# nodes, moves `current` or folds pending edits into a sorted view writes
+_PLAYLIST_READS = ("get_song", "find_song", "print_playlist", "validate")
+_PLAYLIST_WRITES = ("add_song", "add_songs", "add_nodes", "add_song_at_start", "insert_song", "insert_node",
+                    "delete_song", "remove_song", "remove_songs", "move_song", "reverse_playlist",
+                    "play_next", "play_previous", "sorted_view", "sort_playlist",
+                    "reorder", "union", "intersect", "difference", "dedupe")
+
+
+class LockedPlaylist:
+    # Concurrency-safe view of a Playlist: reads share an RWLock, edits and
+    # playback take it exclusively. snapshot() copies the order under the
+    # read lock so long scans run without holding it.
+    # Playlists that feed shared listeners (a Catalog, a dashboard) should be
+    # given one shared lock, since their events are delivered on the writer's
+    # thread. Build the playlist with a LockedHistory so pushes are locked too.
+    def __init__(self, playlist, lock=None):
+        # Time: O(1), Space: O(1)
+        object.__setattr__(self, "playlist", playlist)
+        object.__setattr__(self, "lock", lock if lock is not None else RWLock())
+
+    def __getattr__(self, name):
+        # Plain attributes (id, name, length, head, current, ...)
+        return getattr(self.playlist, name)
+
+    def __setattr__(self, name, value):
+        # e.g. PlaylistSwitcher setting `current`
+        with self.lock.write():
+            setattr(self.playlist, name, value)
+
+    def snapshot(self):
+        # Immutable copy of the current order
+        # Time: O(n) under the read lock
+        with self.lock.read():
+            songs = []
+            node = self.playlist.head
+            while node:
+                songs.append(node)
+                node = node.next
+            return tuple(songs)
+
+    def contention(self):
+        return self.lock.stats()
+
+
+def _locked(name, mode):
+    def method(self, *args, **kwargs):
+        with getattr(self.lock, mode)():
+            return getattr(self.playlist, name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+for _name in _PLAYLIST_READS:
+    setattr(LockedPlaylist, _name, _locked(_name, "read"))
+for _name in _PLAYLIST_WRITES:
+    setattr(LockedPlaylist, _name, _locked(_name, "write"))
+
+
+class LockedHistory:
+    # PlaybackHistory behind one mutex: every call either mutates the window
+    # or seeks the shared spill file. Lock order is playlist, then history:
+    # play_next pushes while holding its playlist, and undo takes the playlist
+    # before the history.
+    def __init__(self, history):
+        # Time: O(1), Space: O(1)
+        self.history = history
+        self.lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self.history, name)
+
+    def __len__(self):
+        with self._held():
+            return len(self.history)
+
+    def push(self, song_node):
+        with self._held():
+            self.history.push(song_node)
+
+    def recent(self, offset=0, limit=20):
+        with self._held():
+            return self.history.recent(offset, limit)
+
+    def undo_last_play(self, playlist):
+        if isinstance(playlist, LockedPlaylist):
+            with playlist.lock.write(), self._held():
+                self.history.undo_last_play(playlist.playlist)
+        else:
+            with self._held():
+                self.history.undo_last_play(playlist)
+
+    def contention(self):
+        return {"waits": self.waits, "wait_seconds": self.wait_seconds}
+
+    @contextmanager
+    def _held(self):
+        if not self.lock.acquire(blocking=False):
+            start = time.perf_counter()
+            self.lock.acquire()
+            self.waits += 1
+            self.wait_seconds += time.perf_counter() - start
+        try:
+            yield
+        finally:
+            self.lock.release()
+
+
+class LockedSwitcher:
+    # PlaylistSwitcher whose switch_to is atomic: it holds the switcher mutex
+    # plus the write locks of the playlist being left and the one being
+    # entered (taken in id order, so two switches can never deadlock).
+    def __init__(self, switcher):
+        # Time: O(1), Space: O(1)
+        self.switcher = switcher
+        self.lock = threading.Lock()
+        self.current = None  # the LockedPlaylist last switched to
+
+    @property
+    def current_playlist(self):
+        return self.current
+
+    @property
+    def positions(self):
+        return self.switcher.positions
+
+    def switch_to(self, playlist):
+        # Time: O(1) plus lock waits
+        with self.lock:
+            involved = {id(p): p for p in (self.current, playlist) if isinstance(p, LockedPlaylist)}
+            locks = sorted(involved.values(), key=lambda p: p.playlist.id)
+            for locked in locks:
+                locked.lock.acquire_write()
+            try:
+                raw = playlist.playlist if isinstance(playlist, LockedPlaylist) else playlist
+                self.switcher.switch_to(raw)
+                self.current = playlist
+            finally:
+                for locked in reversed(locks):
+                    locked.lock.release_write()
+
+
+#----------------test--------------------------------
+
+def stress(threads=8, ops=5_000, seed=11):
+    # Hammers two shared playlists, their history and a switcher from many
+    # threads, checking link / index invariants while they run and at the end.
+    # Prints the contention metrics.
+    import contextlib
+    import io
+    import random
+    from playback_history import PlaybackHistory
+    from playlist_engine import Playlist, PlaylistSwitcher
+
+    history = LockedHistory(PlaybackHistory(capacity=200))
+    playlists = [LockedPlaylist(Playlist(history, name=f"Shared {i}")) for i in range(2)]
+    for locked in playlists:
+        locked.add_songs([(f"Song {i}", f"Artist {i % 13}", 120 + i % 200) for i in range(500)])
+    switcher = LockedSwitcher(PlaylistSwitcher())
+    problems = []
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        for step in range(ops):
+            locked = rng.choice(playlists)
+            op = rng.randrange(10)
+            n = locked.length
+            if op == 0:
+                locked.add_song(f"New {index}-{step}", "Stress", 180)
+            elif op == 1 and n > 10:
+                locked.delete_song(rng.randrange(n))
+            elif op == 2 and n > 1:
+                a, b = rng.randrange(n), rng.randrange(n)
+                if a != b:
+                    locked.move_song(a, b)
+            elif op == 3:
+                if locked.current is None:
+                    locked.current = locked.head  # wrapped around: start over
+                locked.play_next()
+            elif op == 4:
+                locked.play_previous()
+            elif op == 5:
+                history.undo_last_play(locked)
+            elif op == 6:
+                locked.get_song(rng.randrange(max(1, n)))
+            elif op == 7:
+                locked.snapshot()
+            elif op == 8:
+                switcher.switch_to(locked)
+            elif step % 500 == 0:
+                problems.extend(locked.validate())
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # play / switch chatter
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    for locked in playlists:
+        problems.extend(locked.validate())
+
+    print(f"\n--- Concurrency stress ({threads} threads x {ops} ops, {elapsed:.2f} s) ---")
+    print("invariants      ", "OK" if not problems else f"{len(problems)} problems, e.g. {problems[0]}")
+    for locked in playlists:
+        stats = locked.contention()
+        print(f"{locked.name:<16} reads {stats['reads']:>7}  writes {stats['writes']:>7}  "
+              f"waits {stats['read_waits'] + stats['write_waits']:>6}  "
+              f"waited {stats['wait_seconds']:.3f} s (max {stats['max_wait_seconds'] * 1e3:.2f} ms)")
+    stats = history.contention()
+    print(f"{'history':<16} waits {stats['waits']:>6}  waited {stats['wait_seconds']:.3f} s")
+    print("-------------------------------------------------------------\n")
+    return problems
+
+# stress()
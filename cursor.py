@@ -0,0 +1,143 @@
+from playback_history import PlaybackHistory
+
+
+class PlaylistCursor:
+    # A listener's position in a playlist that other listeners share. The
+    # playlist is never written to: the position lives here, so any number of
+    # cursors can follow one playlist at O(1) memory each, with no copies.
+    # The cursor holds a SongNode, which follows its song when it is moved.
+    # A deleted node keeps the links it had when it was unlinked, so a cursor
+    # left on one walks on to the next live song the next time it is read.
+    __slots__ = ("playlist", "node", "history", "repeat")
+
+    def __init__(self, playlist, start=None, history=None, repeat=False, history_capacity=100):
+        # Time: O(1), Space: O(history_capacity)
+        self.playlist = playlist
+        self.node = start if start is not None else playlist.head
+        self.history = history if history is not None else PlaybackHistory(capacity=history_capacity, spill=False)
+        self.repeat = repeat
+
+    @property
+    def song(self):
+        # Current song, or None past the end
+        # Time: O(1) amortized
+        self.node = self._live(self.node, "next")
+        return self.node
+
+    @property
+    def position(self):
+        # Index of the current song, or None past the end
+        # Time: O(log n)
+        song = self.song
+        return self.playlist.index.rank(song) if song is not None else None
+
+    def advance(self):
+        # Moves past the current song; returns the new song or None
+        # Time: O(1) amortized
+        song = self.song
+        node = self._live(song.next, "next") if song is not None else None
+        if node is None and self.repeat:
+            node = self.playlist.head
+        self.node = node
+        return node
+
+    def play_next(self):
+        # Same contract as Playlist.play_next: play the current song, then move on
+        # Time: O(1) amortized
+        song = self.song
+        if song is None:
+            print("No song to play.")
+            return
+        print(f"Now playing: {song.title} by {song.artist}")
+        self.history.push(song)
+        self.advance()
+
+    def play_previous(self):
+        # Time: O(1) amortized
+        song = self.song
+        previous = song.prev if song is not None else self.playlist.tail
+        previous = self._live(previous, "prev")
+        if previous is None:
+            print("No previous song.")
+            return
+        self.node = previous
+        print(f"Now playing: {previous.title} by {previous.artist}")
+        self.history.push(previous)
+
+    def seek(self, index):
+        # Time: O(log n)
+        song = self.playlist.get_song(index)
+        if song is not None:
+            self.node = song
+        return song
+
+    def _live(self, node, direction):
+        # Follows `direction` links from node until a song still in the playlist
+        # Time: O(deleted songs skipped)
+        while node is not None and self.playlist.find_song(node.id) is not node:
+            node = getattr(node, direction)
+        return node
+
+
+class CursorSwitcher:
+    # PlaylistSwitcher for one listener. Positions are saved as song ids per
+    # playlist, so a saved spot survives the node being deleted (the listener
+    # starts over) and never pins it in memory; the playlists are not touched.
+    def __init__(self, history_capacity=100):
+        # Time: O(1), Space: O(p) p - number of playlists
+        self.playlist_stacks = {}  # playlist_id → stack of song ids
+        self.history = PlaybackHistory(capacity=history_capacity, spill=False)
+        self.cursor = None
+
+    @property
+    def current_playlist(self):
+        return self.cursor.playlist if self.cursor is not None else None
+
+    def switch_to(self, playlist):
+        # Returns the listener's cursor into `playlist`
+        # Time: O(1)
+        if self.cursor is not None and self.cursor.song is not None:
+            self.playlist_stacks.setdefault(self.cursor.playlist.id, []).append(self.cursor.song.id)
+
+        stack = self.playlist_stacks.get(playlist.id)
+        resumed = None
+        while stack and resumed is None:
+            resumed = playlist.find_song(stack.pop())
+        self.cursor = PlaylistCursor(playlist, resumed, self.history)
+        if resumed is not None:
+            print(f"[Resumed] {playlist.name} from '{resumed.title}'")
+        else:
+            print(f"[Started] {playlist.name} from beginning.")
+        return self.cursor
+
+
+#----------------test--------------------------------
+
+def test1():
+    from playlist_engine import Playlist
+
+    playlist = Playlist(None, name="Shared")
+    for i in range(6):
+        playlist.add_song(f"Song {i}", f"Artist {i % 2}", 200)
+
+    alice, bob = PlaylistCursor(playlist), PlaylistCursor(playlist, start=playlist.get_song(2))
+    alice.play_next()
+    bob.play_next()
+    print(alice.song.title, bob.song.title)      # Song 1, Song 3
+
+    playlist.delete_song(3)                       # under bob
+    playlist.delete_song(3)                       # and the song after it
+    print(bob.song.title)                         # Song 5
+    playlist.move_song(1, 3)                      # alice's song moves with her
+    print(alice.song.title, alice.position)      # Song 1 3
+
+    other = Playlist(None, name="Other")
+    other.add_song("Elsewhere", "Artist", 100)
+    switcher = CursorSwitcher()
+    cursor = switcher.switch_to(playlist)
+    cursor.play_next()
+    switcher.switch_to(other)
+    print(switcher.switch_to(playlist).song.title)  # Song 2, after the Song 0 play
+    print(playlist.current.title)                 # Song 0: the playlist's own cursor is untouched
+
+# test1()
@@ -0,0 +1,97 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; DurationColumn falls back to plain lists
+    np = None
+
+
+def parse_duration(duration):
+    # "M:SS", "MM:SS" or "H:MM:SS" → whole seconds; ints pass through
+    # Time: O(1), Space: O(1)
+    if isinstance(duration, int) and not isinstance(duration, bool):
+        if duration < 0:
+            raise ValueError(f"Invalid duration {duration!r}: must not be negative")
+        return duration
+
+    parts = str(duration).strip().split(":")
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Invalid duration {duration!r}: expected MM:SS or H:MM:SS")
+    values = [int(part) for part in parts]
+    if values[-1] > 59 or (len(values) == 3 and values[1] > 59):
+        raise ValueError(f"Invalid duration {duration!r}: minutes and seconds must be below 60")
+
+    seconds = 0
+    for value in values:
+        seconds = seconds * 60 + value
+    return seconds
+
+
+def format_duration(seconds):
+    # Inverse of parse_duration: "M:SS", or "H:MM:SS" from one hour up
+    # Time: O(1), Space: O(1)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+class DurationColumn:
+    # Playlist durations packed into one column (a NumPy array when available)
+    # so totals, percentiles and top-k come from vectorized passes.
+    def __init__(self, songs):
+        # Time: O(n), Space: O(n)
+        self.songs = list(songs)
+        seconds = [song.seconds for song in self.songs]
+        self.values = np.asarray(seconds, dtype=np.int64) if np is not None else seconds
+
+    @classmethod
+    def from_playlist(cls, playlist):
+        # Time: O(n), Space: O(n)
+        songs = []
+        current = playlist.head
+        while current:
+            songs.append(current)
+            current = current.next
+        return cls(songs)
+
+    def __len__(self):
+        return len(self.songs)
+
+    def stats(self, k=5, percentiles=(50, 90, 99)):
+        # Total length, percentiles (linear interpolation) and the k longest songs
+        # Time: O(n) with NumPy, O(n log n) without; Space: O(n)
+        n = len(self.songs)
+        if n == 0:
+            return {"count": 0, "total_seconds": 0, "percentiles": {}, "top_k": []}
+
+        if np is not None:
+            values = self.values
+            total = int(values.sum())
+            points = np.percentile(values, percentiles)
+            k = min(k, n)
+            top = np.argpartition(-values, k - 1)[:k]
+            top = top[np.argsort(-values[top], kind="stable")]
+            return {
+                "count": n,
+                "total_seconds": total,
+                "percentiles": {q: float(p) for q, p in zip(percentiles, points)},
+                "top_k": [self.songs[i] for i in top.tolist()],
+            }
+
+        values = self.values
+        ordered = sorted(values)
+        order = sorted(range(n), key=values.__getitem__, reverse=True)
+        return {
+            "count": n,
+            "total_seconds": sum(values),
+            "percentiles": {q: _percentile(ordered, q) for q in percentiles},
+            "top_k": [self.songs[i] for i in order[:k]],
+        }
+
+
+def _percentile(ordered, q):
+    # Same "linear" interpolation NumPy uses by default
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return float(ordered[low] + (ordered[high] - ordered[low]) * (position - low))
@@ -0,0 +1,39 @@
+
+class EventSource:
+    # Minimal publish/subscribe shared by Playlist, PlaybackHistory and RatingBST.
+    # A listener implements only the on_* hooks it cares about; each hook is
+    # called as hook(source, *args).
+    def __init__(self):
+        # Time: O(1), Space: O(1)
+        self.listeners = []
+
+    def subscribe(self, listener):
+        # Time: O(l) for l listeners
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        # Time: O(l)
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def emit(self, event, *args):
+        # Time: O(l)
+        for listener in self.listeners:
+            handler = getattr(listener, event, None)
+            if handler:
+                handler(self, *args)
+
+    def emit_batch(self, event, item_event, items):
+        # One `event` call with the whole batch for listeners that handle it,
+        # otherwise one `item_event` call per item
+        # Time: O(l * m) worst case for m items
+        for listener in self.listeners:
+            handler = getattr(listener, event, None)
+            if handler:
+                handler(self, items)
+                continue
+            handler = getattr(listener, item_event, None)
+            if handler:
+                for item in items:
+                    handler(self, item)
@@ -0,0 +1,202 @@
+from array import array
+from collections import Counter
+from itertools import chain
+from text_utils import normalize_text
+
+
+class FuzzyIndex:
+    # Trigram inverted index over normalised titles and artists for typo-tolerant
+    # search ("kesariyaa" → "Kesariya"). Postings are split by text length, so a
+    # query only scans texts within max_distance characters of its own length.
+    # Candidates come from the rarest query trigrams, are scored by shared
+    # trigrams, and the best few are re-ranked by a bounded edit distance.
+    # Removal tombstones a document; postings are compacted once half the
+    # documents are dead.
+    def __init__(self, max_distance=2, posting_budget=20_000, rerank=32):
+        # Time: O(1), Space: O(1)
+        self.max_distance = max_distance      # edits tolerated in the re-rank
+        self.posting_budget = posting_budget  # postings scanned per query, caps latency
+        self.rerank = rerank                  # candidates re-ranked by edit distance
+        self.postings = {}   # (trigram, text length) → array("I") of doc numbers
+        self.docs = []       # doc number → SongNode, None once removed
+        self.texts = []      # doc number → (normalised title, normalised artist)
+        self.doc_of = {}     # song_id → doc number
+        self.dead = 0
+
+    def __len__(self):
+        return len(self.doc_of)
+
+    def add(self, song_node):
+        # Time: O(len(title) + len(artist))
+        if song_node.id in self.doc_of:
+            self.remove(song_node.id)
+        doc = len(self.docs)
+        title, artist = normalize_text(song_node.title), normalize_text(song_node.artist)
+        self.docs.append(song_node)
+        self.texts.append((title, artist))
+        self.doc_of[song_node.id] = doc
+        postings = self.postings
+        keys = {(gram, len(title)) for gram in trigrams(title)}
+        keys.update((gram, len(artist)) for gram in trigrams(artist))
+        for key in keys:
+            posting = postings.get(key)
+            if posting is None:
+                posting = postings[key] = array("I")
+            posting.append(doc)
+
+    def remove(self, song_id):
+        # Time: O(1) amortized
+        doc = self.doc_of.pop(song_id, None)
+        if doc is None:
+            return
+        self.docs[doc] = None
+        self.texts[doc] = None
+        self.dead += 1
+        if self.dead > 1000 and self.dead * 2 > len(self.docs):
+            self._compact()
+
+    def search(self, query, limit=10):
+        # Songs closest to `query`, best first
+        # Time: O(posting_budget + rerank * len(query) * max_distance)
+        query = normalize_text(query)
+        bound = self.max_distance
+        lengths = range(max(1, len(query) - bound), len(query) + bound + 1)
+        lists = []
+        for gram in trigrams(query):
+            postings = [self.postings[key] for key in ((gram, length) for length in lengths) if key in self.postings]
+            if postings:
+                lists.append((sum(map(len, postings)), postings))
+        if not lists:
+            return []
+        lists.sort(key=lambda item: item[0])
+
+        # Scan the rarest lists first and stop at the posting budget. A song
+        # within d edits keeps all but 3d of the query trigrams, so it is
+        # usually caught by the rare lists; the budget trades that guarantee
+        # for a hard latency cap when every query trigram is common.
+        scanned, total = [], 0
+        for size, postings in lists:
+            if scanned and total + size > self.posting_budget:
+                break
+            scanned.extend(postings)
+            total += size
+        counts = Counter(chain.from_iterable(scanned))
+
+        docs, texts = self.docs, self.texts
+        scored = []
+        for doc, shared in counts.most_common(self.rerank * 4):
+            if docs[doc] is None:
+                continue
+            scored.append((doc, shared))
+            if len(scored) == self.rerank:
+                break
+
+        ranked = []
+        for doc, shared in scored:
+            title, artist = texts[doc]
+            distance = min(bounded_edit_distance(query, title, bound),
+                           bounded_edit_distance(query, artist, bound))
+            if distance <= bound:
+                ranked.append((distance, -shared, len(title), doc))
+        ranked.sort()
+        return [docs[doc] for _, _, _, doc in ranked[:limit]]
+
+    def _compact(self):
+        # Renumber live documents and rebuild postings
+        # Time: O(total trigrams)
+        live = [song for song in self.docs if song is not None]
+        self.postings, self.docs, self.texts, self.doc_of = {}, [], [], {}
+        self.dead = 0
+        for song in live:
+            self.add(song)
+
+
+def trigrams(text):
+    # Padded character trigrams: "tum" → {" tu", "tum", "um "}
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a, b, bound):
+    # Levenshtein distance, or bound + 1 as soon as it must exceed `bound`
+    # Time: O(len(a) * (2 * bound + 1)) - only the diagonal band is filled
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    if len(a) > len(b):
+        a, b = b, a
+    over = bound + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - bound), min(len(b), i + bound)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= bound else over
+        best = current[0]
+        char = a[i - 1]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > bound:
+            return over
+        previous = current
+    return min(previous[len(b)], over)
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(n=1_000_000, queries=2_000, seed=7):
+    # Reproducible: seeded transliteration-style catalog, one typo per query.
+    # Reports build time, p50/p99 latency and how often the intended song is
+    # in the top 10.
+    import random
+    import time
+    from playlist_engine import SongNode
+
+    rng = random.Random(seed)
+    syllables = [consonant + vowel for consonant in ["k", "kh", "g", "ch", "j", "t", "d", "n", "p", "b", "bh",
+                                                     "m", "y", "r", "l", "v", "sh", "s", "h", "z", "dh", "ph"]
+                 for vowel in ["a", "aa", "i", "ee", "u", "oo", "e", "ai", "o", "au"]]
+
+    def word():
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+
+    songs = [SongNode(" ".join(word() for _ in range(rng.randint(1, 3))).title(), f"{word().title()} {word().title()}", 200)
+             for _ in range(n)]
+
+    index = FuzzyIndex()
+    start = time.perf_counter()
+    for song in songs:
+        index.add(song)
+    build_time = time.perf_counter() - start
+
+    def typo(text):
+        i = rng.randrange(len(text))
+        kind = rng.randrange(3)
+        if kind == 0:
+            return text[:i] + text[i] + text[i:]          # doubled letter, "kesariyaa"
+        if kind == 1:
+            return text[:i] + text[i + 1:]                # dropped letter
+        return text[:i] + rng.choice("aeiouy") + text[i + 1:]  # swapped vowel
+
+    timings, hits = [], 0
+    for song in rng.sample(songs, queries):
+        query = typo(song.title.lower())
+        start = time.perf_counter()
+        results = index.search(query)
+        timings.append(time.perf_counter() - start)
+        hits += any(result is song for result in results)
+    timings.sort()
+
+    print(f"\n--- FuzzyIndex benchmark ({n} songs, {len(index.postings)} posting lists, seed {seed}) ---")
+    print(f"build           {build_time:>9.2f} s")
+    print(f"p50 latency     {timings[len(timings) // 2] * 1e3:>9.2f} ms")
+    print(f"p99 latency     {timings[int(len(timings) * 0.99)] * 1e3:>9.2f} ms")
+    print(f"recall@10       {hits / queries:>9.1%}")
+    print("---------------------------------------------------------------\n")
+
+# benchmark()
@@ -0,0 +1,170 @@
+from durations import parse_duration
+from itertools import islice
+from playlist_engine import check_volume, new_song_ids
+import csv
+import json
+import time
+
+# Row layout shared by every reader: (title, artist, seconds, rating, volume),
+# rating None when the source has none
+FIELDS = ("title", "artist", "duration", "rating", "volume")
+# Durations are stored as unsigned 32-bit seconds (CatalogStore, songs.dat)
+MAX_SECONDS = 2 ** 32 - 1
+
+
+def read_csv(path):
+    # Streams rows from a CSV with a header naming at least title, artist, duration
+    # Time: O(1) per row, Space: O(1) - one line in memory at a time
+    with open(path, newline="", encoding="utf-8") as handle:
+        yield from csv.DictReader(handle)
+
+
+def read_jsonl(path):
+    # Streams one JSON object per line; blank lines are skipped
+    # Time: O(1) per row, Space: O(1)
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_records(source):
+    # A .csv / .jsonl path, or any iterable of dicts or tuples in FIELDS order
+    if isinstance(source, str):
+        if source.endswith(".csv"):
+            return read_csv(source)
+        if source.endswith((".jsonl", ".ndjson")):
+            return read_jsonl(source)
+        raise ValueError(f"Unsupported catalog file {source!r}: expected .csv or .jsonl")
+    return iter(source)
+
+
+def parse_record(record):
+    # dict or tuple → (title, artist, seconds, rating, volume); ValueError if malformed
+    # Time: O(1)
+    if isinstance(record, dict):
+        values = [record.get(field) for field in FIELDS]
+    else:
+        values = list(record[:5]) + [None] * (5 - len(record))
+    title, artist, duration, rating, volume = values
+    if not title or not artist:
+        raise ValueError(f"Invalid record {record!r}: title and artist are required")
+    if isinstance(duration, str) and duration.strip().isdigit():
+        duration = int(duration)  # plain seconds
+    seconds = parse_duration(duration)
+    if seconds > MAX_SECONDS:
+        raise ValueError(f"Invalid duration {duration!r}: longer than {MAX_SECONDS} seconds")
+    rating = float(rating) if rating not in (None, "") else None
+    if rating is not None and not 1 <= rating <= 5:
+        raise ValueError(f"Invalid rating {rating!r}: must be between 1 and 5")
+    volume = check_volume(int(volume)) if volume not in (None, "") else 50
+    return title, artist, seconds, rating, volume
+
+
+def chunks(records, chunk_size, counts):
+    # Parsed rows in lists of at most chunk_size. Malformed rows are left out
+    # and counted in counts["skipped"].
+    # Time: O(1) per row, Space: O(chunk_size)
+    iterator = iter(records)
+    while True:
+        batch = []
+        seen = 0
+        for record in islice(iterator, chunk_size):
+            seen += 1
+            try:
+                batch.append(parse_record(record))
+            except (ValueError, TypeError):
+                counts["skipped"] += 1
+        if batch:
+            yield batch
+        if seen < chunk_size:
+            return
+
+
+def ingest(catalog, playlist, source, chunk_size=10_000, report=True):
+    # Bulk load into a playlist through the catalog, so the linked list, the
+    # rating tree and the lookup maps are each extended once per chunk.
+    # Returns {"rows", "skipped", "seconds", "rows_per_second"}.
+    # Time: O(n) overall, Space: O(chunk_size) beyond the structures themselves
+    start = time.perf_counter()
+    counts = {"rows": 0, "skipped": 0}
+    for batch in chunks(read_records(source), chunk_size, counts):
+        catalog.add_songs(playlist, batch)
+        counts["rows"] += len(batch)
+    return _finish(counts, start, report)
+
+
+def ingest_store(store, source, chunk_size=100_000, report=True):
+    # Bulk load into a CatalogStore (typed columns, no SongNodes), for catalogs
+    # too large to keep as objects: ~50 bytes per song, the file is streamed.
+    # Ratings are not part of the store and are dropped.
+    # Time: O(n), Space: O(chunk_size) beyond the store's columns
+    start = time.perf_counter()
+    counts = {"rows": 0, "skipped": 0}
+    for batch in chunks(read_records(source), chunk_size, counts):
+        for (title, artist, seconds, _, volume), song_id in zip(batch, new_song_ids(len(batch))):
+            store.add(title, artist, seconds, volume, song_id)
+        counts["rows"] += len(batch)
+    return _finish(counts, start, report)
+
+
+def _finish(counts, start, report):
+    elapsed = time.perf_counter() - start
+    stats = dict(counts, seconds=elapsed, rows_per_second=counts["rows"] / elapsed if elapsed else 0.0)
+    if report:
+        print(f"[Ingest] {stats['rows']} rows in {elapsed:.2f} s ({stats['rows_per_second']:,.0f} rows/s), "
+              f"{stats['skipped']} skipped")
+    return stats
+
+
+#----------------benchmark--------------------------------
+
+def write_synthetic_csv(path, n, seed=13):
+    # Reproducible catalog file: n songs over n // 20 artists
+    import random
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(FIELDS)
+        for i in range(n):
+            writer.writerow((f"Song {i}", f"Artist {rng.randrange(max(1, n // 20))}",
+                             f"{rng.randint(1, 9)}:{rng.randint(0, 59):02d}", rng.randint(1, 5), rng.randint(0, 100)))
+
+
+def benchmark(sizes=(100_000, 1_000_000), store_size=10_000_000):
+    # Rows/s into the full in-memory system (playlist + ratings + lookup), and
+    # into a CatalogStore for the 10M-row case, with tracemalloc peaks
+    import os
+    import tempfile
+    import tracemalloc
+    from catalog import Catalog
+    from catalog_store import CatalogStore
+    from instant_song_lookup import SongLookup
+    from playlist_engine import Playlist
+    from SongRating_tree import RatingBST
+
+    print("\n--- Ingest benchmark ---")
+    for n in sizes:
+        path = os.path.join(tempfile.mkdtemp(), "catalog.csv")
+        write_synthetic_csv(path, n)
+        catalog = Catalog()
+        catalog.register(SongLookup())
+        catalog.register(RatingBST())
+        tracemalloc.start()
+        stats = ingest(catalog, Playlist(None), path, report=False)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        os.remove(path)
+        print(f"system  {n:>10} rows  {stats['rows_per_second']:>10,.0f} rows/s  peak {peak / n:>6.0f} B/row")
+
+    path = os.path.join(tempfile.mkdtemp(), "catalog.csv")
+    write_synthetic_csv(path, store_size)
+    tracemalloc.start()
+    stats = ingest_store(CatalogStore(), path, report=False)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    os.remove(path)
+    print(f"store   {store_size:>10} rows  {stats['rows_per_second']:>10,.0f} rows/s  peak {peak / store_size:>6.0f} B/row")
+    print("------------------------\n")
+
+# benchmark()
@@ -2,35 +2,159 @@ from SongRating_tree import RatingBST, SongNode
 from playlist_engine import Playlist, SongNode , PlaylistSwitcher
 from playback_history import PlaybackHistory
 from snapshot import SnapshotDashboard
+from text_utils import normalize_text
+from fuzzy_search import FuzzyIndex
+from bisect import bisect_left, insort
 
 class SongLookup:
-    def __init__(self):
-        self.id_map = {}       # song_id (UUID) → SongNode
-        self.title_map = {}    # title → [SongNode, ...]
+    # Hash-map lookups by id, title and artist. Title/artist keys are
+    # normalised (case, accents, spacing) and each key maps to an id-keyed dict,
+    # so removal is O(1). A sorted array of title keys serves prefix search, and
+    # an optional trigram FuzzyIndex serves typo-tolerant search.
+    def __init__(self, fuzzy=False):
+        self.id_map = {}         # song_id → SongNode
+        self.title_map = {}      # normalised title → {song_id: SongNode}
+        self.artist_map = {}     # normalised artist → {song_id: SongNode}
+        self.sorted_titles = []  # normalised titles, sorted, for bisect prefix search
+        self.stale_titles = set()  # keys still in sorted_titles whose bucket emptied
+        self.fuzzy = FuzzyIndex() if fuzzy else None
 
     def add_song(self, song_node):
-        # Map by ID
+        # Time: O(1), plus O(t) memmove when the title is new to the index
         self.id_map[song_node.id] = song_node
+        key = normalize_text(song_node.title)
+        if self._add_to(self.title_map, key, song_node):
+            if key in self.stale_titles:
+                self.stale_titles.discard(key)
+            else:
+                insort(self.sorted_titles, key)
+        self._add_to(self.artist_map, normalize_text(song_node.artist), song_node)
+        if self.fuzzy is not None:
+            self.fuzzy.add(song_node)
 
-        # Map by title (many songs can share the same title)
-        if song_node.title not in self.title_map:
-            self.title_map[song_node.title] = []
-        self.title_map[song_node.title].append(song_node)
+    def add_songs(self, song_nodes):
+        # Bulk add: new title keys are sorted into the prefix index once
+        # Time: O(m + t log t) for m songs and t title keys
+        new_titles = []
+        for song_node in song_nodes:
+            self.id_map[song_node.id] = song_node
+            key = normalize_text(song_node.title)
+            if self._add_to(self.title_map, key, song_node):
+                if key in self.stale_titles:
+                    self.stale_titles.discard(key)
+                else:
+                    new_titles.append(key)
+            self._add_to(self.artist_map, normalize_text(song_node.artist), song_node)
+            if self.fuzzy is not None:
+                self.fuzzy.add(song_node)
+        if new_titles:
+            self.sorted_titles.extend(new_titles)
+            self.sorted_titles.sort()
 
     def get_by_id(self, song_id):
+        # Time: O(1)
         return self.id_map.get(song_id)
 
     def get_by_title(self, title):
-        return self.title_map.get(title, [])
+        # Time: O(1 + m) for m matches
+        return list(self.title_map.get(normalize_text(title), {}).values())
+
+    def get_by_artist(self, artist):
+        # Time: O(1 + m)
+        return list(self.artist_map.get(normalize_text(artist), {}).values())
+
+    def search_prefix(self, prefix, limit=10):
+        # Search-as-you-type: songs whose title starts with `prefix`
+        # Time: O(log t + m) for m songs returned
+        prefix = normalize_text(prefix)
+        results = []
+        position = bisect_left(self.sorted_titles, prefix)
+        while position < len(self.sorted_titles) and len(results) < limit:
+            key = self.sorted_titles[position]
+            if not key.startswith(prefix):
+                break
+            for song in self.title_map.get(key, {}).values():
+                results.append(song)
+                if len(results) == limit:
+                    break
+            position += 1
+        return results
+
+    def search_fuzzy(self, query, limit=10):
+        # Typo-tolerant title/artist search ("kesariyaa"); needs fuzzy=True
+        # Time: bounded by the FuzzyIndex posting budget
+        if self.fuzzy is None:
+            return []
+        return self.fuzzy.search(query, limit)
 
     def remove_song(self, song_id):
+        # Time: O(1) amortized
         song = self.id_map.pop(song_id, None)
         if song:
-            # Remove from title map too
-            if song.title in self.title_map:
-                self.title_map[song.title] = [s for s in self.title_map[song.title] if s.id != song_id]
-                if not self.title_map[song.title]:
-                    del self.title_map[song.title]
+            self._unindex(song_id, song.title, song.artist)
+
+    def _unindex(self, song_id, title, artist):
+        # Drop the title/artist/fuzzy entries filed under the given keys
+        # Time: O(1) amortized
+        key = normalize_text(title)
+        if self._remove_from(self.title_map, key, song_id):
+            # Leave the key in sorted_titles; compact once half are stale
+            self.stale_titles.add(key)
+            if len(self.stale_titles) * 2 > len(self.sorted_titles):
+                self._compact_titles()
+        self._remove_from(self.artist_map, normalize_text(artist), song_id)
+        if self.fuzzy is not None:
+            self.fuzzy.remove(song_id)
+
+    #----------------catalog hooks--------------------------------
+
+    def on_songs_added(self, catalog, songs):
+        # Time: O(m + t log t)
+        self.add_songs(songs)
+
+    def on_songs_removed(self, catalog, songs):
+        # Time: O(m) amortized
+        for song in songs:
+            self.remove_song(song.id)
+
+    def on_songs_unloaded(self, catalog, songs):
+        # Only resident songs are searchable
+        self.on_songs_removed(catalog, songs)
+
+    def on_songs_updated(self, catalog, updates):
+        # Re-file songs whose title or artist changed, using the old keys
+        # Time: O(m) amortized
+        for song, changes, previous in updates:
+            if "title" in previous or "artist" in previous:
+                self._unindex(song.id, previous.get("title", song.title), previous.get("artist", song.artist))
+                self.add_song(song)
+
+    def _compact_titles(self):
+        # Time: O(t)
+        self.sorted_titles = [key for key in self.sorted_titles if key not in self.stale_titles]
+        self.stale_titles = set()
+
+    @staticmethod
+    def _add_to(index, key, song_node):
+        # True when the key is new to the index
+        bucket = index.get(key)
+        if bucket is None:
+            index[key] = {song_node.id: song_node}
+            return True
+        bucket[song_node.id] = song_node
+        return False
+
+    @staticmethod
+    def _remove_from(index, key, song_id):
+        # True when the key's bucket became empty
+        bucket = index.get(key)
+        if bucket is None:
+            return False
+        bucket.pop(song_id, None)
+        if not bucket:
+            del index[key]
+            return True
+        return False
 
 
 #----------------test(lookup,sort,dasborad)------------------------
@@ -59,12 +183,12 @@ def test1():
     if song:
         print(f"[Lookup by ID] Found: {song.title} by {song.artist}")
 
-    # Get all songs by title
-    title_query = "Tum Hi Ho"
+    # Get all songs by title (case-insensitive)
+    title_query = "tum hi ho"
     matches = lookup.get_by_title(title_query)
     print(f"[Lookup by Title] Matches for '{title_query}':")
     for s in matches:
-        print(f"- [{s.id[:8]}] {s.title} by {s.artist}")
+        print(f"- [{s.short_id}] {s.title} by {s.artist}")
 
     playlist.print_playlist()
     #check sorting functionality
@@ -78,7 +202,8 @@ def test1():
 
     # Restore original order (recently added)
     print("[Restoring recently added order]")
-    # Could be skipped if original playlist structure was preserved elsewhere
+    playlist.sort_playlist(criteria="recent")
+    playlist.print_playlist()
     
     # After building playlist, history, and rating tree
     dashboard = SnapshotDashboard(playlist, history, rating_tree)
@@ -127,4 +252,50 @@ def test2():
     switcher.switch_to(playlist1)
     playlist1.play_next()  # Resumes from last position
 
-# test2()
\ No newline at end of file
+# test2()
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(n=1_000_000, queries=10_000):
+    # Latency percentiles for each lookup at n titles
+    import random
+    import time
+
+    rng = random.Random(n)
+    words = ["dil", "tum", "pyaar", "kesariya", "raat", "sanam", "ishq", "zindagi", "yaara", "baarish",
+             "jaana", "mohabbat", "tere", "mere", "sapne", "chaand", "hawa", "naina", "saath", "kabira"]
+    songs = [SongNode(f"{rng.choice(words).title()} {rng.choice(words)} {i}", f"Artist {i % 5000}", 180)
+             for i in range(n)]
+
+    lookup = SongLookup()
+    start = time.perf_counter()
+    lookup.add_songs(songs)
+    build_time = time.perf_counter() - start
+
+    def percentiles(op, args):
+        timings = []
+        for arg in args:
+            start = time.perf_counter()
+            op(arg)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        return timings[len(timings) // 2] * 1e6, timings[int(len(timings) * 0.99)] * 1e6
+
+    sample = rng.sample(songs, queries)
+    results = {
+        "get_by_id": percentiles(lookup.get_by_id, [s.id for s in sample]),
+        "get_by_title (any case)": percentiles(lookup.get_by_title, [s.title.upper() for s in sample]),
+        "get_by_artist": percentiles(lookup.get_by_artist, [s.artist for s in sample]),
+        "search_prefix (top 10)": percentiles(lookup.search_prefix, [s.title[:rng.randrange(1, 8)] for s in sample]),
+        "remove_song": percentiles(lookup.remove_song, [s.id for s in sample]),
+        "add_song": percentiles(lookup.add_song, sample),
+    }
+
+    print(f"\n--- SongLookup latency ({n} titles, bulk build {build_time:.2f} s) ---")
+    print(f"{'operation':<26} {'p50':>10} {'p99':>10}")
+    for name, (p50, p99) in results.items():
+        print(f"{name:<26} {p50:>7.2f} us {p99:>7.2f} us")
+    print("---------------------------------------------------------\n")
+
+# benchmark()
@@ -1,46 +1,39 @@
 # main.py
 
-import sys
-import uuid
-from playlist_engine import Playlist, SongNode, PlaylistSwitcher
+from playlist_engine import Playlist, PlaylistSwitcher
+from catalog import Catalog
+from storage import Library
+from wal import LibraryStore, WriteAheadLog, checkpoint, recover
+from persistent_playlist import EditHistory
+from shuffle import Shuffle, SmartShuffle
+from recommender import Recommender
+import os
 from playback_history import PlaybackHistory
 from SongRating_tree import RatingBST
 from instant_song_lookup import SongLookup
 from snapshot import SnapshotDashboard
-from volumecontrol import VolumeNormalizer
+from volumecontrol import MODES, VolumeNormalizer
+from durations import parse_duration
+
+# Saved playlists, ratings, history and switcher positions live here
+DATA_DIR = "playwise_data"
+# Playlists kept in memory at once; the others wait on disk until switched to
+RESIDENT_PLAYLISTS = 8
 
 # Helper function to convert duration string to seconds for sorting
 def duration_to_seconds(duration_str):
     try:
-        minutes, seconds = map(int, duration_str.split(":"))
-        return minutes * 60 + seconds
-    except (ValueError, IndexError):
+        return parse_duration(duration_str)
+    except ValueError:
         return 0
 
 # A helper function to add a song to the playlist, rating tree, and lookup map
-def add_song_to_system(playlist, rating_tree, lookup, title, artist, duration, rating, volume=50):
-    playlist.add_song(title, artist, duration)
-    new_song_node = playlist.tail
-    new_song_node.volume = volume
-    rating_tree.insert_song(new_song_node, rating)
-    lookup.add_song(new_song_node)
-
-def main():
-    """
-    Main function to run the PlayWise music engine application.
-    """
-    # -----------------------------------------------------------
-    # 1. Initialization and Setup
-    # -----------------------------------------------------------
-    print("Initializing PlayWise Music Engine...")
+def add_song_to_system(catalog, playlist, title, artist, duration, rating, volume=50):
+    # The catalog fans the new song out to every registered index
+    return catalog.add_song(playlist, title, artist, duration, rating, volume)
 
-    # Initialize all data structures and components
-    history = PlaybackHistory()
-    rating_tree = RatingBST()
-    lookup = SongLookup()
-    switcher = PlaylistSwitcher()
-    
-    # Create two playlists
+def create_sample_playlists(catalog, history):
+    # First run: two demo playlists, added through the catalog
     playlist1 = Playlist(history, name="Bollywood Vibes")
     playlist2 = Playlist(history, name="Romantic Classics")
 
@@ -71,22 +64,69 @@ def main():
         ("Tere Sang Yaara", "Atif Aslam", "4:50", 5, 80),
     ]
 
-    # Populate playlists and sync all data structures
+    # Populate playlists and sync all data structures (one batch per playlist)
     print("Populating initial playlists...")
-    for song_data in songs_p1:
-        add_song_to_system(playlist1, rating_tree, lookup, *song_data)
-    
-    for song_data in songs_p2:
-        add_song_to_system(playlist2, rating_tree, lookup, *song_data)
-
-    # Set the initial playlist to playlist1
-    switcher.switch_to(playlist1)
+    catalog.add_songs(playlist1, songs_p1)
+    catalog.add_songs(playlist2, songs_p2)
+    return playlist1, playlist2
+
+def main():
+    """
+    Main function to run the PlayWise music engine application.
+    """
+    # -----------------------------------------------------------
+    # 1. Initialization and Setup
+    # -----------------------------------------------------------
+    print("Initializing PlayWise Music Engine...")
+
+    # Initialize all data structures and components
+    library = Library(DATA_DIR)
+    lookup = SongLookup(fuzzy=True)
+    history = PlaybackHistory(spill_path=library.history_path, resolver=lookup.get_by_id)  # entries are song ids
+    rating_tree = RatingBST()
+
+    # The catalog owns the songs and keeps the lookup and rating tree in sync
+    catalog = Catalog()
+    catalog.register(lookup)
+    catalog.register(rating_tree)
+
+    # Playlist edits are logged before anything else can lose them
+    wal = WriteAheadLog(os.path.join(DATA_DIR, "playlists.wal"))
+    wal.cover(library)  # song records and ratings are synced with every group commit
+    # Cold playlists are evicted back to the library and reloaded on demand
+    switcher = PlaylistSwitcher(RESIDENT_PLAYLISTS, LibraryStore(library, catalog, wal, history))
+    if library.exists():
+        print(f"Loading saved library from '{DATA_DIR}'...")
+        recover(wal, library, catalog, rating_tree, history, switcher)
+    else:
+        for playlist in create_sample_playlists(catalog, history):
+            switcher.add(playlist)
+            wal.attach(playlist)
+        library.attach(catalog, rating_tree)  # from here on every change is appended to disk
+        checkpoint(wal, library, list(switcher.resident.values()), history, switcher)
+
+    # Resume the saved playlist, or start with the first one
+    if switcher.current_playlist is None:
+        switcher.switch_to(next(iter(switcher.names)))
     current_playlist = switcher.current_playlist
 
+    # Edits made from here on can be undone and redone, per resident playlist
+    edits = {current_playlist.id: EditHistory(current_playlist, rating_tree)}
+    shuffles = {}  # playlist id → active Shuffle / SmartShuffle
+
+    # Co-play index over the listening history, warmed from the saved plays
+    recommender = Recommender(history, rating_tree, resolver=lookup.get_by_id)
+    recommender.seed()
+
+    # The dashboard follows change events, so it is built once and kept current
+    dashboard = SnapshotDashboard(current_playlist, history, rating_tree)
+
     # -----------------------------------------------------------
     # 2. Main User Interface Loop
     # -----------------------------------------------------------
     while True:
+        if wal.checkpoint_due:
+            checkpoint(wal, library, list(switcher.resident.values()), history, switcher)
         print("\n" + "="*50)
         print(f"PlayWise: Currently playing '{current_playlist.name}'")
         print("="*50)
@@ -103,6 +143,10 @@ def main():
         print("11. Normalize playlist volume")
         print("12. Switch to another playlist")
         print("13. Print current playlist")
+        print("14. Undo last playlist edit")
+        print("15. Redo playlist edit")
+        print("16. Shuffle mode (off/random/smart)")
+        print("17. Recommend what to play next")
         print("0. Exit")
         print("="*50)
 
@@ -112,22 +156,20 @@ def main():
             if choice == '1':
                 title = input("Enter song title: ")
                 artist = input("Enter artist name: ")
-                duration = input("Enter duration (MM:SS): ")
-                rating = int(input("Enter rating (1-5): "))
+                duration = input("Enter duration (MM:SS or H:MM:SS): ")
+                rating = float(input("Enter rating (1-5, halves allowed): "))
                 volume = int(input("Enter initial volume (0-100): "))
-                add_song_to_system(current_playlist, rating_tree, lookup, title, artist, duration, rating, volume)
+                if not 0 <= volume <= 100:
+                    print("Volume must be between 0 and 100.")
+                    continue
+                add_song_to_system(catalog, current_playlist, title, artist, duration, rating, volume)
                 print(f"'{title}' added to the playlist.")
 
             elif choice == '2':
                 index_str = input("Enter index of song to delete: ")
                 index = int(index_str)
-                # Note: This deletion method from `playlist_engine.py` might not
-                # update the other data structures. A more robust implementation
-                # would require the `delete_song` method to return the song_node
-                # for deletion from the other data structures. For this demo,
-                # we will assume the primary focus is on the playlist itself.
-                # A more complete implementation would also require updating
-                # `rating_tree` and `lookup` to remove the song.
+                # The catalog hears the removal and drops the song from the
+                # rating tree and lookup as well
                 current_playlist.delete_song(index)
                 
             elif choice == '3':
@@ -140,13 +182,17 @@ def main():
                 print("Playlist has been reversed.")
 
             elif choice == '5':
-                criteria = input("Sort by (title/duration/recent): ").lower()
+                criteria = input("Sort by (title/artist/duration/recent, e.g. artist,-duration): ").lower()
                 order = input("Order (asc/desc): ").lower()
                 ascending = True if order == 'asc' else False
                 current_playlist.sort_playlist(criteria, ascending)
 
             elif choice == '6':
-                current_playlist.play_next()
+                shuffle = shuffles.get(current_playlist.id)
+                if shuffle is not None:
+                    shuffle.play_next()
+                else:
+                    current_playlist.play_next()
 
             elif choice == '7':
                 history.undo_last_play(current_playlist)
@@ -157,13 +203,24 @@ def main():
                 if matches:
                     print(f"Found {len(matches)} song(s) with title '{title_query}':")
                     for s in matches:
-                        print(f"- [{s.id[:8]}] {s.title} by {s.artist}")
+                        print(f"- [{s.short_id}] {s.title} by {s.artist}")
                 else:
-                    print(f"No songs found with title '{title_query}'.")
+                    # Nothing exact: fall back to titles starting with the query
+                    suggestions = lookup.search_prefix(title_query) or lookup.search_fuzzy(title_query)
+                    if suggestions:
+                        print(f"No exact match for '{title_query}'. Did you mean:")
+                        for s in suggestions:
+                            print(f"- [{s.short_id}] {s.title} by {s.artist}")
+                    else:
+                        print(f"No songs found with title '{title_query}'.")
 
             elif choice == '9':
-                rating_query = int(input("Enter a rating (1-5) to search: "))
-                matches = rating_tree.search_by_rating(rating_query)
+                rating_query = input("Enter a rating (1-5) or a range like 3.5-5 to search: ").strip()
+                if "-" in rating_query:
+                    low, high = map(float, rating_query.split("-", 1))
+                    matches = rating_tree.range_query(low, high, limit=100)
+                else:
+                    matches = rating_tree.search_by_rating(float(rating_query))
                 if matches:
                     print(f"Found {len(matches)} song(s) with rating {rating_query}:")
                     for s in matches:
@@ -172,7 +229,6 @@ def main():
                     print(f"No songs found with rating {rating_query}.")
 
             elif choice == '10':
-                dashboard = SnapshotDashboard(current_playlist, history, rating_tree)
                 snapshot = dashboard.export_snapshot()
                 print("\n📊 Dashboard Snapshot")
                 print("--------------------------")
@@ -187,36 +243,85 @@ def main():
                     print(f" - ⭐ {rating} star(s): {count} song(s)")
 
             elif choice == '11':
-                volume_normalizer = VolumeNormalizer(current_playlist)
+                mode = input(f"Mode ({'/'.join(MODES)}, default mean): ").strip().lower() or "mean"
+                if mode not in MODES:
+                    print(f"Unknown mode '{mode}'.")
+                    continue
+                volume_normalizer = VolumeNormalizer(current_playlist, mode=mode)
                 volume_normalizer.normalize()
                 volume_normalizer.print_volumes()
 
             elif choice == '12':
                 print("Available playlists:")
-                print(f"1. {playlist1.name}")
-                print(f"2. {playlist2.name}")
-                playlist_choice = input("Select a playlist (1 or 2): ")
-                if playlist_choice == '1':
-                    switcher.switch_to(playlist1)
-                    current_playlist = switcher.current_playlist
-                elif playlist_choice == '2':
-                    switcher.switch_to(playlist2)
-                    current_playlist = switcher.current_playlist
+                playlist_ids = list(switcher.names)
+                for number, pid in enumerate(playlist_ids, 1):
+                    marker = "" if pid in switcher.resident else " (on disk)"
+                    print(f"{number}. {switcher.names[pid]}{marker}")
+                playlist_choice = input(f"Select a playlist (1-{len(playlist_ids)}), or 'new' to create one: ").strip()
+                if playlist_choice.lower() == 'new':
+                    playlist = Playlist(history, name=input("Enter playlist name: ").strip() or "Untitled")
+                    catalog.attach(playlist)
+                    wal.attach(playlist)
+                    switcher.switch_to(playlist)
+                elif playlist_choice.isdigit() and 1 <= int(playlist_choice) <= len(playlist_ids):
+                    switcher.switch_to(playlist_ids[int(playlist_choice) - 1])
                 else:
                     print("Invalid playlist choice. Staying on the current playlist.")
+                    continue
+                current_playlist = switcher.current_playlist
+                dashboard.attach_playlist(current_playlist)
+                # Undo stacks and shuffles only follow playlists still in memory
+                for pid in [pid for pid in edits if pid not in switcher.resident]:
+                    edits.pop(pid).detach()
+                for pid in [pid for pid in shuffles if pid not in switcher.resident]:
+                    del shuffles[pid]
+                if current_playlist.id not in edits:
+                    edits[current_playlist.id] = EditHistory(current_playlist, rating_tree)
 
             elif choice == '13':
                 current_playlist.print_playlist()
 
+            elif choice == '14':
+                edits[current_playlist.id].undo()
+
+            elif choice == '15':
+                edits[current_playlist.id].redo()
+
+            elif choice == '16':
+                mode = input("Shuffle mode (off/random/smart): ").strip().lower()
+                if mode == "off":
+                    shuffles.pop(current_playlist.id, None)
+                    print("[Shuffle] Off: playing in playlist order.")
+                elif mode in ("random", "smart"):
+                    kind = Shuffle if mode == "random" else SmartShuffle
+                    shuffles[current_playlist.id] = kind(current_playlist, history=history, repeat=True)
+                    print(f"[Shuffle] {mode.capitalize()} shuffle on for '{current_playlist.name}'.")
+                else:
+                    print(f"Unknown shuffle mode '{mode}'.")
+
+            elif choice == '17':
+                last = history.recent(0, 1)
+                song = lookup.get_by_id(last[0][0]) if last else None
+                if song is None:
+                    print("Play a song first to get recommendations.")
+                else:
+                    print(f"After '{song.title}' you might like:")
+                    for pick, score in recommender.recommend(song):
+                        print(f"- [{pick.short_id}] {pick.title} by {pick.artist} (score {score:.2f})")
+
             elif choice == '0':
-                print("Exiting PlayWise. Goodbye!")
+                checkpoint(wal, library, list(switcher.resident.values()), history, switcher)
+                wal.close()
+                library.close()
+                history.close()
+                print(f"Library saved to '{DATA_DIR}'. Exiting PlayWise. Goodbye!")
                 break
             
             else:
                 print("Invalid option. Please choose a number from the menu.")
         
-        except ValueError:
-            print("Invalid input. Please enter a number where expected.")
+        except ValueError as error:
+            print(f"[Error] {error}")
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
 
@@ -0,0 +1,499 @@
+from collections import deque
+import sys
+
+
+class _Node:
+    # Immutable implicit-treap node. Never changed once published: an edit
+    # copies the O(log n) nodes on its path and shares every other subtree
+    # with the version it came from. `flipped` marks a subtree whose order is
+    # reversed but whose children have not been swapped yet (lazy reverse).
+    __slots__ = ("song", "left", "right", "size", "flipped")
+
+    def __init__(self, song, left=None, right=None, flipped=False):
+        self.song = song
+        self.left = left
+        self.right = right
+        self.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+        self.flipped = flipped
+
+
+class PlaylistVersion:
+    # One immutable state of a playlist's order. Every edit returns a new
+    # version in O(log n) expected time, sharing all untouched subtrees, so
+    # keeping a version around (a snapshot, an undo step, a fork someone else
+    # edits) costs O(1), and each later edit O(log n) new nodes.
+    # Versions record order only; song fields (title, volume, ...) live on the
+    # shared SongNodes. Like PositionIndex, the random song id is the heap
+    # priority, so shapes stay balanced without stored priorities.
+    __slots__ = ("root",)
+
+    def __init__(self, root=None):
+        self.root = root
+
+    @classmethod
+    def from_songs(cls, songs):
+        # Time: O(n), Space: O(n)
+        return cls(_build(songs))
+
+    @classmethod
+    def of(cls, playlist):
+        # The playlist's current order
+        # Time: O(n)
+        songs = []
+        node = playlist.head
+        while node:
+            songs.append(node)
+            node = node.next
+        return cls.from_songs(songs)
+
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    def __iter__(self):
+        # In-order walk, honouring pending flips without copying
+        # Time: O(n), Space: O(log n)
+        stack = []
+        node, flipped = self.root, False
+        while stack or node:
+            while node:
+                flipped ^= node.flipped
+                stack.append((node, flipped))
+                node = node.right if flipped else node.left
+            node, flipped = stack.pop()
+            yield node.song
+            node = node.left if flipped else node.right
+
+    def get(self, index):
+        # Time: O(log n)
+        node, flipped = self.root, False
+        while node:
+            flipped ^= node.flipped
+            left, right = (node.right, node.left) if flipped else (node.left, node.right)
+            left_size = left.size if left else 0
+            if index < left_size:
+                node = left
+            elif index == left_size:
+                return node.song
+            else:
+                index -= left_size + 1
+                node = right
+        return None
+
+    def insert(self, index, song):
+        # Time: O(log n)
+        return PlaylistVersion(_insert(self.root, index, song))
+
+    def extend(self, songs):
+        # Appends a batch, in order
+        # Time: O(m + log n)
+        return PlaylistVersion(_merge(self.root, _build(songs)))
+
+    def remove(self, index):
+        # Time: O(log n)
+        return PlaylistVersion(_remove(self.root, index))
+
+    def move(self, from_index, to_index):
+        # Same semantics as Playlist.move_song
+        # Time: O(log n)
+        song = self.get(from_index)
+        return self.remove(from_index).insert(to_index, song)
+
+    def reverse(self):
+        # Time: O(1) - one flipped copy of the root
+        return PlaylistVersion(_flip(self.root))
+
+
+def _flip(node):
+    # Time: O(1)
+    if node is None:
+        return None
+    return _Node(node.song, node.left, node.right, not node.flipped)
+
+
+def _pushed(node):
+    # Copy of a flipped node with the swap applied and the flip handed down
+    # Time: O(1)
+    if not node.flipped:
+        return node
+    return _Node(node.song, _flip(node.right), _flip(node.left))
+
+
+def _insert(node, index, song):
+    # Walks down until `song` outranks the subtree, then splits only that
+    # subtree around it: one path copied instead of a split plus two merges
+    # Expected Time: O(log n)
+    if node is None or song.id > node.song.id:
+        left, right = _split(node, index)
+        return _Node(song, left, right)
+    node = _pushed(node)
+    left_size = node.left.size if node.left else 0
+    if index <= left_size:
+        return _Node(node.song, _insert(node.left, index, song), node.right)
+    return _Node(node.song, node.left, _insert(node.right, index - left_size - 1, song))
+
+
+def _remove(node, index):
+    # Expected Time: O(log n)
+    node = _pushed(node)
+    left_size = node.left.size if node.left else 0
+    if index < left_size:
+        return _Node(node.song, _remove(node.left, index), node.right)
+    if index == left_size:
+        return _merge(node.left, node.right)
+    return _Node(node.song, node.left, _remove(node.right, index - left_size - 1))
+
+
+def _split(node, count):
+    # (first `count` songs, the rest); copies only the path
+    # Expected Time: O(log n)
+    if node is None:
+        return None, None
+    node = _pushed(node)
+    left_size = node.left.size if node.left else 0
+    if count <= left_size:
+        left, rest = _split(node.left, count)
+        return left, _Node(node.song, rest, node.right)
+    rest, right = _split(node.right, count - left_size - 1)
+    return _Node(node.song, node.left, rest), right
+
+
+def _merge(left, right):
+    # Expected Time: O(log n)
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.song.id > right.song.id:
+        left = _pushed(left)
+        return _Node(left.song, left.left, _merge(left.right, right))
+    right = _pushed(right)
+    return _Node(right.song, _merge(left, right.left), right.right)
+
+
+def _build(songs):
+    # Cartesian-tree build on the song ids, as in position_index._build.
+    # Nodes are linked while still private, then sized bottom-up.
+    # Time: O(m), Space: O(m)
+    stack = []
+    for song in songs:
+        node = _Node(song)
+        last = None
+        while stack and stack[-1].song.id < song.id:
+            last = stack.pop()
+        node.left = last
+        if stack:
+            stack[-1].right = node
+        stack.append(node)
+    if not stack:
+        return None
+    order, pending = [], [stack[0]]
+    while pending:
+        node = pending.pop()
+        order.append(node)
+        if node.left:
+            pending.append(node.left)
+        if node.right:
+            pending.append(node.right)
+    for node in reversed(order):
+        node.size = 1 + (node.left.size if node.left else 0) + (node.right.size if node.right else 0)
+    return stack[0]
+
+
+class _Edit:
+    __slots__ = ("kind", "song", "args", "before", "after")
+
+    def __init__(self, kind, song, args, before, after):
+        self.kind = kind        # add / remove / move / reverse, or sync for batches and sorts
+        self.song = song
+        self.args = args
+        self.before = before    # PlaylistVersion
+        self.after = after
+
+
+class EditHistory:
+    # Undo / redo of playlist edits, kept as a chain of PlaylistVersions.
+    # Subscribed to a Playlist, it turns every add / remove / move / reverse /
+    # sort / reorder into a new version (O(log n), shared structure), so each
+    # undo step costs O(log n) memory instead of a copy of the playlist.
+    # Undo puts back the very SongNodes that were removed, ids included, and
+    # with rating_tree given, their ratings too.
+    # Single-song edits and reverses are undone with their inverse edit in
+    # O(log n) (reverse O(n)); batches and sorts relink from the version, O(n).
+    def __init__(self, playlist, rating_tree=None, limit=1000):
+        # Time: O(n) to take the first version, Space: O(n + limit log n)
+        self.playlist = playlist
+        self.rating_tree = rating_tree
+        self.version = PlaylistVersion.of(playlist)
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.limit = limit
+        self.ratings = {}       # song id → rating of a song removed by a recorded edit
+        self.applying = False   # our own undo / redo edits are not recorded
+        playlist.subscribe(self)
+        if rating_tree is not None:
+            rating_tree.subscribe(self)
+
+    def snapshot(self):
+        # The current version; keeping it costs nothing. Versions are
+        # immutable, so it can also be edited independently (a collaborator's
+        # draft) and brought back with restore()
+        # Time: O(1)
+        return self.version
+
+    def undo(self):
+        # Time: O(log n) for single-song edits, O(n) otherwise
+        if not self.undo_stack:
+            print("Nothing to undo.")
+            return
+        edit = self.undo_stack.pop()
+        self._apply(edit, edit.after, edit.before, undo=True)
+        self.redo_stack.append(edit)
+        print(f"[Undone] {edit.kind}")
+
+    def redo(self):
+        if not self.redo_stack:
+            print("Nothing to redo.")
+            return
+        edit = self.redo_stack.pop()
+        self._apply(edit, edit.before, edit.after, undo=False)
+        self._push(edit)
+        print(f"[Redone] {edit.kind}")
+
+    def restore(self, version):
+        # Makes the playlist match `version` (a snapshot, or one edited from it);
+        # recorded, so it can be undone. Songs missing from the playlist must
+        # not belong to another one.
+        # Time: O(n)
+        before = self.version
+        self._sync(version)
+        self._record("sync", None, None, before, version)
+
+    def detach(self):
+        self.playlist.unsubscribe(self)
+        if self.rating_tree is not None:
+            self.rating_tree.unsubscribe(self)
+
+    def _apply(self, edit, current, target, undo):
+        self.applying = True
+        try:
+            playlist = self.playlist
+            kind = edit.kind
+            if kind == "reverse":
+                playlist.reverse_playlist()
+            elif kind == "move":
+                from_index, to_index = edit.args
+                playlist.move_song(*((to_index, from_index) if undo else (from_index, to_index)))
+            elif (kind == "add") == undo and kind in ("add", "remove"):
+                playlist.remove_song(edit.song.id)
+            elif kind in ("add", "remove"):
+                playlist.insert_node(edit.args, edit.song)
+                self._restore_rating(edit.song)
+            else:
+                self._sync(target)
+        finally:
+            self.applying = False
+        self.version = target
+
+    def _sync(self, target):
+        # Time: O(n)
+        playlist = self.playlist
+        wanted = {song.id for song in target}
+        gone = [song_id for song_id in playlist.views.order if song_id not in wanted]
+        if gone:
+            playlist.remove_songs(gone)
+        missing = [song for song in target if playlist.find_song(song.id) is None]
+        if missing:
+            playlist.add_nodes(missing)
+            for song in missing:
+                self._restore_rating(song)
+        songs = list(target)
+        node, same = playlist.head, True
+        for song in songs:
+            if node is not song:
+                same = False
+                break
+            node = node.next
+        if not same:
+            playlist.reorder(songs)
+
+    def _restore_rating(self, song):
+        rating = self.ratings.pop(song.id, None)
+        if rating is not None and self.rating_tree is not None and self.rating_tree.rating_of(song.id) is None:
+            self.rating_tree.insert_song(song, rating)
+
+    def _record(self, kind, song, args, before, after):
+        self.version = after
+        if self.applying:
+            return
+        self.redo_stack.clear()
+        self._push(_Edit(kind, song, args, before, after))
+
+    def _push(self, edit):
+        if len(self.undo_stack) == self.limit:
+            dropped = self.undo_stack.popleft()
+            if dropped.song is not None:
+                self.ratings.pop(dropped.song.id, None)
+        self.undo_stack.append(edit)
+
+    #----------------playlist / rating event handlers--------------------------------
+
+    def on_song_added(self, playlist, song):
+        if self.applying:
+            return
+        position = playlist.index.rank(song)
+        self._record("add", song, position, self.version, self.version.insert(position, song))
+
+    def on_songs_added(self, playlist, songs):
+        if self.applying:
+            return
+        self._record("sync", None, None, self.version, self.version.extend(songs))
+
+    def on_song_removed(self, playlist, song):
+        if self.applying:
+            return
+        # The removed node still links to the song that preceded it
+        position = playlist.index.rank(song.prev) + 1 if song.prev is not None else 0
+        after = self.version.remove(position)
+        if self.version.get(position) is not song:
+            after = PlaylistVersion.of(playlist)  # out of step; start from the playlist again
+        self._record("remove", song, position, self.version, after)
+
+    def on_songs_removed(self, playlist, songs):
+        if self.applying:
+            return
+        self._record("sync", None, None, self.version, PlaylistVersion.of(playlist))
+
+    def on_song_moved(self, playlist, song, from_index, to_index):
+        if self.applying:
+            return
+        self._record("move", song, (from_index, to_index), self.version, self.version.move(from_index, to_index))
+
+    def on_reversed(self, playlist):
+        if self.applying:
+            return
+        self._record("reverse", None, None, self.version, self.version.reverse())
+
+    def on_sorted(self, playlist, criteria, ascending):
+        if self.applying:
+            return
+        self._record("sync", None, None, self.version, PlaylistVersion.of(playlist))
+
+    def on_reordered(self, playlist, songs):
+        if self.applying:
+            return
+        self._record("sync", None, None, self.version, PlaylistVersion.from_songs(songs))
+
+    def on_rating_added(self, rating_tree, song, rating):
+        self.ratings.pop(song.id, None)
+
+    def on_rating_removed(self, rating_tree, song, rating):
+        self.ratings[song.id] = rating
+
+
+#----------------test--------------------------------
+
+def test1():
+    # Random edits, undone all the way back and redone all the way forward,
+    # must retrace the same orders with the same nodes
+    import contextlib
+    import io
+    import random
+    from playlist_engine import Playlist
+
+    rng = random.Random(5)
+    playlist = Playlist(None)
+    playlist.add_songs([(f"Song {i}", f"Artist {i % 7}", 100 + i) for i in range(200)])
+    edits = EditHistory(playlist)
+    states = [[song.id for song in edits.version]]
+    for _ in range(300):
+        op = rng.randrange(6)
+        n = playlist.length
+        if op == 0:
+            playlist.add_song("New", "Artist", 60)
+        elif op == 1 and n > 1:
+            playlist.delete_song(rng.randrange(n))
+        elif op == 2 and n > 1:
+            a, b = rng.randrange(n), rng.randrange(n)
+            if a != b:
+                playlist.move_song(a, b)
+        elif op == 3:
+            playlist.reverse_playlist()
+        elif op == 4:
+            playlist.sort_playlist(rng.choice(["title", "duration", "recent"]), rng.random() < 0.5)
+        else:
+            playlist.remove_songs([playlist.get_song(rng.randrange(n)).id for _ in range(3)])
+        states.append([song.id for song in edits.version])
+
+    def order():
+        node, ids = playlist.head, []
+        while node:
+            ids.append(node.id)
+            node = node.next
+        return ids
+
+    problems = []
+    with contextlib.redirect_stdout(io.StringIO()):  # undo / redo chatter
+        for state in reversed(states[1:]):
+            if order() != state:
+                problems.append("undo")
+            edits.undo()
+        if order() != states[0]:
+            problems.append("undo to start")
+        for state in states[1:]:
+            edits.redo()
+            if order() != state:
+                problems.append("redo")
+    problems.extend(playlist.validate())
+    print("problems:", problems[:5] or "none")
+
+# test1()
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(n=1_000_000, edits=20_000):
+    # Cost of recording every edit as a version, and memory for all of them
+    import contextlib
+    import gc
+    import io
+    import random
+    import time
+    import tracemalloc
+    from playlist_engine import Playlist
+
+    playlist = Playlist(None)
+    playlist.add_songs([(f"Song {i}", f"Artist {i % 1000}", 200) for i in range(n)])
+    rng = random.Random(9)
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(edits):
+            a, b = rng.randrange(n), rng.randrange(n)
+            if a != b:
+                playlist.move_song(a, b)
+        return (time.perf_counter() - start) / edits
+
+    plain = run()
+    history = EditHistory(playlist, limit=2 * edits)
+    gc.freeze()  # keep full collections from rescanning a million songs and their first version
+    recorded = run()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    run()
+    per_version = (tracemalloc.get_traced_memory()[0] - base) / edits
+    tracemalloc.stop()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(2 * edits):
+            history.undo()
+    undo = (time.perf_counter() - start) / (2 * edits)
+
+    print(f"\n--- Persistent playlist benchmark ({n} songs, {edits} moves) ---")
+    print(f"move, no history        {plain * 1e6:>10.1f} us")
+    print(f"move + new version      {recorded * 1e6:>10.1f} us")
+    print(f"undo                    {undo * 1e6:>10.1f} us")
+    print(f"memory per version      {per_version:>10.0f} B  (a full copy: ~{sys.getsizeof([None] * n):,} B)")
+    print("----------------------------------------------------------------\n")
+    gc.unfreeze()
+
+# benchmark()
@@ -1,22 +1,134 @@
-from playlist_engine import Playlist, SongNode
+from collections import deque
+from events import EventSource
+from playlist_engine import Playlist
+import os
+import struct
+import tempfile
+import time
 
-class PlaybackHistory:
-    def __init__(self):
-        # Time: O(1), Space: O(1)
-        self.stack = []
+# One spilled play: song id (low, high 64 bits) and unix timestamp, 24 bytes
+_RECORD = struct.Struct("<QQd")
+_MASK_64 = (1 << 64) - 1
+
+class PlaybackHistory(EventSource):
+    # Plays are kept as (song_id, timestamp), never as SongNode references, so
+    # deleted songs are not pinned. The newest `capacity` plays stay in memory;
+    # older ones spill to an append-only file of fixed-size records.
+    # Publishes on_play(song) / on_undo(song_id) to subscribed listeners.
+    def __init__(self, capacity=1000, spill_path=None, resolver=None, spill=True):
+        # Time: O(1), Space: O(capacity)
+        # spill=False drops plays older than the window instead of writing them
+        super().__init__()
+        self.capacity = capacity
+        self.spills = spill
+        self.window = deque()       # (song_id, timestamp), newest on the right
+        self.resolver = resolver    # song_id → SongNode, e.g. SongLookup.get_by_id
+        self.spill_path = spill_path
+        self.spill = None           # opened on first spill
+        self.spilled = 0            # plays on disk
+        if spill_path and os.path.exists(spill_path):
+            self.spilled = os.path.getsize(spill_path) // _RECORD.size
+
+    def __len__(self):
+        return len(self.window) + self.spilled
 
     def push(self, song_node):
         # Time: O(1), Space: O(1)
-        self.stack.append(song_node)
+        self.window.append((song_node.id, time.time()))
+        if len(self.window) > self.capacity:
+            if self.spills:
+                self._spill_oldest()
+            else:
+                self.window.popleft()
+        self.emit("on_play", song_node)
 
     def undo_last_play(self, playlist):
         # Time: O(1), Space: O(1)
-        if not self.stack:
+        if not self.window and self.spilled:
+            self._unspill_newest()
+        if not self.window:
             print("No song to undo.")
             return
-        song = self.stack.pop()
+        song_id, _ = self.window.pop()
+        self.emit("on_undo", song_id)
+        song = self.resolve(song_id, playlist)
+        if not song:
+            print("Undoing play: song is no longer available.")
+            return
         print(f"Undoing play: {song.title} by {song.artist}")
-        playlist.add_song_at_start(song.title, song.artist, song.duration)
+        if playlist.find_song(song_id) is song:
+            # Same node and id back at the front, no duplicate
+            position = playlist.index.rank(song)
+            if position:
+                playlist.move_song(position, 0)
+        else:
+            # A node links into one playlist only; a song from another gets a copy
+            playlist.add_song_at_start(song.title, song.artist, song.duration)
+
+    def resolve(self, song_id, playlist=None):
+        # Time: O(1)
+        song = self.resolver(song_id) if self.resolver else None
+        if not song and playlist:
+            song = playlist.find_song(song_id)
+        return song
+
+    def recent(self, offset=0, limit=20):
+        # A page of (song_id, timestamp), newest first
+        # Time: O(limit), Space: O(limit)
+        page = []
+        in_memory = len(self.window)
+        for i in range(offset, min(offset + limit, in_memory)):
+            page.append(self.window[in_memory - 1 - i])
+
+        remaining = limit - len(page)
+        disk_offset = max(0, offset - in_memory)
+        if remaining > 0 and disk_offset < self.spilled:
+            # Records newest..older sit at the end of the file
+            last = self.spilled - disk_offset
+            first = max(0, last - remaining)
+            spill = self._open_spill()
+            spill.flush()
+            spill.seek(first * _RECORD.size)
+            data = spill.read((last - first) * _RECORD.size)
+            records = [_decode(data, i * _RECORD.size) for i in range(last - first)]
+            page.extend(reversed(records))
+        return page
+
+    def close(self):
+        if self.spill:
+            self.spill.close()
+            self.spill = None
+
+    def _open_spill(self):
+        if self.spill is None:
+            if self.spill_path:
+                self.spill = open(self.spill_path, "a+b")
+            else:
+                self.spill = tempfile.TemporaryFile()
+        return self.spill
+
+    def _spill_oldest(self):
+        # Time: O(1) - one fixed-size append
+        song_id, played_at = self.window.popleft()
+        spill = self._open_spill()
+        spill.seek(0, os.SEEK_END)
+        spill.write(_RECORD.pack(song_id & _MASK_64, song_id >> 64, played_at))
+        self.spilled += 1
+
+    def _unspill_newest(self):
+        # Pulls the newest spilled play back so undo keeps working past the window
+        # Time: O(1)
+        spill = self._open_spill()
+        spill.flush()
+        self.spilled -= 1
+        spill.seek(self.spilled * _RECORD.size)
+        self.window.append(_decode(spill.read(_RECORD.size), 0))
+        spill.truncate(self.spilled * _RECORD.size)
+
+
+def _decode(data, offset):
+    low, high, played_at = _RECORD.unpack_from(data, offset)
+    return (high << 64) | low, played_at
 
 
 
@@ -0,0 +1,195 @@
+from cursor import PlaylistCursor
+from events import EventSource
+import asyncio
+import itertools
+import time
+
+
+class Session:
+    # One listener: a PlaylistCursor into a (possibly shared) playlist, which
+    # carries its own history, plus the session's place on the timer wheel.
+    __slots__ = ("id", "cursor", "history", "deadline", "active", "played")
+
+    def __init__(self, session_id, playlist, start=None, repeat=False):
+        self.id = session_id
+        self.cursor = PlaylistCursor(playlist, start, repeat=repeat)
+        self.history = self.cursor.history
+        self.deadline = None   # loop time the current song ends
+        self.active = True
+        self.played = 0
+
+    @property
+    def playlist(self):
+        return self.cursor.playlist
+
+
+class PlaybackScheduler(EventSource):
+    # Drives thousands of sessions from one asyncio task. Song ends are kept
+    # in a hashed timer wheel: `slots` buckets of `tick` seconds each, a
+    # deadline further out than one turn simply waits for its tick number to
+    # come round. Each tick costs O(1 + due sessions), however many sessions
+    # are playing. `speed` compresses song time (60 → a 3:00 song lasts 3 s).
+    # Publishes on_track_started(session, song) and on_session_finished(session).
+    def __init__(self, tick=0.01, slots=512, speed=1.0, lateness_samples=100_000):
+        # Time: O(slots), Space: O(slots + sessions)
+        super().__init__()
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self.speed = speed
+        self.sessions = {}      # session id → Session
+        self.origin = None      # loop time of tick 0
+        self.now_tick = 0       # last tick processed
+        self.lateness = []      # fire time - deadline, seconds (first samples kept)
+        self.lateness_samples = lateness_samples
+        self.fired = 0
+        self.ids = itertools.count(1)
+        self.stopped = False
+
+    def start_session(self, playlist, start=None, repeat=False):
+        # Starts playing right away; returns the Session
+        # Time: O(1)
+        session = Session(next(self.ids), playlist, start, repeat)
+        self.sessions[session.id] = session
+        if session.cursor.song is None:
+            self._finish(session)
+            return session
+        now = self._now()
+        self._play(session, now)
+        return session
+
+    def stop_session(self, session):
+        # The wheel entry is dropped lazily when its tick comes round
+        # Time: O(1)
+        if session.active:
+            session.active = False
+            self.sessions.pop(session.id, None)
+
+    def stop(self):
+        # Takes effect within one tick
+        self.stopped = True
+
+    async def run(self, duration=None):
+        # Fires due sessions tick by tick until every session has finished,
+        # stop() is called or `duration` seconds have passed
+        loop = asyncio.get_running_loop()
+        if self.origin is None:
+            self.origin = loop.time()
+        end = loop.time() + duration if duration is not None else None
+        self.stopped = False
+        while not self.stopped and self.sessions:
+            now = loop.time()
+            if end is not None and now >= end:
+                break
+            target = int((now - self.origin) / self.tick)
+            while self.now_tick < target:
+                self.now_tick += 1
+                self._fire(self.now_tick, now)
+            next_tick = self.origin + (self.now_tick + 1) * self.tick
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    def stats(self):
+        # Scheduling lateness percentiles, in milliseconds
+        samples = sorted(self.lateness)
+        if not samples:
+            return {"fired": self.fired, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "fired": self.fired,
+            "p50_ms": samples[len(samples) // 2] * 1e3,
+            "p99_ms": samples[int(len(samples) * 0.99)] * 1e3,
+            "max_ms": samples[-1] * 1e3,
+        }
+
+    def _now(self):
+        try:
+            now = asyncio.get_running_loop().time()
+        except RuntimeError:
+            now = time.monotonic()  # same clock as the default event loop
+        if self.origin is None:
+            self.origin = now
+        return now
+
+    def _play(self, session, started_at):
+        # Time: O(1)
+        song = session.cursor.song
+        session.history.push(song)
+        session.played += 1
+        session.deadline = started_at + song.seconds / self.speed
+        self._schedule(session)
+        self.emit("on_track_started", session, song)
+
+    def _schedule(self, session):
+        # Round up, so a session never fires before its song has ended
+        ticks = -(-(session.deadline - self.origin) // self.tick)
+        ticks = max(int(ticks), self.now_tick + 1)
+        self.slots[ticks % len(self.slots)].append((ticks, session))
+
+    def _fire(self, tick, now):
+        # Time: O(entries in this slot)
+        slot = self.slots[tick % len(self.slots)]
+        if not slot:
+            return
+        later = []
+        for entry in slot:
+            due, session = entry
+            if due > tick:
+                later.append(entry)  # comes round again on a later turn
+                continue
+            if not session.active:
+                continue
+            self.fired += 1
+            if len(self.lateness) < self.lateness_samples:
+                self.lateness.append(now - session.deadline)
+            if session.cursor.advance() is None:
+                self._finish(session)
+            else:
+                # Next song starts when the last one ended, not when we noticed
+                self._play(session, session.deadline)
+        self.slots[tick % len(self.slots)] = later
+
+    def _finish(self, session):
+        session.active = False
+        self.sessions.pop(session.id, None)
+        self.emit("on_session_finished", session)
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(sessions=5_000, seconds=5.0, speed=120.0, songs=200):
+    # Sessions over a few shared playlists with durations compressed by
+    # `speed`. CPU time per fired song end gives how many real-time sessions
+    # (1x speed) one core could drive; lateness is fire time minus deadline.
+    import random
+    from playlist_engine import Playlist
+
+    rng = random.Random(17)
+    playlists = []
+    for p in range(4):
+        playlist = Playlist(None, name=f"Shared {p}")
+        playlist.add_songs([(f"Song {p}-{i}", f"Artist {i % 25}", rng.randint(150, 330)) for i in range(songs)])
+        playlists.append(playlist)
+    mean_seconds = sum(song.seconds for playlist in playlists for song in playlist.views.order.values()) / (4 * songs)
+
+    scheduler = PlaybackScheduler(speed=speed)
+
+    async def main():
+        for i in range(sessions):
+            playlist = playlists[i % 4]
+            scheduler.start_session(playlist, start=playlist.get_song(rng.randrange(songs)), repeat=True)
+        await scheduler.run(duration=seconds)
+
+    cpu = time.process_time()
+    asyncio.run(main())
+    cpu = time.process_time() - cpu
+    stats = scheduler.stats()
+    per_event = cpu / max(1, stats["fired"])
+    # A real-time session fires once per song, i.e. every mean_seconds
+    sessions_per_core = mean_seconds / per_event if per_event else float("inf")
+
+    print(f"\n--- Playback scheduler benchmark ({sessions} sessions, {speed:g}x time, {seconds:g} s) ---")
+    print(f"song ends fired        {stats['fired']:>12}")
+    print(f"CPU per song end       {per_event * 1e6:>12.1f} us")
+    print(f"real-time sessions/core{sessions_per_core:>12,.0f}")
+    print(f"lateness p50 / p99     {stats['p50_ms']:>7.2f} / {stats['p99_ms']:.2f} ms (max {stats['max_ms']:.2f} ms)")
+    print("----------------------------------------------------------------------\n")
+
+# benchmark()
@@ -1,21 +1,107 @@
 # from playback_history import PlaybackHistory
-from mergesort import merge_sort
+from durations import parse_duration, format_duration
+from collections import OrderedDict
+from events import EventSource
+from mergesort import external_sort, merge_many
+from position_index import PositionIndex
+from sorted_views import SortedViews, parse_criteria
+from text_utils import normalize_text
+import os
+import random
+import sys
 import uuid
 
+
+def new_song_ids(count):
+    # `count` random 128-bit song ids from a single os.urandom call, for bulk
+    # loads where a uuid4() per song dominates the cost
+    # Time: O(count)
+    raw = os.urandom(16 * count)
+    return [int.from_bytes(raw[i:i + 16], "big") for i in range(0, 16 * count, 16)]
+
+
+def check_volume(volume):
+    # A whole number from 0 to 100 (stored in one byte on disk); ValueError otherwise
+    if isinstance(volume, bool) or not isinstance(volume, int) or not 0 <= volume <= 100:
+        raise ValueError(f"Invalid volume {volume!r}: must be a whole number from 0 to 100")
+    return volume
+
+
+def _song_key():
+    # Title and artist, case, accents and spacing ignored. Artists repeat (and
+    # are interned), so each is normalised once per operation.
+    artists = {}
+
+    def key(song):
+        artist = artists.get(song.artist)
+        if artist is None:
+            artist = artists[song.artist] = normalize_text(song.artist)
+        return normalize_text(song.title), artist
+    return key
+
+
+# How set operations decide that two songs are the same: "song" matches the
+# same title and artist, "id" the same node. Each entry makes a key function.
+SONG_KEYS = {
+    "song": _song_key,
+    "id": lambda: (lambda song: song.id),
+}
+
+
+def _songs(source):
+    # SongNodes of a Playlist in order, or of any other iterable as given
+    if isinstance(source, Playlist):
+        node = source.head
+        while node:
+            yield node
+            node = node.next
+    else:
+        yield from source
+
+
+def _row(song):
+    # Add-songs row copying `song`
+    return song.title, song.artist, song.seconds, song.volume
+
+
 class SongNode:
-    def __init__(self, title, artist, duration, volume=50):
-        self.id = str(uuid.uuid4()) #unique identifier for each song
+    # __slots__ drops the per-node __dict__; millions of nodes stay compact
+    __slots__ = ("id", "title", "artist", "seconds", "volume", "adjusted_volume",
+                 "prev", "next", "left", "right", "parent", "size")
+
+    def __init__(self, title, artist, duration, volume=50, song_id=None):
+        # 128-bit unique identifier for each song
+        self.id = uuid.uuid4().int if song_id is None else song_id
         self.title = title
-        self.artist = artist
-        self.duration = duration
-        self.volume = volume  # 0–100 scale
+        self.artist = sys.intern(artist)  # artists repeat a lot, share one string
+        self.seconds = parse_duration(duration)  # parsed once here, never re-split
+        self.volume = check_volume(volume)  # 0–100 scale
         self.adjusted_volume = None  # After normalization
         self.prev = None
         self.next = None
-
-class Playlist:
+        # Position-index (implicit treap) links, managed by PositionIndex
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.size = 1
+
+    @property
+    def duration(self):
+        # "MM:SS" / "H:MM:SS" view of the stored integer seconds
+        return format_duration(self.seconds)
+
+    @property
+    def short_id(self):
+        # First 8 hex digits, as shown in playlist listings
+        return f"{self.id:032x}"[:8]
+
+class Playlist(EventSource):
+    # Publishes on_song_added / on_song_removed to subscribed listeners;
+    # bulk calls publish on_songs_added / on_songs_removed once per batch.
+    # Reordering publishes on_song_moved / on_reversed / on_sorted / on_reordered.
     def __init__(self, history , name="Untitled"):
         # Time: O(1), Space: O(1)
+        super().__init__()
         self.id = str(uuid.uuid4())
         self.name = name
         self.head = None
@@ -23,97 +109,188 @@ class Playlist:
         self.current = None
         self.length = 0
         self.history = history
+        self.index = PositionIndex()  # position → SongNode in O(log n)
+        self.views = SortedViews()    # insertion order + cached sorted orders
 
 
-    def add_song(self, title, artist, duration):
-        # Time: O(1), Space: O(1)
-        new_node = SongNode(title, artist, duration)
+    def add_song(self, title, artist, duration, volume=50):
+        # Time: O(log n), Space: O(1)
+        new_node = SongNode(title, artist, duration, volume)
         if not self.head:
             self.head = self.tail = new_node
             self.current = new_node
         else:
-            self.tail.next = new_node
-            new_node.prev = self.tail
-            self.tail = new_node
+            self._link_after(new_node, self.tail)
+        self.index.append(new_node)
+        self.views.add(new_node)
         self.length += 1
+        self.emit("on_song_added", new_node)
+        return new_node
+
+    def add_songs(self, rows):
+        # Bulk append of (title, artist, duration[, volume]) rows. The position
+        # index is extended in one merge and listeners get a single batch.
+        # Time: O(m + log n) for m rows, Space: O(m)
+        rows = list(rows)
+        return self.add_nodes([SongNode(*row, song_id=song_id) for row, song_id in zip(rows, new_song_ids(len(rows)))])
+
+    def add_nodes(self, songs):
+        # Bulk append of already built SongNodes (e.g. decoded from disk)
+        # Time: O(m + log n), Space: O(m)
+        if not songs:
+            return songs
+        if not self.head:
+            self.current = songs[0]
+        prev = self.tail
+        for song in songs:
+            self._link_after(song, prev)
+            prev = song
+        self.index.extend(songs)
+        for song in songs:
+            self.views.add(song)
+        self.length += len(songs)
+        self.emit_batch("on_songs_added", "on_song_added", songs)
+        return songs
 
     #to add a song at the start of the playlist(stack-undo functionality)
     def add_song_at_start(self, title, artist, duration):
-        # Time: O(1), Space: O(1)
+        # Time: O(log n), Space: O(1)
         new_node = SongNode(title, artist, duration)
         if not self.head:
             self.head = self.tail = self.current = new_node
         else:
-            new_node.next = self.head
-            self.head.prev = new_node
-            self.head = new_node
+            self._link_after(new_node, None)
+        self.index.insert(0, new_node)
+        self.views.add(new_node)
         self.length += 1
+        self.emit("on_song_added", new_node)
+        return new_node
 
-    def delete_song(self, index):
-        # Time: O(n), Space: O(1)
-        if index < 0 or index >= self.length:
+    def insert_song(self, index, title, artist, duration):
+        # Time: O(log n), Space: O(1)
+        if index < 0 or index > self.length:
             print("Invalid index.")
             return
+        return self.insert_node(index, SongNode(title, artist, duration))
 
-        curr = self.head
-        for _ in range(index):
-            curr = curr.next
-
-        if curr.prev:
-            curr.prev.next = curr.next
+    def insert_node(self, index, new_node):
+        # Inserts an already built SongNode (e.g. replayed from a log, or
+        # a deleted node put back by undo)
+        # Time: O(log n), Space: O(1)
+        if not self.head:
+            new_node.prev = new_node.next = None
+            self.head = self.tail = self.current = new_node
         else:
-            self.head = curr.next
+            self._link_after(new_node, self.index.get(index - 1) if index > 0 else None)
+        self.index.insert(index, new_node)
+        self.views.add(new_node)
+        self.length += 1
+        self.emit("on_song_added", new_node)
+        return new_node
 
-        if curr.next:
-            curr.next.prev = curr.prev
-        else:
-            self.tail = curr.prev
+    def find_song(self, song_id):
+        # Time: O(1), via the id-keyed insertion order
+        return self.views.order.get(song_id)
+
+    def get_song(self, index):
+        # Time: O(log n), Space: O(1)
+        if index < 0 or index >= self.length:
+            print("Invalid index.")
+            return None
+        return self.index.get(index)
 
+    def delete_song(self, index):
+        # Time: O(log n), Space: O(1)
+        if index < 0 or index >= self.length:
+            print("Invalid index.")
+            return
+
+        curr = self.index.get(index)
+        self._detach(curr)
+        self.emit("on_song_removed", curr)
+
+    def remove_song(self, song_id):
+        # Delete by id; returns the removed node
+        # Time: O(log n), Space: O(1)
+        curr = self.find_song(song_id)
+        if curr is None:
+            print("Song not found in playlist.")
+            return None
+        self._detach(curr)
+        self.emit("on_song_removed", curr)
+        return curr
+
+    def remove_songs(self, song_ids):
+        # Bulk delete by id; listeners get a single batch. Unknown ids are skipped.
+        # Time: O(m log n), or O(n) when the batch is a large share of the playlist
+        found = (self.find_song(song_id) for song_id in song_ids)
+        songs = list({song.id: song for song in found if song is not None}.values())
+        if not songs:
+            return songs
+        rebuild = len(songs) * 8 > self.length
+        for song in songs:
+            self._unlink(song)
+            if not rebuild:
+                self.index.remove(song)
+            self.views.remove(song)
+        self.length -= len(songs)
+        if rebuild:
+            self.index.rebuild(self.head)
+        # A removed node's next was live when it was unlinked, so this ends on a live song
+        while self.current is not None and self.current.id not in self.views.order:
+            self.current = self.current.next
+        self.emit_batch("on_songs_removed", "on_song_removed", songs)
+        return songs
+
+    def _detach(self, node):
+        # Time: O(log n), Space: O(1)
+        if self.current is node:
+            self.current = node.next
+        self._unlink(node)
+        self.index.remove(node)
+        self.views.remove(node)
         self.length -= 1
 
     def move_song(self, from_index, to_index):
-        # Time: O(n), Space: O(1)
+        # Time: O(log n), Space: O(1)
         if from_index == to_index or from_index < 0 or to_index < 0 or from_index >= self.length or to_index >= self.length:
             print("Invalid move.")
             return
 
-        # Remove song from original position
-        curr = self.head
-        for _ in range(from_index):
-            curr = curr.next
+        # Detach node from original position
+        curr = self.index.get(from_index)
+        self._unlink(curr)
+        self.index.remove(curr)
 
-        # Detach node
-        if curr.prev:
-            curr.prev.next = curr.next
-        else:
-            self.head = curr.next
-        if curr.next:
-            curr.next.prev = curr.prev
+        # Re-insert at new position (positions are already shifted by the removal)
+        self._link_after(curr, self.index.get(to_index - 1) if to_index > 0 else None)
+        self.index.insert(to_index, curr)
+        self.emit("on_song_moved", curr, from_index, to_index)
+
+    def _unlink(self, node):
+        # Time: O(1), Space: O(1)
+        if node.prev:
+            node.prev.next = node.next
         else:
-            self.tail = curr.prev
-
-
-        # Re-insert at new position
-        if to_index == 0:
-            curr.next = self.head
-            curr.prev = None
-            if self.head:
-                self.head.prev = curr
-            self.head = curr
-            if not self.tail:
-                self.tail = curr
+            self.head = node.next
+        if node.next:
+            node.next.prev = node.prev
         else:
-            temp = self.head
-            for _ in range(to_index - 1):#as i have removed one node so using -1
-                temp = temp.next
-            curr.next = temp.next
-            curr.prev = temp
-            if temp.next:
-                temp.next.prev = curr
-            else:
-                self.tail = curr
-            temp.next = curr
+            self.tail = node.prev
 
+    def _link_after(self, node, prev):
+        # Links `node` after `prev`, or at the head when prev is None
+        # Time: O(1), Space: O(1)
+        node.prev = prev
+        node.next = prev.next if prev else self.head
+        if node.next:
+            node.next.prev = node
+        else:
+            self.tail = node
+        if prev:
+            prev.next = node
+        else:
+            self.head = node
 
     def reverse_playlist(self):
         # Time: O(n), Space: O(1)
@@ -125,6 +302,8 @@ class Playlist:
             if not curr.prev:  #as we have  reached last node 
                 self.head = curr #we can set it as head
             curr = curr.prev
+        self.index.rebuild(self.head)
+        self.emit("on_reversed")
 
     def play_next(self):
         # Time: O(1), Space: O(1)
@@ -144,31 +323,49 @@ class Playlist:
         else:
             print("No previous song.")
 
-    def sort_playlist(self, criteria="title", ascending=True):
-        # Time: O(n log n), Space: O(n)
-        # Convert linked list to array for sorting
-        songs = []
-        current = self.head
-        while current:
-            songs.append(current)
-            current = current.next
-
-        if criteria == "title":
-            key_func = lambda song: song.title.lower()
-        elif criteria == "duration":
-            key_func = lambda song: int(song.duration.split(":")[0]) * 60 + int(song.duration.split(":")[1])
-        elif criteria == "recent":
-            print("[Info] Playlist is already in recently added order.")
-            # self.print_playlist()
-            return
+    def sorted_view(self, criteria="title", ascending=True):
+        # Sorted songs without touching the playlist order (cached per criteria)
+        # Time: O(n log n) first call, O(1) when nothing changed since
+        return self.views.get(criteria, ascending)
+
+    def sort_playlist(self, criteria="title", ascending=True, chunk_size=None):
+        # Time: O(n log n) on a cold view, O(n) relink otherwise, Space: O(n)
+        # "recent" restores insertion order from the canonical order kept in views.
+        # With a chunk_size the sort is external (mergesort.external_sort): only
+        # runs of that many (key, song id) pairs are held in memory, no sorted
+        # list is cached, and the list is relinked straight from the merged ids.
+        # Both modes break ties by insertion order, so they give the same order.
+        # Time: O(n log n), Space: O(chunk_size) in memory when external
+        if chunk_size is not None and criteria != "recent":
+            keys = parse_criteria(criteria, ascending)
+            songs = None
+            if keys is not None:
+                ids = external_sort(self.views.order.values(), keys, chunk_size=chunk_size, tag=lambda song: song.id)
+                songs = (self.find_song(song_id) for song_id in ids)
         else:
+            songs = self.views.get(criteria, ascending)
+        if songs is None:
             print(f"[Error] Unknown sorting criteria: {criteria}")
             return
 
-        # Sort using custom Merge Sort
-        songs = merge_sort(songs, key=key_func, ascending=ascending)
+        self._relink(songs)
+        self.emit("on_sorted", criteria, ascending)
+
+        print(f"[Sorted by {criteria}, {'ascending' if ascending else 'descending'}]")
+
+    def reorder(self, songs):
+        # Relinks the playlist into `songs`, which must be exactly its own
+        # songs in some order (e.g. an earlier version being restored)
+        # Time: O(n), Space: O(1)
+        if len(songs) != self.length or any(song is None or self.find_song(song.id) is not song for song in songs):
+            print("[Error] Reorder needs exactly the songs of this playlist.")
+            return
+        self._relink(songs)
+        self.emit("on_reordered", songs)
 
-        # Rebuild doubly linked list from sorted songs
+    def _relink(self, songs):
+        # Rebuild doubly linked list from ordered songs
+        # Time: O(n), Space: O(1)
         self.head = self.tail = None
         self.length = 0
         for song in songs:
@@ -180,10 +377,106 @@ class Playlist:
                 song.prev = self.tail
                 self.tail = song
             self.length += 1
-
-        print(f"[Sorted by {criteria}, {'ascending' if ascending else 'descending'}]")
-
-
+        self.index.rebuild(self.head)
+
+    #----------------set operations--------------------------------
+    # `other` is a Playlist or any iterable of SongNodes; songs match by
+    # SONG_KEYS[key]. Each operation hashes both sides once and edits the
+    # playlist in a single batch, so it is linear in the two sizes instead
+    # of one add / delete call per song. The playlist keeps its own order.
+
+    def union(self, other, key="song", dedupe=False):
+        # Appends copies of other's songs missing here, in other's order (a
+        # song is owned by one playlist, so copies get new ids). Returns them.
+        # With dedupe, repeats already in this playlist go too, in the same pass.
+        # Time: O(n + m)
+        key_of = SONG_KEYS[key]()
+        present = set()
+        duplicates = []
+        for song in _songs(self):
+            song_key = key_of(song)
+            if song_key in present:
+                duplicates.append(song.id)
+            else:
+                present.add(song_key)
+        if dedupe:
+            self.remove_songs(duplicates)
+        rows = []
+        for song in _songs(other):
+            song_key = key_of(song)
+            if song_key not in present:
+                present.add(song_key)
+                rows.append(_row(song))
+        return self.add_songs(rows)
+
+    def intersect(self, other, key="song"):
+        # Keeps only songs that are also in `other`; returns the removed ones
+        # Time: O(n + m)
+        key_of = SONG_KEYS[key]()
+        keep = {key_of(song) for song in _songs(other)}
+        return self.remove_songs([song.id for song in _songs(self) if key_of(song) not in keep])
+
+    def difference(self, other, key="song"):
+        # Drops songs that are in `other`; returns the removed ones
+        # Time: O(n + m)
+        key_of = SONG_KEYS[key]()
+        drop = {key_of(song) for song in _songs(other)}
+        return self.remove_songs([song.id for song in _songs(self) if key_of(song) in drop])
+
+    def dedupe(self, key="song"):
+        # Keeps the first of every repeated song; returns the removed ones
+        # Time: O(n)
+        key_of = SONG_KEYS[key]()
+        seen = set()
+        duplicates = []
+        for song in _songs(self):
+            song_key = key_of(song)
+            if song_key in seen:
+                duplicates.append(song.id)
+            else:
+                seen.add(song_key)
+        return self.remove_songs(duplicates)
+
+    def validate(self):
+        # Structural invariants; returns a list of problems (empty when sound).
+        # Used by the concurrency stress test to detect torn links.
+        # Time: O(n), Space: O(n)
+        problems = []
+        if self.head and self.head.prev is not None:
+            problems.append("head has a prev link")
+        if self.tail and self.tail.next is not None:
+            problems.append("tail has a next link")
+        songs = []
+        prev, node = None, self.head
+        while node and len(songs) <= self.length:
+            if node.prev is not prev:
+                problems.append(f"broken prev link at position {len(songs)}")
+            songs.append(node)
+            prev, node = node, node.next
+        if prev is not self.tail:
+            problems.append("walk from head does not end at tail")
+        if len(songs) != self.length:
+            problems.append(f"length is {self.length} but {len(songs)} songs are linked")
+        if len(self.index) != len(songs):
+            problems.append(f"position index holds {len(self.index)} songs, list holds {len(songs)}")
+        else:
+            # In-order treap walk must match list order
+            stack, node, position = [], self.index.root, 0
+            while stack or node:
+                while node:
+                    stack.append(node)
+                    node = node.left
+                node = stack.pop()
+                if node is not songs[position]:
+                    problems.append(f"position index disagrees at {position}")
+                    break
+                position += 1
+                node = node.right
+        if set(self.views.order) != {song.id for song in songs}:
+            problems.append("insertion order does not match playlist songs")
+        if self.current is not None and self.views.order.get(self.current.id) is not self.current:
+            problems.append("current song is not in the playlist")
+        return problems
 
     def print_playlist(self):
         # Time: O(n), Space: O(1)
@@ -192,39 +485,115 @@ class Playlist:
         print("\n--- Playlist ---")
         while current:
             marker = " ← current" if current == self.current else ""
-            print(f"{index}: [{current.id[:8]}] {current.title} by {current.artist} ({current.duration}){marker}")
+            print(f"{index}: [{current.short_id}] {current.title} by {current.artist} ({current.duration}){marker}")
 
             current = current.next
             index += 1
         print("----------------\n")
 
-class PlaylistSwitcher:
-    def __init__(self):
-        self.playlist_stacks = {}  # playlist_id → stack of SongNode
+class PlaylistSwitcher(EventSource):
+    # Moves the listener between playlists, resuming each one where it was
+    # left. Resume points are song ids, one per playlist, so they never pin a
+    # node in memory. With a `capacity`, at most that many playlists stay
+    # resident (least recently used out first); the others live in `store`,
+    # which provides load(playlist_id, switcher) → Playlist and
+    # unload(playlist, switcher), and come back the next time they are
+    # switched to. Publishes on_playlist_loaded(playlist) and
+    # on_playlist_evicted(playlist).
+    def __init__(self, capacity=None, store=None):
+        # Time: O(1), Space: O(p) p - number of playlists
+        super().__init__()
+        if capacity is not None and (capacity < 1 or store is None):
+            raise ValueError("A bounded switcher needs a capacity of at least 1 and a store")
+        self.capacity = capacity
+        self.store = store
+        self.resident = OrderedDict()  # playlist id → Playlist, least recently used first
+        self.names = {}                # playlist id → name, resident or not
+        self.positions = {}            # playlist id → id of the song to resume from
         self.current_playlist = None
 
-    def switch_to(self, playlist):
-        # Save current position
-        # Time: O(1), Space: O(p) p - number of playlists
-        if self.current_playlist and self.current_playlist.current:
-            pid = self.current_playlist.id
-            if pid not in self.playlist_stacks:
-                self.playlist_stacks[pid] = []
-            self.playlist_stacks[pid].append(self.current_playlist.current)
+    def add(self, playlist):
+        # Make `playlist` known and resident (most recently used)
+        # Time: O(1) plus an eviction
+        self.names[playlist.id] = playlist.name
+        self.resident[playlist.id] = playlist
+        self.resident.move_to_end(playlist.id)
+        self._evict(playlist)
+        return playlist
+
+    def get(self, playlist_id):
+        # Resident playlist by id, loaded from the store if it was evicted
+        # Time: O(1), O(n) for a load plus an eviction
+        playlist = self.resident.get(playlist_id)
+        if playlist is None:
+            if self.store is None or playlist_id not in self.names:
+                print("Playlist not found.")
+                return None
+            playlist = self.store.load(playlist_id, self)
+            if playlist is None:
+                return None
+            self.resident[playlist_id] = playlist
+            self.emit("on_playlist_loaded", playlist)
+        self.resident.move_to_end(playlist_id)
+        self._evict(playlist)
+        return playlist
 
-        # Switch to new playlist
+    def switch_to(self, playlist):
+        # `playlist` is a Playlist or a playlist id
+        # Time: O(log n), plus a load / eviction when the hot set changes
+        self._save_position(self.current_playlist)
+        previous, self.current_playlist = self.current_playlist, None  # free to evict now
+        playlist = self.get(playlist) if isinstance(playlist, str) else self.add(playlist)
+        if playlist is None:
+            self.current_playlist = previous
+            return None
         self.current_playlist = playlist
-        pid = playlist.id
-        if pid in self.playlist_stacks and self.playlist_stacks[pid]:
-            # Resume from last saved song
-            playlist.current = self.playlist_stacks[pid].pop()
-            print(f"[Resumed] {playlist.name} from '{playlist.current.title}'")
+
+        song_id = self.positions.get(playlist.id)
+        resumed = playlist.find_song(song_id) if song_id is not None else None
+        if resumed is not None:
+            playlist.current = resumed
+            print(f"[Resumed] {playlist.name} from '{resumed.title}'")
         else:
-            # Start from beginning
             playlist.current = playlist.head
             print(f"[Started] {playlist.name} from beginning.")
-
-
+        return playlist
+
+    def _save_position(self, playlist):
+        if playlist is not None and playlist.current is not None:
+            self.positions[playlist.id] = playlist.current.id
+
+    def _evict(self, keep=None):
+        # Least recently used first; the playlist being listened to and `keep`
+        # (the one just asked for) stay
+        # Time: O(1) per playlist kept, plus the store's unload
+        while self.capacity is not None and len(self.resident) > self.capacity:
+            victim = next((p for p in self.resident.values()
+                           if p is not self.current_playlist and p is not keep), None)
+            if victim is None:
+                return
+            del self.resident[victim.id]
+            self._save_position(victim)
+            self.store.unload(victim, self)
+            self.emit("on_playlist_evicted", victim)
+
+
+
+
+def merge_sorted(playlists, criteria="title", ascending=True, name="Merged", history=None):
+    # k-way merge of playlists that are each already in `criteria` order
+    # (e.g. after sort_playlist) into a new playlist of copies; ties keep the
+    # earlier playlist's song first. Returns None for unknown criteria.
+    # Time: O(N log k) for N songs in k playlists, Space: O(N)
+    keys = parse_criteria(criteria, ascending)
+    if keys is None:
+        print(f"[Error] Unknown sorting criteria: {criteria}")
+        return None
+    if history is None and playlists:
+        history = playlists[0].history
+    merged = Playlist(history, name=name)
+    merged.add_songs(_row(song) for song in merge_many([_songs(playlist) for playlist in playlists], keys))
+    return merged
 
 
 #----------------test--------------------------------
@@ -259,3 +628,144 @@ def test1():
 # test1()
 
 
+def test2():
+    global_hits = Playlist(None, name="Global")
+    global_hits.add_songs([("Kesariya", "Arijit Singh", "4:30"), ("Tum Hi Ho", "Arijit Singh", "4:20"),
+                           ("Kabira", "Tochi Raina", "3:43"), ("tum hi ho ", "ARIJIT SINGH", "4:21")])
+    regional = Playlist(None, name="Regional")
+    regional.add_songs([("Kabira", "Tochi Raina", "3:43"), ("Maa", "Shankar Mahadevan", "4:15")])
+
+    print("dedupe removed:", [song.title for song in global_hits.dedupe()])       # tum hi ho
+    print("union added:", [song.title for song in global_hits.union(regional)])   # Maa
+    print("intersect removed:", [song.title for song in global_hits.intersect(regional)])
+    global_hits.print_playlist()                                                  # Kabira, Maa
+
+    a, b = Playlist(None), Playlist(None)
+    a.add_songs([("A", "x", 100), ("C", "x", 100), ("E", "x", 100)])
+    b.add_songs([("B", "x", 100), ("C", "y", 100), ("D", "x", 100)])
+    print([song.title for song in _songs(merge_sorted([a, b], "title"))])        # A B C C D E
+
+# test2()
+
+
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(sizes=(1_000, 100_000, 1_000_000), ops=200):
+    # Indexed access (PositionIndex) vs the old walk-from-head lookup
+    import time
+
+    def walk(head, index):
+        curr = head
+        for _ in range(index):
+            curr = curr.next
+        return curr
+
+    print(f"{'songs':>10} | {'walk get':>12} | {'indexed get':>12} | {'walk move':>12} | {'indexed move':>12}")
+    for n in sizes:
+        playlist = Playlist(None)
+        for i in range(n):
+            playlist.add_song(f"Song {i}", f"Artist {i % 100}", "3:30")
+        rng = random.Random(n)
+        positions = [(rng.randrange(n), rng.randrange(n)) for _ in range(ops)]
+
+        start = time.perf_counter()
+        for a, _ in positions:
+            walk(playlist.head, a)
+        walk_get = (time.perf_counter() - start) / ops
+
+        start = time.perf_counter()
+        for a, _ in positions:
+            playlist.get_song(a)
+        indexed_get = (time.perf_counter() - start) / ops
+
+        # The old move_song walked to both positions before relinking
+        start = time.perf_counter()
+        for a, b in positions:
+            walk(playlist.head, a)
+            walk(playlist.head, b)
+        walk_move = (time.perf_counter() - start) / ops
+
+        start = time.perf_counter()
+        for a, b in positions:
+            if a != b:
+                playlist.move_song(a, b)
+        indexed_move = (time.perf_counter() - start) / ops
+
+        print(f"{n:>10} | {walk_get * 1e6:>9.1f} us | {indexed_get * 1e6:>9.1f} us | "
+              f"{walk_move * 1e6:>9.1f} us | {indexed_move * 1e6:>9.1f} us")
+
+# benchmark()
+
+
+def benchmark_set_ops(n=200_000, m=20_000, overlap=0.3, k=8, indexed=True):
+    # Merging a regional playlist into a global one and stripping duplicates,
+    # one add_song / delete_song call per song vs the batched set operations,
+    # plus merge_sorted against concatenating and re-sorting. With `indexed`
+    # the global playlist sits in a Catalog with a SongLookup, as in main.py.
+    import time
+    from catalog import Catalog
+    from instant_song_lookup import SongLookup
+
+    def tracked(playlist):
+        if indexed:
+            catalog = Catalog()
+            catalog.register(SongLookup())
+            catalog.attach(playlist)
+        return playlist
+
+    rng = random.Random(6)
+    # The global playlist already holds a few repeats; a share of the
+    # regional songs are in it too
+    rows = [(f"Song {i if rng.random() < 0.95 else rng.randrange(n)}", f"Artist {i % 1000}", 200) for i in range(n)]
+    regional = [rows[rng.randrange(n)] if rng.random() < overlap else (f"Regional {i}", "Local", 200)
+                for i in range(m)]
+
+    playlist = tracked(Playlist(None))
+    playlist.add_songs(rows)
+    start = time.perf_counter()
+    for row in regional:
+        playlist.add_song(*row)
+    key_of, seen, duplicates = SONG_KEYS["song"](), set(), []
+    for index, song in enumerate(_songs(playlist)):
+        song_key = key_of(song)
+        if song_key in seen:
+            duplicates.append(index)
+        seen.add(song_key)
+    for index in reversed(duplicates):
+        playlist.delete_song(index)
+    per_call = time.perf_counter() - start
+    size = playlist.length
+
+    playlist = tracked(Playlist(None))
+    playlist.add_songs(rows)
+    source = Playlist(None)
+    source.add_songs(regional)
+    start = time.perf_counter()
+    playlist.union(source, dedupe=True)
+    batched = time.perf_counter() - start
+
+    runs = []
+    for i in range(k):
+        run = Playlist(None)
+        run.add_songs([(f"Song {rng.randrange(n):07d}", "Artist", 200) for _ in range(n // k)])
+        run.sort_playlist("title")
+        runs.append(run)
+    start = time.perf_counter()
+    merge_sorted(runs, "title")
+    merged = time.perf_counter() - start
+    start = time.perf_counter()
+    combined = Playlist(None)
+    combined.add_songs(_row(song) for run in runs for song in _songs(run))
+    combined.sort_playlist("title")
+    resorted = time.perf_counter() - start
+
+    print(f"\n--- Set operations benchmark ({n} + {m} songs{', indexed' if indexed else ''}) ---")
+    print(f"add + delete, per call      {per_call:>8.2f} s")
+    print(f"union(dedupe=True)          {batched:>8.2f} s  (same {size} songs: {playlist.length == size})")
+    print(f"{k}-way merge_sorted          {merged:>8.2f} s")
+    print(f"concatenate + sort          {resorted:>8.2f} s")
+    print("------------------------------------------------\n")
+
+# benchmark_set_ops()
@@ -0,0 +1,165 @@
+
+class PositionIndex:
+    # Implicit treap over a playlist's SongNodes. A node's key is its position,
+    # derived from subtree sizes, so indexed get/insert/delete run in O(log n)
+    # while the SongNode prev/next links keep working exactly as before.
+    # The tree links (left, right, parent, size) live on the SongNode, and the
+    # random 128-bit song id doubles as the heap priority.
+    def __init__(self):
+        # Time: O(1), Space: O(1)
+        self.root = None
+
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    def get(self, index):
+        # Time: O(log n), Space: O(1)
+        node = self.root
+        while node:
+            left_size = node.left.size if node.left else 0
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node
+            else:
+                index -= left_size + 1
+                node = node.right
+        return None
+
+    def rank(self, node):
+        # Position of a node already in the index
+        # Time: O(log n), Space: O(1)
+        index = node.left.size if node.left else 0
+        while node.parent:
+            parent = node.parent
+            if node is parent.right:
+                index += (parent.left.size if parent.left else 0) + 1
+            node = parent
+        return index
+
+    def insert(self, index, node):
+        # Time: O(log n), Space: O(log n) recursion
+        node.left = node.right = node.parent = None
+        node.size = 1
+        left, right = _split(self.root, index)
+        self.root = _merge(_merge(left, node), right)
+        self.root.parent = None
+
+    def append(self, node):
+        # Time: O(log n), Space: O(log n) recursion
+        node.left = node.right = node.parent = None
+        node.size = 1
+        self.root = _merge(self.root, node)
+        self.root.parent = None
+
+    def remove(self, node):
+        # Time: O(log n), Space: O(log n) recursion
+        merged = _merge(node.left, node.right)
+        parent = node.parent
+        if merged:
+            merged.parent = parent
+        if parent is None:
+            self.root = merged
+        elif parent.left is node:
+            parent.left = merged
+        else:
+            parent.right = merged
+
+        # Sizes change on the path from the removed node up to the root
+        while parent:
+            parent.size = 1 + (parent.left.size if parent.left else 0) + (parent.right.size if parent.right else 0)
+            parent = parent.parent
+        node.left = node.right = node.parent = None
+        node.size = 1
+
+    def rebuild(self, head):
+        # Rebuild from linked-list order after a bulk relink (reverse, sort)
+        # Time: O(n), Space: O(n)
+        nodes = []
+        while head:
+            nodes.append(head)
+            head = head.next
+        self.root = _build(nodes)
+
+    def extend(self, nodes):
+        # Append a batch of nodes, in order
+        # Time: O(m + log n) for m nodes, Space: O(m)
+        self.root = _merge(self.root, _build(nodes))
+        if self.root:
+            self.root.parent = None
+
+
+def _build(nodes):
+    # Treap over `nodes` in the given order; returns its root
+    # Time: O(m), Space: O(m) - stack-based Cartesian tree construction
+    stack = []
+    for node in nodes:
+        node.left = node.right = node.parent = None
+        last = None
+        while stack and stack[-1].id < node.id:
+            last = stack.pop()
+        node.left = last
+        if stack:
+            stack[-1].right = node
+        stack.append(node)
+    if not stack:
+        return None
+    root = stack[0]
+
+    # Fix sizes and parent links bottom-up (reverse pre-order)
+    order = []
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        order.append(node)
+        if node.left:
+            pending.append(node.left)
+        if node.right:
+            pending.append(node.right)
+    for node in reversed(order):
+        _update(node)
+    root.parent = None
+    return root
+
+
+def _update(node):
+    # Time: O(1)
+    size = 1
+    if node.left:
+        node.left.parent = node
+        size += node.left.size
+    if node.right:
+        node.right.parent = node
+        size += node.right.size
+    node.size = size
+
+
+def _split(node, count):
+    # Splits into (first `count` nodes, the rest)
+    # Expected Time: O(log n)
+    if not node:
+        return None, None
+    left_size = node.left.size if node.left else 0
+    if count <= left_size:
+        left, node.left = _split(node.left, count)
+        _update(node)
+        return left, node
+    node.right, right = _split(node.right, count - left_size - 1)
+    _update(node)
+    return node, right
+
+
+def _merge(left, right):
+    # Every node of `left` precedes every node of `right`
+    # Expected Time: O(log n)
+    if not left:
+        return right
+    if not right:
+        return left
+    if left.id > right.id:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
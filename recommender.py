@@ -0,0 +1,253 @@
+from collections import deque
+import heapq
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batch scoring falls back to one query at a time
+    np = None
+
+
+class Recommender:
+    # "What to play next" from listening sequences. Subscribed to a
+    # PlaybackHistory, every play adds to a sparse item–item counter: for each
+    # of the `window` songs played just before it, counts[earlier][this] grows
+    # by 1 / distance. A row is pruned back to its `top_k` strongest entries
+    # whenever it doubles that, so memory stays O(songs * top_k) however long
+    # the history grows. Scores blend the co-play strength with the rating
+    # tree: (1 - rating_weight) * count / best count + rating_weight * rating / 5.
+    def __init__(self, history, rating_tree=None, resolver=None, window=3, top_k=50, rating_weight=0.3):
+        # Time: O(1), Space: O(songs * top_k)
+        if resolver is None and history.resolver is None:
+            # Without one every pick would be dropped as no longer in the catalog
+            raise ValueError("Recommender needs a resolver (song id → SongNode), or a history that has one")
+        self.history = history
+        self.rating_tree = rating_tree
+        self.resolver = resolver if resolver is not None else history.resolve  # song_id → SongNode
+        self.window = window
+        self.top_k = top_k
+        self.rating_weight = rating_weight
+        self.counts = {}                      # song id → {next song id: weight}
+        self.recent = deque(maxlen=window)    # ids of the last plays, newest on the right
+        self.last = None                      # (song id, [(earlier id, weight)]) of the newest play, for undo
+        self.plays = 0
+        history.subscribe(self)
+
+    def seed(self, limit=100_000):
+        # Warm start from the newest `limit` plays already in the history
+        # (including spilled ones), oldest first
+        # Time: O(limit * window)
+        plays = []
+        while len(plays) < limit:
+            page = self.history.recent(len(plays), min(10_000, limit - len(plays)))
+            if not page:
+                break
+            plays.extend(page)
+        for song_id, _ in reversed(plays):
+            self.record(song_id)
+        self.last = None
+
+    def record(self, song_id):
+        # Time: O(window), O(top_k log top_k) when a row is pruned
+        added = []
+        for distance, earlier in enumerate(reversed(self.recent), 1):
+            if earlier == song_id:
+                continue
+            row = self.counts.setdefault(earlier, {})
+            weight = 1.0 / distance
+            row[song_id] = row.get(song_id, 0.0) + weight
+            added.append((earlier, weight))
+            if len(row) > 2 * self.top_k:
+                self._prune(earlier, row)
+        self.recent.append(song_id)
+        self.last = (song_id, added)
+        self.plays += 1
+
+    def recommend(self, song, k=5, exclude_recent=True):
+        # Best next songs after `song`: [(SongNode, score)], best first.
+        # Falls back to the top-rated songs when `song` has no co-plays yet.
+        # Time: O(top_k log k) - independent of catalog and history size
+        row = self.counts.get(song.id)
+        if not row:
+            return self._top_rated(song, k)
+        skip = set(self.recent) if exclude_recent else set()
+        skip.add(song.id)
+        best = max(row.values())
+        scored = []
+        for candidate, weight in row.items():
+            if candidate in skip:
+                continue
+            scored.append((self._score(weight / best, candidate), candidate))
+        return self._resolve(heapq.nlargest(k + 4, scored), k)
+
+    def recommend_many(self, songs, k=5):
+        # recommend() for a batch of songs, scored in one vectorized pass:
+        # every candidate row is flattened, scored with array arithmetic and
+        # cut to the top k per query with a single lexsort. Recent plays are
+        # not excluded, since the batch is not tied to one listener's session.
+        # Time: O(c log c) for c candidates in total, Space: O(c)
+        if np is None:
+            return [self.recommend(song, k, exclude_recent=False) for song in songs]
+        queries, candidates, weights, best = [], [], [], []
+        results = [None] * len(songs)
+        for slot, song in enumerate(songs):
+            row = self.counts.get(song.id)
+            if not row:
+                results[slot] = self._top_rated(song, k)
+                continue
+            row_best = max(row.values())
+            for candidate, weight in row.items():
+                queries.append(slot)
+                candidates.append(candidate)
+                weights.append(weight)
+                best.append(row_best)
+        if not candidates:
+            return results
+
+        scores = np.asarray(weights) / np.asarray(best)
+        if self.rating_tree is not None and self.rating_weight:
+            rating_of = self.rating_tree.rating_of
+            ratings = np.fromiter((rating_of(candidate) or 0 for candidate in candidates),
+                                  dtype=np.float64, count=len(candidates))
+            scores = (1 - self.rating_weight) * scores + self.rating_weight * ratings / 5
+        queries = np.asarray(queries)
+        order = np.lexsort((-scores, queries))
+        starts = np.flatnonzero(np.r_[True, queries[order][1:] != queries[order][:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            picked = order[start:min(end, start + k + 4)].tolist()
+            slot = int(queries[picked[0]])
+            ranked = [(float(scores[i]), candidates[i]) for i in picked]
+            results[slot] = self._resolve(ranked, k, exclude=songs[slot].id)
+        return results
+
+    def _score(self, strength, candidate):
+        if self.rating_tree is None or not self.rating_weight:
+            return strength
+        rating = self.rating_tree.rating_of(candidate) or 0
+        return (1 - self.rating_weight) * strength + self.rating_weight * rating / 5
+
+    def _resolve(self, ranked, k, exclude=None):
+        # Drop songs no longer in the catalog; ranked holds a few spares for that
+        picks = []
+        for score, candidate in ranked:
+            if candidate == exclude:
+                continue
+            song = self.resolver(candidate)
+            if song is not None:
+                picks.append((song, score))
+                if len(picks) == k:
+                    break
+        return picks
+
+    def _top_rated(self, song, k):
+        if self.rating_tree is None:
+            return []
+        top = self.rating_tree.range_query(1, 5, limit=k + 1, descending=True)
+        return [(other, self._score(0.0, other.id)) for other in top if other.id != song.id][:k]
+
+    def _prune(self, song_id, row):
+        # Keep the top_k strongest followers
+        # Time: O(r log top_k)
+        self.counts[song_id] = dict(heapq.nlargest(self.top_k, row.items(), key=lambda item: item[1]))
+
+    #----------------history event handlers--------------------------------
+
+    def on_play(self, history, song):
+        self.record(song.id)
+
+    def on_undo(self, history, song_id):
+        # Takes back the newest play's co-play counts
+        if self.last is None or self.last[0] != song_id:
+            return
+        for earlier, weight in self.last[1]:
+            row = self.counts.get(earlier)
+            if row is not None and song_id in row:
+                row[song_id] -= weight
+                if row[song_id] <= 1e-9:
+                    del row[song_id]
+        if self.recent and self.recent[-1] == song_id:
+            self.recent.pop()
+        self.last = None
+        self.plays -= 1
+
+
+#----------------test--------------------------------
+
+def test1():
+    from playback_history import PlaybackHistory
+    from playlist_engine import Playlist
+    from SongRating_tree import RatingBST
+
+    history = PlaybackHistory()
+    rating_tree = RatingBST()
+    playlist = Playlist(history)
+    songs = [playlist.add_song(f"Song {i}", "Artist", 200) for i in range(6)]
+    for song, rating in zip(songs, (3, 4, 5, 2, 5, 1)):
+        rating_tree.insert_song(song, rating)
+    by_id = {song.id: song for song in songs}
+    recommender = Recommender(history, rating_tree, resolver=by_id.get)
+
+    # Song 0 is mostly followed by song 1, sometimes by song 2
+    for sequence in ([0, 1, 3], [0, 1, 4], [0, 2, 5], [0, 1, 3]):
+        for i in sequence:
+            history.push(songs[i])
+        recommender.recent.clear()  # separate sessions
+    print([(song.title, round(score, 2)) for song, score in recommender.recommend(songs[0], k=3)])
+    print([[song.title for song, _ in picks] for picks in recommender.recommend_many(songs[:2], k=2)])
+
+# test1()
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(songs=100_000, plays=1_000_000, queries=10_000):
+    # Ingest rate, per-query latency and index memory over a synthetic
+    # history: listeners mostly move through "albums" of neighbouring songs
+    import random
+    import time
+    import tracemalloc
+    from playback_history import PlaybackHistory
+    from playlist_engine import SongNode
+    from SongRating_tree import RatingBST
+
+    rng = random.Random(8)
+    nodes = [SongNode(f"Song {i}", f"Artist {i // 12}", 200) for i in range(songs)]
+    by_id = {song.id: song for song in nodes}
+    rating_tree = RatingBST()
+    for song in nodes:
+        rating_tree.insert_song(song, rng.randint(1, 5))
+    history = PlaybackHistory(capacity=10_000)
+
+    tracemalloc.start()
+    recommender = Recommender(history, rating_tree, resolver=by_id.get)
+    start = time.perf_counter()
+    position = 0
+    for _ in range(plays):
+        position = (position + 1) % songs if rng.random() < 0.8 else rng.randrange(songs)
+        history.push(nodes[position])
+    ingest = plays / (time.perf_counter() - start)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    sample = [nodes[rng.randrange(songs)] for _ in range(queries)]
+    latencies = []
+    for song in sample:
+        start = time.perf_counter()
+        recommender.recommend(song)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    start = time.perf_counter()
+    recommender.recommend_many(sample)
+    batched = (time.perf_counter() - start) / queries
+    history.close()
+
+    print(f"\n--- Recommender benchmark ({songs} songs, {plays} plays) ---")
+    print(f"ingest                  {ingest:>12,.0f} plays/s")
+    print(f"history + index memory  {memory / 2 ** 20:>12.1f} MiB ({len(recommender.counts)} rows)")
+    print(f"recommend p50 / p99     {latencies[len(latencies) // 2] * 1e6:>8.1f} / "
+          f"{latencies[int(len(latencies) * 0.99)] * 1e6:.1f} us")
+    print(f"recommend_many          {batched * 1e6:>8.1f} us per query "
+          f"({'NumPy' if np is not None else 'pure Python'})")
+    print("------------------------------------------------------\n")
+
+# benchmark()
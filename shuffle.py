@@ -0,0 +1,221 @@
+import heapq
+import random
+
+
+class _Shuffle:
+    # Shared by both modes: a per-listener order over a shared playlist that
+    # never touches playlist.current. next() returns the next song of this
+    # pass, or None once every song has been dealt (repeat=True starts a new
+    # pass instead). Songs deleted mid-pass are skipped.
+    def __init__(self, playlist, seed=None, history=None, repeat=False):
+        self.playlist = playlist
+        self.rng = random.Random(seed)
+        self.history = history if history is not None else playlist.history
+        self.repeat = repeat
+        self.dealt = 0  # songs returned this pass
+
+    def __iter__(self):
+        # One pass (or forever, with repeat)
+        song = self.next()
+        while song is not None:
+            yield song
+            song = self.next()
+
+    def next(self):
+        song = self._draw()
+        if song is None and self.repeat and self.dealt:
+            self.reset()
+            song = self._draw()
+        if song is not None:
+            self.dealt += 1
+        return song
+
+    def play_next(self):
+        # Same contract as Playlist.play_next
+        song = self.next()
+        if song is None:
+            print("No song to play.")
+            return
+        print(f"Now playing: {song.title} by {song.artist}")
+        if self.history is not None:
+            self.history.push(song)
+
+    def reset(self):
+        self.dealt = 0
+
+    def _live(self, song):
+        return song is not None and self.playlist.find_song(song.id) is song
+
+
+class Shuffle(_Shuffle):
+    # Lazy Fisher–Yates over positions: only the positions displaced so far
+    # are stored, so a session starts in O(1) whatever the playlist size and
+    # each draw is O(1) plus the O(log n) position lookup. The order is never
+    # materialised. Songs appended mid-pass join the undealt pool; other edits
+    # shift positions, so a pass that overlaps them may repeat or skip a song.
+    def __init__(self, playlist, seed=None, history=None, repeat=False):
+        # Time: O(1), Space: O(1) growing to O(songs dealt)
+        super().__init__(playlist, seed, history, repeat)
+        self.reset()
+
+    def reset(self):
+        # A new pass
+        # Time: O(1)
+        super().reset()
+        self.size = self.playlist.length  # positions handed to this pass so far
+        self.remaining = self.size        # undealt positions sit in slots [0, remaining)
+        self.displaced = {}               # slot → position, where it differs from the slot
+
+    def _draw(self):
+        # Time: O(1) expected, plus O(log n) for the song at the drawn position
+        self._grow()
+        while self.remaining:
+            slot = self.rng.randrange(self.remaining)
+            self.remaining -= 1
+            last = self.remaining
+            position = self.displaced.pop(slot, slot)
+            if slot != last:
+                self.displaced[slot] = self.displaced.pop(last, last)
+            if position < self.playlist.length:
+                return self.playlist.index.get(position)
+        return None
+
+    def _grow(self):
+        # Appended songs become undealt slots at the end of the pool
+        while self.size < self.playlist.length:
+            if self.remaining != self.size:
+                self.displaced[self.remaining] = self.size
+            self.size += 1
+            self.remaining += 1
+
+
+class SmartShuffle(_Shuffle):
+    # Spreads each artist's songs across the pass. Every artist has a due
+    # turn in a min-heap: after one of its songs plays, the next is due
+    # remaining songs / the artist's remaining songs turns later, so an
+    # artist with a third of the playlist plays about every third song and a
+    # one-song artist lands once at a random point. Among artists that are
+    # due, the one played longest ago wins, and the artist just played never
+    # plays again while another one is waiting. Songs within an artist come
+    # from that artist's own lazy Fisher–Yates.
+    def __init__(self, playlist, seed=None, history=None, repeat=False, jitter=0.25):
+        # Time: O(n) to group by artist, Space: O(n)
+        super().__init__(playlist, seed, history, repeat)
+        self.jitter = jitter
+        self.reset()
+
+    def reset(self):
+        # Time: O(n + a log a) for a artists
+        super().reset()
+        groups = {}
+        node = self.playlist.head
+        while node:
+            groups.setdefault(node.artist, []).append(node)
+            node = node.next
+        self.pools = groups                        # artist → songs; undealt ones first
+        self.left = {artist: len(songs) for artist, songs in groups.items()}
+        self.total = self.playlist.length
+        self.last_played = {}                      # artist → turn it last played
+        self.turn = 0
+        self.previous = None
+        self.heap = []
+        for artist, count in self.left.items():
+            gap = self.total / count
+            heapq.heappush(self.heap, (self.rng.random() * gap, -1, artist))
+
+    def _draw(self):
+        # Time: O(log a) amortized
+        while self.heap:
+            due, _, artist = heapq.heappop(self.heap)
+            if artist == self.previous and self.heap:
+                # Hold the artist back one song if anyone else is waiting
+                other = heapq.heapreplace(self.heap, (due, self.last_played.get(artist, -1), artist))
+                due, _, artist = other
+            song = self._take(artist)
+            if song is None:
+                continue  # everything left for this artist was deleted
+            self.turn += 1
+            self.total -= 1
+            self.previous = artist
+            self.last_played[artist] = self.turn
+            left = self.left[artist]
+            if left:
+                gap = (self.total + 1) / (left + 1) * (1 + self.jitter * (2 * self.rng.random() - 1))
+                heapq.heappush(self.heap, (max(due + gap, self.turn), self.turn, artist))
+            return song
+        return None
+
+    def _take(self, artist):
+        # Random undealt song of `artist`, skipping deleted ones
+        # Time: O(1) per song examined
+        pool = self.pools[artist]
+        while self.left[artist]:
+            left = self.left[artist]
+            pick = self.rng.randrange(left)
+            pool[pick], pool[left - 1] = pool[left - 1], pool[pick]
+            self.left[artist] = left - 1
+            if self._live(pool[left - 1]):
+                return pool[left - 1]
+            self.total -= 1
+        return None
+
+
+#----------------test--------------------------------
+
+def test1():
+    from playlist_engine import Playlist
+
+    playlist = Playlist(None)
+    playlist.add_songs([(f"Song {i}", f"Artist {i % 4 if i < 40 else 'Big'}", 200) for i in range(100)])
+    for mode in (Shuffle, SmartShuffle):
+        order = list(mode(playlist, seed=1))
+        adjacent = sum(a.artist == b.artist for a, b in zip(order, order[1:]))
+        print(mode.__name__, len(order), len({song.id for song in order}), "same-artist neighbours:", adjacent)
+
+    shuffle = Shuffle(playlist, seed=2)
+    first = [shuffle.next() for _ in range(10)]
+    playlist.add_songs([(f"Late {i}", "Late", 200) for i in range(5)])
+    rest = list(shuffle)
+    print("pass covers appended songs:", len({song.id for song in first + rest}) == playlist.length)
+
+# test1()
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(n=1_000_000, draws=100_000, artists=20_000):
+    # Session start and per-song cost against copying the playlist and
+    # random.shuffle, plus how often the same artist plays twice in a row
+    import time
+    from playlist_engine import Playlist
+
+    rng = random.Random(4)
+    playlist = Playlist(None)
+    # Skewed catalogue: a few artists own a large share of the songs
+    playlist.add_songs([(f"Song {i}", f"Artist {int(artists * rng.random() ** 3)}", 200) for i in range(n)])
+
+    def naive():
+        songs, node = [], playlist.head
+        while node:
+            songs.append(node)
+            node = node.next
+        random.shuffle(songs)
+        return iter(songs)
+
+    print(f"\n--- Shuffle benchmark ({n} songs, {draws} draws) ---")
+    for name, start_session in (("copy + shuffle", naive),
+                                ("lazy Fisher–Yates", lambda: Shuffle(playlist, seed=1)),
+                                ("smart (artist spread)", lambda: SmartShuffle(playlist, seed=1))):
+        start = time.perf_counter()
+        session = start_session()
+        started = time.perf_counter() - start
+        draw = session.__next__ if name == "copy + shuffle" else session.next
+        start = time.perf_counter()
+        order = [draw() for _ in range(draws)]
+        per_song = (time.perf_counter() - start) / draws
+        adjacent = sum(a.artist == b.artist for a, b in zip(order, order[1:]))
+        print(f"{name:<22} start {started * 1e3:>9.2f} ms   next {per_song * 1e6:>6.2f} us   "
+              f"same artist back to back {adjacent / (draws - 1):>6.2%}")
+    print("----------------------------------------------\n")
+
+# benchmark()
@@ -1,12 +1,53 @@
-
+from collections import deque
+from durations import DurationColumn
+import heapq
 
 class SnapshotDashboard:
-    def __init__(self, playlist, history, rating_tree):
-        self.playlist = playlist
+    # Aggregates are kept current from Playlist / PlaybackHistory / RatingBST
+    # change events, so export_snapshot costs O(k) instead of a full rebuild:
+    #   - a bounded min-heap of the k longest songs
+    #   - a ring buffer of the most recent plays
+    #   - per-rating counters
+    def __init__(self, playlist, history, rating_tree, top_k=5, recent_limit=10):
+        # Time: O(n log k + b) once for seeding, Space: O(k + r + b)
+        self.top_k = top_k
         self.history = history
         self.rating_tree = rating_tree
+        self.playlist = None
+        self.longest = []            # min-heap of (seconds, -seq, song), size <= top_k
+        self.longest_ids = set()     # ids currently in the heap
+        self.longest_stale = False   # a heap member was deleted; refill on next read
+        self.seq = 0                 # arrival order, breaks duration ties
+        self.recent = deque(maxlen=recent_limit)
+        self.rating_counts = {}
+
+        for song_id, _ in history.recent(0, recent_limit):
+            song = history.resolve(song_id, playlist)
+            if song:
+                self.recent.append(_describe(song))
+        for bucket in rating_tree.iter_buckets():
+            self.rating_counts[bucket.rating] = len(bucket.songs)
+        history.subscribe(self)
+        rating_tree.subscribe(self)
+        self.attach_playlist(playlist)
+
+    def attach_playlist(self, playlist):
+        # Follow another playlist (e.g. after a switch); reseeds the top-k heap
+        # Time: O(n log k)
+        if self.playlist is not None:
+            self.playlist.unsubscribe(self)
+        self.playlist = playlist
+        playlist.subscribe(self)
+        self._refill_longest()
+
+    def close(self):
+        # Stop listening for changes
+        self.playlist.unsubscribe(self)
+        self.history.unsubscribe(self)
+        self.rating_tree.unsubscribe(self)
 
     def export_snapshot(self):
+        # Time: O(k + r + b log b) for b rating buckets
         return {
             "top_5_longest_songs": self.get_top_5_longest(),
             "recently_played_songs": self.get_recently_played(),
@@ -14,32 +55,69 @@ class SnapshotDashboard:
         }
 
     def get_top_5_longest(self):
-        songs = []
-        current = self.playlist.head
-        while current:
-            songs.append(current)
-            current = current.next
-
-        # Sort using duration as key (in seconds)
-        songs.sort(
-            key=lambda s: int(s.duration.split(":")[0]) * 60 + int(s.duration.split(":")[1]),
-            reverse=True
-        )
-        return [f"{s.title} by {s.artist} ({s.duration})" for s in songs[:5]]
+        # Time: O(k log k), or O(n log k) right after a top-k song was deleted
+        if self.longest_stale:
+            self._refill_longest()
+        return [_describe(song) for _, _, song in sorted(self.longest, reverse=True)]
+
     def get_recently_played(self):
-        return [
-            f"{s.title} by {s.artist} ({s.duration})"
-            for s in reversed(self.history.stack)
-        ]
+        # Time: O(r)
+        return list(self.recent)
 
     def get_song_count_by_rating(self):
-        rating_counts = {}
-        self._count_ratings(self.rating_tree.root, rating_counts)
-        return rating_counts
-
-    def _count_ratings(self, node, rating_counts):
-        if not node:
-            return
-        rating_counts[node.rating] = len(node.songs)
-        self._count_ratings(node.left, rating_counts)
-        self._count_ratings(node.right, rating_counts)
+        # Time: O(b log b), b = number of rating buckets (at most a few dozen)
+        return dict(sorted(self.rating_counts.items()))
+
+    #----------------event handlers--------------------------------
+
+    def on_song_added(self, playlist, song):
+        # Time: O(log k)
+        self.seq += 1
+        entry = (song.seconds, -self.seq, song)
+        if len(self.longest) < self.top_k:
+            heapq.heappush(self.longest, entry)
+            self.longest_ids.add(song.id)
+        elif entry[:2] > self.longest[0][:2]:
+            evicted = heapq.heapreplace(self.longest, entry)
+            self.longest_ids.discard(evicted[2].id)
+            self.longest_ids.add(song.id)
+
+    def on_song_removed(self, playlist, song):
+        # Time: O(1); the heap is refilled lazily if it lost a member
+        if song.id in self.longest_ids:
+            self.longest_stale = True
+
+    def on_play(self, history, song):
+        # Time: O(1)
+        self.recent.appendleft(_describe(song))
+
+    def on_undo(self, history, song_id):
+        # Time: O(1)
+        if self.recent:
+            self.recent.popleft()
+
+    def on_rating_added(self, rating_tree, song, rating):
+        # Time: O(1)
+        self.rating_counts[rating] = self.rating_counts.get(rating, 0) + 1
+
+    def on_rating_removed(self, rating_tree, song, rating):
+        # Time: O(1)
+        self.rating_counts[rating] -= 1
+        if not self.rating_counts[rating]:
+            del self.rating_counts[rating]
+
+    def _refill_longest(self):
+        # Time: O(n) with NumPy (vectorized top-k), O(n log n) without
+        songs = DurationColumn.from_playlist(self.playlist).stats(k=self.top_k)["top_k"]
+        self.longest = []
+        for song in songs:
+            # Earlier entries win duration ties, as in playlist order
+            self.seq += 1
+            self.longest.append((song.seconds, -self.seq, song))
+        heapq.heapify(self.longest)
+        self.longest_ids = {song.id for song in songs}
+        self.longest_stale = False
+
+
+def _describe(song):
+    return f"{song.title} by {song.artist} ({song.duration})"
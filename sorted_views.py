@@ -0,0 +1,99 @@
+from mergesort import sort_by, merge_runs
+
+# Sort criteria → key function; criteria strings look like "artist,title,-duration"
+SORT_KEYS = {
+    "title": lambda song: song.title.lower(),
+    "artist": lambda song: song.artist.lower(),
+    "duration": lambda song: song.seconds,
+}
+
+
+def parse_criteria(criteria, ascending=True):
+    # Comma-separated fields, most significant first; "-" flips one field.
+    # Returns [(key, ascending), ...] or None for an unknown field.
+    keys = []
+    for field in criteria.split(","):
+        field = field.strip()
+        flipped = field.startswith("-")
+        field = field.lstrip("-")
+        if field not in SORT_KEYS:
+            return None
+        keys.append((SORT_KEYS[field], ascending != flipped))
+    return keys
+
+
+class _View:
+    __slots__ = ("keys", "songs", "sort_keys", "pending", "removed")
+
+    def __init__(self, keys, songs, sort_keys):
+        self.keys = keys            # [(key, ascending), ...]
+        self.songs = songs          # sorted SongNodes
+        self.sort_keys = sort_keys  # cached merge keys, parallel to songs
+        self.pending = []           # songs added since the last read
+        self.removed = set()        # ids removed since the last read
+
+
+class SortedViews:
+    # Lazily materialised sorted orderings of a playlist's songs, one per
+    # (criteria, ascending), kept next to the canonical insertion order.
+    # Adds and deletes are queued per view and folded in on the next read by
+    # merging, so switching between cached orders never re-sorts.
+    def __init__(self):
+        # Time: O(1), Space: O(1)
+        self.order = {}   # song id → SongNode, in insertion ("recent") order
+        self.views = {}   # (criteria, ascending) → _View
+
+    def add(self, song):
+        # Time: O(v) for v materialised views
+        self.order[song.id] = song
+        for view in self.views.values():
+            view.pending.append(song)
+
+    def remove(self, song):
+        # Time: O(v + k) for k songs still pending in a view
+        self.order.pop(song.id, None)
+        for view in self.views.values():
+            if song in view.pending:
+                view.pending.remove(song)
+            else:
+                view.removed.add(song.id)
+
+    def clear(self):
+        # Time: O(1)
+        self.views.clear()
+
+    def reset(self, songs):
+        # Replace the insertion order, e.g. with one restored from disk
+        # Time: O(n)
+        self.order = {song.id: song for song in songs}
+        self.views.clear()
+
+    def get(self, criteria="title", ascending=True):
+        # Sorted list of SongNodes, or None for unknown criteria.
+        # The returned list is shared with the cache: treat it as read-only.
+        # Time: O(n log n) first read, O(n + k log k) after k edits, O(1) otherwise
+        if criteria == "recent":
+            songs = list(self.order.values())
+            return songs if ascending else songs[::-1]
+
+        view = self.views.get((criteria, ascending))
+        if view is None:
+            keys = parse_criteria(criteria, ascending)
+            if keys is None:
+                return None
+            songs = sort_by(self.order.values(), keys)
+            view = self.views[(criteria, ascending)] = _View(keys, songs, None)
+            return view.songs
+
+        if view.removed:
+            removed = view.removed
+            kept = [i for i, song in enumerate(view.songs) if song.id not in removed]
+            view.songs = [view.songs[i] for i in kept]
+            if view.sort_keys is not None:
+                view.sort_keys = [view.sort_keys[i] for i in kept]
+            view.removed = set()
+        if view.pending:
+            added = sort_by(view.pending, view.keys)
+            view.songs, view.sort_keys = merge_runs(view.songs, added, view.keys, left_keys=view.sort_keys)
+            view.pending = []
+        return view.songs
@@ -0,0 +1,654 @@
+from array import array
+from playback_history import _RECORD, _decode
+from playlist_engine import Playlist, SongNode
+import json
+import mmap
+import os
+import struct
+
+# songs.dat: one record per song version, appended, never rewritten in place:
+#   id low/high 64 bits, seconds, volume, title bytes, artist bytes, then UTF-8 text
+_SONG = struct.Struct("<QQIBHH")
+# songs.idx: (id low, id high, songs.dat offset). The first `sorted` entries are
+# ordered by id for binary search; later ones are an append log (newest wins).
+_ENTRY = struct.Struct("<QQQ")
+# ratings.dat: (id low, id high, rating), appended; rating 0 means removed.
+# Ratings are doubles so fractional ones (4.3) reload exactly.
+_RATING = struct.Struct("<QQd")
+_MASK_64 = (1 << 64) - 1
+_DELETED = _MASK_64  # offset of a removed song in the idx log
+
+
+class SongFile:
+    # Append-only song records behind a memory map. Opening only maps the
+    # files and reads the short idx log; records are decoded when asked for.
+    def __init__(self, directory, sorted_count=0):
+        # Time: O(r) for r idx entries appended since the last merge
+        self.data_path = os.path.join(directory, "songs.dat")
+        self.index_path = os.path.join(directory, "songs.idx")
+        self.data = open(self.data_path, "ab")
+        self.index = open(self.index_path, "ab")
+        self.size = self.data.tell()
+        self.data_map = None
+        self.index_map = None
+        self.sorted = sorted_count
+        self.recent = {}  # song_id → offset (or _DELETED), from the idx log
+        self._remap()
+        if self.index_map is not None:
+            start = sorted_count * _ENTRY.size
+            for low, high, offset in _ENTRY.iter_unpack(self.index_map[start:]):
+                self.recent[(high << 64) | low] = offset
+
+    def append(self, songs):
+        # Writes a batch of SongNodes; returns their offsets
+        # Time: O(m), one write per file. Everything is packed before anything
+        # is written, so a song that cannot be stored leaves the files untouched.
+        records = bytearray()
+        entries = bytearray()
+        offsets = []
+        for song in songs:
+            offset = self.size + len(records)
+            title, artist = song.title.encode("utf-8"), song.artist.encode("utf-8")
+            low, high = song.id & _MASK_64, song.id >> 64
+            records += _SONG.pack(low, high, song.seconds, song.volume, len(title), len(artist))
+            records += title
+            records += artist
+            entries += _ENTRY.pack(low, high, offset)
+            offsets.append(offset)
+        self.data.write(records)
+        self.index.write(entries)
+        self.size += len(records)
+        self.recent.update(zip((song.id for song in songs), offsets))
+        return offsets
+
+    def delete(self, song_ids):
+        # Time: O(m)
+        entries = bytearray()
+        for song_id in song_ids:
+            entries += _ENTRY.pack(song_id & _MASK_64, song_id >> 64, _DELETED)
+            self.recent[song_id] = _DELETED
+        self.index.write(entries)
+
+    def offset_of(self, song_id):
+        # Latest record offset, or None for unknown / deleted songs
+        # Time: O(1) for recent writes, O(log n) binary search otherwise
+        offset = self.recent.get(song_id)
+        if offset is None:
+            offset = self._search(song_id)
+        return None if offset is None or offset == _DELETED else offset
+
+    def read(self, offset):
+        # (song_id, title, artist, seconds, volume)
+        # Time: O(len(title) + len(artist))
+        if self.data_map is None or offset >= len(self.data_map):
+            self.flush()
+            self._remap()
+        low, high, seconds, volume, title_len, artist_len = _SONG.unpack_from(self.data_map, offset)
+        start = offset + _SONG.size
+        title = self.data_map[start:start + title_len].decode("utf-8")
+        artist = self.data_map[start + title_len:start + title_len + artist_len].decode("utf-8")
+        return (high << 64) | low, title, artist, seconds, volume
+
+    def node(self, offset):
+        # Time: O(1) plus decoding
+        song_id, title, artist, seconds, volume = self.read(offset)
+        return SongNode(title, artist, seconds, volume, song_id)
+
+    def get(self, song_id):
+        # Lazily decoded SongNode by id, or None
+        # Time: O(log n)
+        offset = self.offset_of(song_id)
+        return self.node(offset) if offset is not None else None
+
+    def merge_index(self):
+        # Fold the idx log into the sorted run so reopening stays cheap
+        # Time: O(n log n), rewrites songs.idx only
+        self.flush()
+        latest = {}
+        if self.index_map is not None:
+            for low, high, offset in _ENTRY.iter_unpack(self.index_map[:self.sorted * _ENTRY.size]):
+                latest[(high, low)] = offset
+        for song_id, offset in self.recent.items():
+            latest[(song_id >> 64, song_id & _MASK_64)] = offset
+        entries = bytearray()
+        for (high, low), offset in sorted(latest.items()):
+            if offset != _DELETED:
+                entries += _ENTRY.pack(low, high, offset)
+        self.sorted = len(entries) // _ENTRY.size
+        self.recent = {}
+        self._replace(self.index_path, entries)
+        self.index.close()
+        self.index = open(self.index_path, "ab")
+        self._remap()
+
+    def rewrite(self, songs):
+        # Compaction: a fresh songs.dat holding only `songs`; returns new offsets
+        # Time: O(n log n)
+        records = bytearray()
+        offsets = []
+        for song in songs:
+            offsets.append(len(records))
+            title, artist = song.title.encode("utf-8"), song.artist.encode("utf-8")
+            records += _SONG.pack(song.id & _MASK_64, song.id >> 64, song.seconds, song.volume, len(title), len(artist))
+            records += title
+            records += artist
+        self._close_maps()
+        self.data.close()
+        self._replace(self.data_path, records)
+        self.data = open(self.data_path, "ab")
+        self.size = len(records)
+        self.recent = {song.id: offset for song, offset in zip(songs, offsets)}
+        self.sorted = 0
+        self.index.close()
+        self._replace(self.index_path, b"")
+        self.index = open(self.index_path, "ab")
+        self.merge_index()  # also rewrites the idx from self.recent
+        return offsets
+
+    def flush(self):
+        self.data.flush()
+        self.index.flush()
+
+    def sync(self):
+        # flush() plus fsync, for a covering write-ahead log
+        self.flush()
+        os.fsync(self.data.fileno())
+        os.fsync(self.index.fileno())
+
+    def close(self):
+        self.flush()
+        self._close_maps()
+        self.data.close()
+        self.index.close()
+
+    def _search(self, song_id):
+        # Binary search of the sorted idx run
+        # Time: O(log n)
+        if self.index_map is None:
+            return None
+        key = (song_id >> 64, song_id & _MASK_64)
+        low, high = 0, self.sorted
+        while low < high:
+            mid = (low + high) // 2
+            entry_low, entry_high, _ = _ENTRY.unpack_from(self.index_map, mid * _ENTRY.size)
+            if (entry_high, entry_low) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.sorted:
+            entry_low, entry_high, offset = _ENTRY.unpack_from(self.index_map, low * _ENTRY.size)
+            if (entry_high, entry_low) == key:
+                return offset
+        return None
+
+    def _remap(self):
+        self._close_maps()
+        self.data_map = _map(self.data_path)
+        self.index_map = _map(self.index_path)
+
+    def _close_maps(self):
+        for mapped in (self.data_map, self.index_map):
+            if mapped is not None:
+                mapped.close()
+        self.data_map = self.index_map = None
+
+    @staticmethod
+    def _replace(path, data):
+        # Write-then-rename, so a crash leaves either the old or the new file
+        temp = path + ".tmp"
+        with open(temp, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, path)
+
+
+def _map(path):
+    # Read-only map of a file, None while it is empty
+    if not os.path.getsize(path):
+        return None
+    with open(path, "rb") as handle:
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Library:
+    # On-disk home of the whole system, one directory:
+    #   songs.dat / songs.idx   SongFile (append-only records + id index)
+    #   ratings.dat             appended (id, rating) records, newest wins
+    #   <playlist id>.ord/.ins  array("Q") of songs.dat offsets in playlist / insertion order
+    #   history.dat / .win      PlaybackHistory spill file + in-memory window
+    #   state.json              playlists, switcher positions, index bookkeeping
+    # Registered with a Catalog and a RatingBST it appends every song and rating
+    # change as it happens; save() only rewrites the per-playlist order files and
+    # state. Playlist order changes between saves are covered by wal.py.
+    # Playlists need not all be in memory: one that was saved and then unloaded
+    # (evicted by a bounded PlaylistSwitcher) keeps its order files and is
+    # decoded again by load_playlist().
+    def __init__(self, path):
+        # Time: O(r) for the idx log; songs are not decoded here
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.state_path = os.path.join(path, "state.json")
+        self.state = {"sorted": 0, "records": 0, "playlists": [], "positions": {}, "switcher": {}, "current": None,
+                      "resident": None}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as handle:
+                self.state.update(json.load(handle))
+        self.songs = SongFile(path, self.state["sorted"])
+        self.ratings = open(os.path.join(path, "ratings.dat"), "ab")
+        self.history_path = os.path.join(path, "history.dat")
+        self.offsets = {}  # song_id → offset of its latest record, for songs in memory
+        self.unplaced = {}  # song_id → rating on disk for a song not loaded (yet)
+        self.rating_tree = None
+        self.quiet = False  # rating events are echoes of what is already on disk
+        self.wal = None     # a WriteAheadLog that syncs these files (WriteAheadLog.cover)
+
+    def exists(self):
+        return bool(self.state["playlists"])
+
+    def attach(self, catalog, rating_tree):
+        # Start appending changes; songs already on disk are not written again
+        # Time: O(n) for the catalog's seeding batch
+        unsaved = [(song_id, rating) for song_id, rating in rating_tree.song_ratings.items()
+                   if song_id not in self.offsets]
+        self.rating_tree = rating_tree
+        catalog.register(self)
+        for song_id, rating in unsaved:
+            self.ratings.write(_RATING.pack(song_id & _MASK_64, song_id >> 64, rating))
+        rating_tree.subscribe(self)
+
+    def load(self, catalog, rating_tree, history=None, switcher=None, exact=False):
+        # Rebuilds the saved playlists, their ratings, the history window and
+        # the switcher positions, then attaches. Returns the loaded playlists in
+        # saved order. A bounded switcher only gets the playlists that were in
+        # memory when the process stopped (every one that may have changed since
+        # its order files were written); the rest wait for load_playlist().
+        # Songs deleted since the save are left out, unless `exact` asks for the
+        # playlists exactly as saved (a write-ahead log is about to be replayed).
+        # Time: O(n) decoding plus the indexes' own insert costs
+        wanted = None
+        if switcher is not None and switcher.capacity is not None and self.state["resident"] is not None:
+            wanted = set(self.state["resident"])
+            wanted.add(self.state["current"])
+        playlists = []
+        revived = []
+        for meta in self.state["playlists"]:
+            if wanted is None or meta["id"] in wanted:
+                playlists.append(self._load_playlist(meta, catalog, history, exact, revived))
+        if revived:
+            # Live again until the log says otherwise: write a fresh record
+            self.offsets.update(zip((song.id for song in revived), self.songs.append(revived)))
+            self.state["records"] += len(revived)
+
+        ratings = {}
+        with open(os.path.join(self.path, "ratings.dat"), "rb") as handle:
+            for low, high, rating in _RATING.iter_unpack(handle.read()):
+                ratings[(high << 64) | low] = int(rating) if rating.is_integer() else rating
+        for song_id, rating in ratings.items():
+            song = catalog.get(song_id)
+            if song is not None and rating:
+                rating_tree.insert_song(song, rating)
+            elif rating:
+                self.unplaced[song_id] = rating  # the song may come back in a log replay or a reload
+
+        if history is not None:
+            self.load_history(history)
+        if switcher is not None:
+            for meta in self.state["playlists"]:
+                switcher.names[meta["id"]] = meta["name"]
+            for playlist in playlists:
+                switcher.resident[playlist.id] = playlist
+            switcher.positions = {pid: int(song_id, 16) for pid, song_id in self.state["switcher"].items()}
+            current = switcher.resident.get(self.state["current"])
+            if current is not None:
+                switcher.resident.move_to_end(current.id)
+                switcher.current_playlist = current
+        self.attach(catalog, rating_tree)
+        return playlists
+
+    def load_playlist(self, playlist_id, catalog, history=None):
+        # One saved playlist, decoded from its order files and attached to the
+        # catalog; the ratings kept aside when it was unloaded go back into the
+        # rating tree as its songs arrive. Returns None for an unknown id.
+        # Time: O(n) for n songs in the playlist
+        meta = next((meta for meta in self.state["playlists"] if meta["id"] == playlist_id), None)
+        if meta is None:
+            print("Playlist not found in library.")
+            return None
+        playlist = self._load_playlist(meta, catalog, history)
+        if self.state["resident"] is not None and playlist_id not in self.state["resident"]:
+            # Recorded before it can change, so a restart reloads it
+            self.state["resident"].append(playlist_id)
+            self._write_state()
+        return playlist
+
+    def unload(self, playlist, catalog):
+        # Drops a playlist from memory; call it right after a save() that
+        # included the playlist. Its songs and ratings stay on disk, and the
+        # ratings are kept aside in `unplaced` for load_playlist().
+        # Time: O(n log k) for n songs in the playlist
+        for song in _walk(playlist.head):
+            rating = self.rating_tree.rating_of(song.id) if self.rating_tree is not None else None
+            if rating is not None:
+                self.unplaced[song.id] = rating
+            self.offsets.pop(song.id, None)
+        self.quiet = True
+        try:
+            catalog.unload(playlist)
+        finally:
+            self.quiet = False
+        if self.state["resident"] is not None and playlist.id in self.state["resident"]:
+            self.state["resident"].remove(playlist.id)
+            self._write_state()
+
+    def save(self, playlists, history=None, switcher=None):
+        # `playlists` are the ones in memory; saved playlists left out (evicted
+        # ones) keep the order files they already have.
+        # Time: O(n) for the order files (8 bytes per song); songs and ratings
+        # are already on disk
+        metas = {meta["id"]: meta for meta in self.state["playlists"]}
+        positions = self.state["positions"]
+        for playlist in playlists:
+            order = array("Q", (self.offsets[song.id] for song in _walk(playlist.head)))
+            added = array("Q", (self.offsets[song.id] for song in playlist.views.order.values()))
+            meta = {"id": playlist.id, "name": playlist.name, "file": f"{playlist.id}.ord", "added": f"{playlist.id}.ins"}
+            SongFile._replace(os.path.join(self.path, meta["file"]), order.tobytes())
+            SongFile._replace(os.path.join(self.path, meta["added"]), added.tobytes())
+            metas[playlist.id] = meta
+            if playlist.current is not None:
+                positions[playlist.id] = f"{playlist.current.id:032x}"
+            else:
+                positions.pop(playlist.id, None)
+        self.state["playlists"] = list(metas.values())
+        if history is not None:
+            self.save_history(history)
+        if switcher is not None:
+            self.state["switcher"] = {pid: f"{song_id:032x}" for pid, song_id in switcher.positions.items()}
+            current = switcher.current_playlist
+            self.state["current"] = current.id if current is not None else None
+            if switcher.capacity is not None:
+                self.state["resident"] = [playlist.id for playlist in playlists]
+
+        self.songs.flush()
+        self.ratings.flush()
+        live = len(self.offsets) + self._evicted_count(playlists)
+        if self.state["records"] > 2 * live + 1000:
+            self.compact(playlists)  # mostly superseded versions: rewrite once
+            return
+        if self.ratings.tell() // _RATING.size > 2 * live + 1000:
+            self.save_ratings_snapshot()
+        # Order files were just written with current offsets, so the idx log
+        # can be folded in without leaving them pointing at older versions
+        if len(self.songs.recent) > self.songs.sorted // 4 + 10_000:
+            self.songs.merge_index()
+        self._write_state()
+
+    def compact(self, playlists):
+        # Drops superseded and deleted records from songs.dat and ratings.dat.
+        # Evicted playlists are decoded from their order files and rewritten too.
+        # Time: O(n log n)
+        songs = [song for playlist in playlists for song in _walk(playlist.head)]
+        resident = len(songs)
+        evicted = []
+        for meta in self._evicted(playlists):
+            offsets = self._read_offsets(meta["file"])
+            songs.extend(self.songs.node(offset) for offset in offsets)
+            evicted.append((meta, offsets))
+        moved = self.songs.rewrite(songs)
+        self.offsets = dict(zip((song.id for song in songs[:resident]), moved[:resident]))
+        start = resident
+        for meta, offsets in evicted:
+            remap = dict(zip(offsets, moved[start:start + len(offsets)]))
+            start += len(offsets)
+            SongFile._replace(os.path.join(self.path, meta["file"]),
+                              array("Q", (remap[offset] for offset in offsets)).tobytes())
+            if "added" in meta:
+                added = self._read_offsets(meta["added"])
+                SongFile._replace(os.path.join(self.path, meta["added"]),
+                                  array("Q", (remap[offset] for offset in added if offset in remap)).tobytes())
+        self.state["records"] = len(songs)
+        self.save_ratings_snapshot()
+        self.save(playlists)
+
+    def save_ratings_snapshot(self):
+        # Rewrites ratings.dat with one record per live rated song
+        # Time: O(n)
+        ratings = {}
+        with open(os.path.join(self.path, "ratings.dat"), "rb") as handle:
+            for low, high, rating in _RATING.iter_unpack(handle.read()):
+                ratings[(high << 64) | low] = rating
+        data = bytearray()
+        for song_id, rating in ratings.items():
+            if rating and (song_id in self.offsets or song_id in self.unplaced):
+                data += _RATING.pack(song_id & _MASK_64, song_id >> 64, rating)
+        self.ratings.close()
+        path = os.path.join(self.path, "ratings.dat")
+        SongFile._replace(path, data)
+        self.ratings = open(path, "ab")
+
+    def save_history(self, history):
+        # The spilled part already lives in history.dat; only the window is written
+        # Time: O(capacity)
+        data = b"".join(_RECORD.pack(song_id & _MASK_64, song_id >> 64, played_at)
+                        for song_id, played_at in history.window)
+        SongFile._replace(os.path.join(self.path, "history.win"), data)
+
+    def load_history(self, history):
+        # Time: O(capacity)
+        path = os.path.join(self.path, "history.win")
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as handle:
+            data = handle.read()
+        history.window.extend(_decode(data, offset) for offset in range(0, len(data), _RECORD.size))
+
+    def get(self, song_id):
+        # Lazily decoded song straight from disk
+        # Time: O(log n)
+        return self.songs.get(song_id)
+
+    def sync(self):
+        # Makes every appended song and rating durable; a covering
+        # WriteAheadLog calls it ahead of each group commit
+        # Time: O(1) plus the fsyncs
+        self.songs.sync()
+        self.ratings.flush()
+        os.fsync(self.ratings.fileno())
+
+    def close(self):
+        self.songs.close()
+        self.ratings.close()
+
+    def _load_playlist(self, meta, catalog, history=None, exact=False, revived=None):
+        # Time: O(n) for n songs in the playlist
+        songs = []
+        by_offset = {}
+        for offset in self._read_offsets(meta["file"]):
+            song = self.songs.node(offset)
+            latest = self.songs.recent.get(song.id, offset)
+            if latest == _DELETED:
+                if not exact:
+                    continue  # removed after the last save
+                revived.append(song)
+            elif latest != offset:
+                song = self.songs.node(latest)  # updated after the last save
+            self.offsets[song.id] = latest
+            by_offset[offset] = song
+            songs.append(song)
+        playlist = Playlist(history, name=meta["name"])
+        playlist.id = meta["id"]
+        catalog.attach(playlist)
+        playlist.add_nodes(songs)
+        if "added" in meta:
+            # Insertion order, which "recent" sorting and sort ties depend on
+            added = (by_offset.get(offset) for offset in self._read_offsets(meta["added"]))
+            playlist.views.reset([song for song in added if song is not None])
+        position = self.state["positions"].get(playlist.id)
+        if position is not None:
+            playlist.current = playlist.find_song(int(position, 16))
+        return playlist
+
+    def _evicted(self, playlists):
+        # Metas of saved playlists that are not in memory
+        loaded = {playlist.id for playlist in playlists}
+        return [meta for meta in self.state["playlists"] if meta["id"] not in loaded]
+
+    def _evicted_count(self, playlists):
+        # Songs in evicted playlists, from their order file sizes
+        # Time: O(p)
+        return sum(os.path.getsize(os.path.join(self.path, meta["file"])) // 8 for meta in self._evicted(playlists))
+
+    def _read_offsets(self, file):
+        offsets = array("Q")
+        with open(os.path.join(self.path, file), "rb") as handle:
+            offsets.frombytes(handle.read())
+        return offsets
+
+    def _write_state(self):
+        self.state["sorted"] = self.songs.sorted
+        SongFile._replace(self.state_path, json.dumps(self.state).encode("utf-8"))
+
+    #----------------catalog / rating hooks--------------------------------
+
+    def on_songs_added(self, catalog, songs):
+        # The songs are written first: if one cannot be packed nothing here
+        # has changed yet. A song whose record is already in the idx log (an
+        # add being replayed from a write-ahead log) keeps that record.
+        # Time: O(m)
+        new = []
+        for song in songs:
+            if song.id in self.offsets:
+                continue
+            offset = self.songs.recent.get(song.id)
+            if offset is not None and offset != _DELETED:
+                self.offsets[song.id] = offset
+            else:
+                new.append(song)
+        if new:
+            self.offsets.update(zip((song.id for song in new), self.songs.append(new)))
+            self.state["records"] += len(new)
+            self._written()
+        if self.unplaced:
+            # Ratings already on disk for songs coming (back) into memory
+            self.quiet = True
+            try:
+                for song in songs:
+                    rating = self.unplaced.pop(song.id, None)
+                    if rating is not None:
+                        self.rating_tree.insert_song(song, rating)
+            finally:
+                self.quiet = False
+
+    def on_songs_removed(self, catalog, songs):
+        # Time: O(m)
+        for song in songs:
+            self.offsets.pop(song.id, None)
+        self.songs.delete([song.id for song in songs])
+        self._written()
+
+    def on_songs_updated(self, catalog, updates):
+        # A changed song is appended as a new version
+        # Time: O(m)
+        songs = [song for song, _, previous in updates if previous]
+        if songs:
+            self.offsets.update(zip((song.id for song in songs), self.songs.append(songs)))
+            self.state["records"] += len(songs)
+            self._written()
+
+    def on_rating_added(self, rating_tree, song, rating):
+        # Time: O(1)
+        if self.quiet:
+            return
+        self.ratings.write(_RATING.pack(song.id & _MASK_64, song.id >> 64, rating))
+        self._written()
+
+    def on_rating_removed(self, rating_tree, song, rating):
+        # Time: O(1)
+        if self.quiet:
+            return
+        self.ratings.write(_RATING.pack(song.id & _MASK_64, song.id >> 64, 0))
+        self._written()
+
+    def _written(self):
+        if self.wal is not None:
+            self.wal.touch()
+
+
+def _walk(node):
+    while node:
+        yield node
+        node = node.next
+
+
+#----------------test--------------------------------
+
+def test1():
+    # Fractional ratings survive a save and a reload
+    import shutil
+    import tempfile
+    from catalog import Catalog
+    from SongRating_tree import RatingBST
+
+    path = tempfile.mkdtemp()
+    library, catalog, rating_tree = Library(path), Catalog(), RatingBST()
+    catalog.register(rating_tree)
+    library.attach(catalog, rating_tree)
+    playlist = Playlist(None, name="Test")
+    catalog.add_songs(playlist, [("Tum Hi Ho", "Arijit Singh", "4:20", 4.3), ("Kesariya", "Arijit Singh", "4:30", 5)])
+    library.save([playlist])
+    library.close()
+
+    library, catalog, rating_tree = Library(path), Catalog(), RatingBST()
+    catalog.register(rating_tree)
+    library.load(catalog, rating_tree)
+    print("4.3 stars:", [song.title for song in rating_tree.search_by_rating(4.3)])
+    print("5 stars:", [song.title for song in rating_tree.search_by_rating(5)])
+    library.close()
+    shutil.rmtree(path)
+
+# test1()
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(n=5_000_000, lookups=1_000):
+    # Writes an n-song library once, then times reopening it and lazy lookups
+    import random
+    import shutil
+    import tempfile
+    import time
+    from playlist_engine import new_song_ids
+
+    path = tempfile.mkdtemp()
+    library = Library(path)
+    ids = new_song_ids(n)
+    start = time.perf_counter()
+    for begin in range(0, n, 100_000):
+        batch = [SongNode(f"Song {i}", f"Artist {i % 5000}", 200 + i % 300, 50, ids[i])
+                 for i in range(begin, min(n, begin + 100_000))]
+        library.songs.append(batch)
+    library.songs.merge_index()
+    library._write_state()
+    library.close()
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    library = Library(path)
+    open_time = time.perf_counter() - start
+
+    sample = random.Random(5).sample(ids, lookups)
+    start = time.perf_counter()
+    for song_id in sample:
+        library.get(song_id)
+    get_time = (time.perf_counter() - start) / lookups
+    library.close()
+    size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    shutil.rmtree(path)
+
+    print(f"\n--- Library benchmark ({n} songs, {size / n:.0f} bytes/song on disk) ---")
+    print(f"write + index   {write_time:>9.2f} s")
+    print(f"reopen          {open_time * 1e3:>9.2f} ms")
+    print(f"lazy get by id  {get_time * 1e6:>9.2f} us")
+    print("------------------------------------------------------------\n")
+
+# benchmark()
@@ -0,0 +1,12 @@
+import unicodedata
+
+
+def normalize_text(text):
+    # Search key that ignores case, accents and extra spaces:
+    # "  Dil  Sé Re " → "dil se re"
+    # Time: O(len(text))
+    if text.isascii():
+        return " ".join(text.lower().split())
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
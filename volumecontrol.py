@@ -1,44 +1,288 @@
-from playlist_engine import Playlist, SongNode
+from playlist_engine import Playlist
 from playback_history import PlaybackHistory
 from SongRating_tree import RatingBST
-from snapshot import SnapshotDashboard
 from instant_song_lookup import SongLookup
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; normalization falls back to plain lists
+    np = None
+
+# How each mode picks a playlist's reference level:
+#   mean / median / percentile - that statistic of the playlist's volumes
+#   target                     - a fixed level, the same for every playlist
+#   compressor                 - no reference: levels above `threshold` are
+#                                scaled down by `ratio`, the rest left alone
+MODES = ("mean", "median", "percentile", "target", "compressor")
+
+
 class VolumeNormalizer:
-    def __init__(self, playlist):
+    # Per-song gain towards a reference level: adjusted = volume + strength *
+    # (reference - volume), clipped to [0, ceiling] so no song is pushed past
+    # full scale. strength=1 brings every song to the reference (the original
+    # behaviour, with mode "mean"); lower values only narrow the spread.
+    # normalize_many() handles thousands of playlists in one vectorized pass;
+    # follow() keeps a playlist normalized as songs come and go.
+    def __init__(self, playlist=None, mode="mean", target=60.0, percentile=90, strength=1.0,
+                 threshold=70.0, ratio=4.0, ceiling=100.0, tolerance=1.0):
+        # Time: O(1), Space: O(1)
+        if mode not in MODES:
+            raise ValueError(f"Invalid mode {mode!r}: expected one of {', '.join(MODES)}")
         self.playlist = playlist
+        self.mode = mode
+        self.target = target
+        self.percentile = percentile
+        self.strength = strength
+        self.threshold = threshold
+        self.ratio = ratio
+        self.ceiling = ceiling
+        self.tolerance = tolerance  # reference drift (in volume steps) a followed playlist absorbs before a full pass
+        self.followed = {}          # playlist id → _Levels
 
     def normalize(self):
-        # Step 1: Collect all volumes
-        current = self.playlist.head
-        volumes = []
-        while current:
-            volumes.append(current.volume)
-            current = current.next
-
-        # Step 2: Compute average volume
-        if not volumes:
+        # Time: O(n), O(n log n) for median / percentile (a sort, with or without NumPy)
+        songs = _songs(self.playlist)
+        if not songs:
             print("No songs to normalize.")
             return
+        reference = self.normalize_many([self.playlist])[0]
+        if reference is None:
+            print(f"[Normalized] {len(songs)} songs compressed above {self.threshold} at {self.ratio}:1")
+        else:
+            print(f"[Normalized] {len(songs)} songs adjusted towards {self.mode} volume: {round(reference, 2)}")
 
-        avg_volume = sum(volumes) / len(volumes)
+    def normalize_many(self, playlists):
+        # Normalizes every playlist in one batch; returns each one's reference
+        # level (None for empty playlists and for compressor mode).
+        # Time: O(N) with NumPy (O(N log N) for median / percentile) over all
+        # N songs, plus one Python pass to read volumes and write results
+        groups = [_songs(playlist) for playlist in playlists]
+        if np is None:
+            return [self._normalize_songs(songs) for songs in groups]
 
-        # Step 3: Normalize each song
-        current = self.playlist.head
-        while current:
-            current.adjusted_volume = avg_volume
-            current = current.next
+        counts = np.fromiter((len(songs) for songs in groups), dtype=np.int64, count=len(groups))
+        songs = [song for group in groups for song in group]
+        references = [None] * len(groups)
+        if not songs:
+            return references
+        volumes = np.fromiter((song.volume for song in songs), dtype=np.float64, count=len(songs))
+        filled = counts > 0
+        levels = self._references(volumes, counts[filled])
+        if levels is not None:
+            for slot, level in zip(np.flatnonzero(filled).tolist(), levels.tolist()):
+                references[slot] = level
+            levels = np.repeat(levels, counts[filled])
+        for song, value in zip(songs, self._adjust(volumes, levels).tolist()):
+            song.adjusted_volume = value
+        return references
+
+    def follow(self, playlist, catalog=None):
+        # Normalizes `playlist` now and keeps it normalized: an added song is
+        # adjusted on its own, and the whole playlist is redone only once
+        # its reference has drifted more than `tolerance`. Pass the Catalog
+        # that owns the songs to follow volume edits (update_song) as well.
+        # Time: O(n log n) now, then O(1 + n / drift) per added / removed / edited song
+        songs = _songs(playlist)
+        levels = _Levels(song.volume for song in songs)
+        levels.applied = self._normalize_songs(songs)
+        self.followed[playlist.id] = levels
+        playlist.subscribe(self)
+        if catalog is not None:
+            catalog.register(self)
+
+    def unfollow(self, playlist):
+        self.followed.pop(playlist.id, None)
+        playlist.unsubscribe(self)
 
-        print(f"[Normalized] All songs adjusted to average volume: {round(avg_volume, 2)}")
+    def reference(self, volumes):
+        # Reference level of one playlist's volumes, None if empty or for compressor mode
+        # Time: O(n log n) for median / percentile, O(n) otherwise
+        if self.mode == "compressor" or not volumes:
+            return None
+        if self.mode == "target":
+            return float(self.target)
+        if self.mode == "mean":
+            return sum(volumes) / len(volumes)
+        return _percentile(sorted(volumes), 50 if self.mode == "median" else self.percentile)
 
     def print_volumes(self):
         current = self.playlist.head
         print("\n🎚️  Volume Levels:")
         while current:
-            print(f"- {current.title}: Original {current.volume}, Adjusted {round(current.adjusted_volume, 2) if current.adjusted_volume else 'Not Normalized'}")
+            adjusted = round(current.adjusted_volume, 2) if current.adjusted_volume is not None else "Not Normalized"
+            print(f"- {current.title}: Original {current.volume}, Adjusted {adjusted}")
             current = current.next
 
+    def _references(self, volumes, counts):
+        # One reference per non-empty playlist; its songs sit contiguously in
+        # `volumes`. Medians and percentiles come from a single sort of every
+        # volume keyed by playlist, then a vectorized interpolation.
+        if self.mode == "compressor":
+            return None
+        if self.mode == "target":
+            return np.full(len(counts), float(self.target))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        if self.mode == "mean":
+            return np.add.reduceat(volumes, starts) / counts
+        q = 50 if self.mode == "median" else self.percentile
+        group = np.repeat(np.arange(len(counts)), counts)
+        ordered = volumes[np.lexsort((volumes, group))]
+        position = starts + (counts - 1) * (q / 100)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, starts + counts - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    def _adjust(self, volumes, reference):
+        # Vectorized gain + clipping; `reference` is per song (None: compressor)
+        if reference is None:
+            over = volumes - self.threshold
+            adjusted = np.where(over > 0, self.threshold + over / self.ratio, volumes)
+        else:
+            adjusted = volumes + self.strength * (reference - volumes)
+        return np.clip(adjusted, 0.0, self.ceiling)
+
+    def _adjust_one(self, volume, reference):
+        if reference is None:
+            adjusted = self.threshold + (volume - self.threshold) / self.ratio if volume > self.threshold else volume
+        else:
+            adjusted = volume + self.strength * (reference - volume)
+        return min(max(adjusted, 0.0), self.ceiling)
+
+    def _normalize_songs(self, songs):
+        # Plain-Python path for one playlist
+        # Time: O(n), O(n log n) for median / percentile
+        reference = self.reference([song.volume for song in songs])
+        for song in songs:
+            song.adjusted_volume = self._adjust_one(song.volume, reference)
+        return reference
+
+    def _refresh(self, playlist, levels, added=()):
+        # Re-adjusts after the followed playlist changed
+        reference = levels.reference(self)
+        if reference is not None and levels.applied is not None and abs(reference - levels.applied) > self.tolerance:
+            self._normalize_songs(_songs(playlist))
+            levels.applied = reference
+            return
+        if levels.applied is None:
+            levels.applied = reference
+        for song in added:
+            song.adjusted_volume = self._adjust_one(song.volume, levels.applied)
+
+    #----------------playlist event handlers--------------------------------
+
+    def on_song_added(self, playlist, song):
+        self.on_songs_added(playlist, [song])
+
+    def on_songs_added(self, playlist, songs):
+        levels = self._levels(playlist)
+        if levels is None:
+            return
+        for song in songs:
+            levels.add(song.volume)
+        self._refresh(playlist, levels, songs)
+
+    def on_song_removed(self, playlist, song):
+        self.on_songs_removed(playlist, [song])
+
+    def on_songs_removed(self, playlist, songs):
+        levels = self._levels(playlist)
+        if levels is None:
+            return
+        for song in songs:
+            levels.remove(song.volume)
+        self._refresh(playlist, levels)
 
+    def _levels(self, source):
+        # Levels of a followed playlist; membership events from a catalog
+        # repeat the playlist's own and are ignored
+        return self.followed.get(source.id) if isinstance(source, Playlist) else None
+
+    #----------------catalog event handlers--------------------------------
+
+    def on_songs_updated(self, catalog, updates):
+        # A volume edit moves the song to its new level
+        # Time: O(1) per edited song, plus a full pass on drift
+        edited = {}
+        for song, _, previous in updates:
+            if "volume" not in previous:
+                continue
+            playlist = catalog.playlist_of.get(song.id)
+            levels = self.followed.get(playlist.id) if playlist is not None else None
+            if levels is None:
+                continue
+            levels.remove(previous["volume"])
+            levels.add(song.volume)
+            edited.setdefault(playlist.id, (playlist, levels, []))[2].append(song)
+        for playlist, levels, songs in edited.values():
+            self._refresh(playlist, levels, songs)
+
+
+class _Levels:
+    # Running statistics of a followed playlist: how many songs sit at each
+    # volume (whole numbers 0–100) for medians / percentiles, and their sum
+    # for the mean
+    # Space: O(1), 101 counters whatever the playlist size
+    __slots__ = ("counts", "size", "total", "applied")
+
+    def __init__(self, volumes):
+        self.counts = [0] * 101
+        self.size = 0
+        self.total = 0
+        for volume in volumes:
+            self.add(volume)
+        self.applied = None  # reference the playlist was last adjusted to
+
+    def add(self, volume):
+        # Time: O(1)
+        self.counts[volume] += 1
+        self.size += 1
+        self.total += volume
+
+    def remove(self, volume):
+        # Time: O(1)
+        if self.counts[volume]:
+            self.counts[volume] -= 1
+            self.size -= 1
+            self.total -= volume
+
+    def reference(self, normalizer):
+        # Time: O(1), a pass over the 101 counters
+        if normalizer.mode == "compressor" or not self.size:
+            return None
+        if normalizer.mode == "target":
+            return float(normalizer.target)
+        if normalizer.mode == "mean":
+            return self.total / self.size
+        q = 50 if normalizer.mode == "median" else normalizer.percentile
+        position = (self.size - 1) * q / 100
+        low = int(position)
+        low_value = self._at_rank(low)
+        high_value = self._at_rank(min(low + 1, self.size - 1))
+        return float(low_value + (high_value - low_value) * (position - low))
+
+    def _at_rank(self, rank):
+        # Volume of the rank-th song in volume order
+        for volume, count in enumerate(self.counts):
+            rank -= count
+            if rank < 0:
+                return volume
+
+
+def _songs(playlist):
+    songs = []
+    current = playlist.head
+    while current:
+        songs.append(current)
+        current = current.next
+    return songs
+
+
+def _percentile(ordered, q):
+    # Same "linear" interpolation NumPy uses by default
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return float(ordered[low] + (ordered[high] - ordered[low]) * (position - low))
 
 
 #----------------test--------------------------------
@@ -71,4 +315,56 @@ def main():
     volume_normalizer.normalize()
     volume_normalizer.print_volumes()
 
+    # Gentler modes: halfway to the median, and a 4:1 compressor above 65
+    VolumeNormalizer(playlist, mode="median", strength=0.5).normalize()
+    VolumeNormalizer(playlist, mode="compressor", threshold=65).normalize()
+    volume_normalizer.print_volumes()
+
 # main()
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(playlists=10_000, songs=100, modes=MODES):
+    # Batched normalize_many against one normalize() per playlist, and the
+    # cost of keeping a followed playlist normalized song by song
+    import contextlib
+    import io
+    import random
+    import time
+
+    rng = random.Random(21)
+    batch = []
+    for p in range(playlists):
+        playlist = Playlist(None, name=f"Playlist {p}")
+        playlist.add_songs([(f"Song {p}-{i}", f"Artist {i % 40}", 200, rng.randint(5, 100)) for i in range(songs)])
+        batch.append(playlist)
+    total = playlists * songs
+
+    print(f"\n--- Volume normalizer benchmark ({playlists} playlists x {songs} songs, "
+          f"{'NumPy' if np is not None else 'pure Python'}) ---")
+    for mode in modes:
+        normalizer = VolumeNormalizer(mode=mode)
+        start = time.perf_counter()
+        normalizer.normalize_many(batch)
+        batched = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for playlist in batch[:playlists // 10]:
+                VolumeNormalizer(playlist, mode=mode).normalize()
+        single = (time.perf_counter() - start) * 10
+        print(f"{mode:<11} batched {total / batched:>12,.0f} songs/s   one by one {total / single:>12,.0f} songs/s")
+
+    playlist = Playlist(None)
+    playlist.add_songs([(f"Song {i}", "Artist", 200, rng.randint(5, 100)) for i in range(100_000)])
+    normalizer = VolumeNormalizer(mode="median")
+    normalizer.follow(playlist)
+    start = time.perf_counter()
+    for i in range(10_000):
+        playlist.add_song(f"New {i}", "Artist", 200, rng.randint(5, 100))
+    added = (time.perf_counter() - start) / 10_000
+    print(f"follow     add to a 100k playlist, median mode: {added * 1e6:.1f} us per song")
+    print("---------------------------------------------------------------------\n")
+
+# benchmark()
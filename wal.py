@@ -0,0 +1,377 @@
+from playlist_engine import SongNode
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+
+# Frame: payload length + CRC-32 of the payload, then the payload
+_FRAME = struct.Struct("<II")
+# First frame of every log: the checkpoint generation it continues from
+_GENERATION = struct.Struct("<Q")
+# Payload layouts, keyed by the leading op byte; playlist ids are 16 raw uuid bytes
+_ADD, _REMOVE, _MOVE, _REVERSE, _SORT, _ORDER = range(6)
+_OPS = {
+    _ADD: struct.Struct("<B16sQQQIBHH"),  # position, id low/high, seconds, volume, title/artist lengths
+    _REMOVE: struct.Struct("<B16sQQ"),    # id low/high
+    _MOVE: struct.Struct("<B16sQQ"),      # from, to
+    _REVERSE: struct.Struct("<B16s"),
+    _SORT: struct.Struct("<B16s?H"),      # ascending, criteria length
+    _ORDER: struct.Struct("<B16sI"),      # song count, then one _ID per song
+}
+_ID = struct.Struct("<QQ")
+_MASK_64 = (1 << 64) - 1
+
+
+class WriteAheadLog:
+    # Append-only log of playlist mutations, written before they are lost to a
+    # crash. Subscribed to playlists, it frames every add / remove / move /
+    # reverse / sort / reorder with a length and CRC-32. Frames are group-committed:
+    # buffered and made durable with one fsync per `group_size` records, or
+    # after `max_delay` seconds, so fsync cost is shared across mutations.
+    # A checkpoint (Library.save) lets the log start over; replay re-applies
+    # whatever the last checkpoint did not include. Song records, edits and
+    # ratings are not logged here: the Library appends them to its own files,
+    # and a covered Library is synced ahead of every group commit.
+    def __init__(self, path, group_size=64, max_delay=0.01, checkpoint_every=50_000):
+        # Time: O(1), Space: O(1)
+        self.path = path
+        self.group_size = group_size
+        self.max_delay = max_delay
+        self.checkpoint_every = checkpoint_every
+        self.buffer = bytearray()
+        self.pending = 0       # framed records not yet fsynced
+        self.records = 0       # records since the last checkpoint
+        self.commits = 0       # fsyncs issued
+        self.lock = threading.Lock()
+        self.timer = None
+        self.playlists = {}    # playlist id → Playlist being logged
+        self.stores = []       # Libraries whose append files each commit makes durable first
+        self.dirty = False     # a covered store was written since the last commit
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(_frame(_GENERATION.pack(0)))
+            self._sync()
+        self.generation = _read_generation(path)
+
+    @property
+    def checkpoint_due(self):
+        return self.records >= self.checkpoint_every
+
+    def attach(self, playlist):
+        # Time: O(1)
+        self.playlists[playlist.id] = playlist
+        playlist.subscribe(self)
+
+    def detach(self, playlist):
+        # Time: O(1)
+        self.playlists.pop(playlist.id, None)
+        playlist.unsubscribe(self)
+
+    def cover(self, store):
+        # `store` (a Library) calls touch() whenever it appends a song, edit or
+        # rating; the next commit syncs it before the log, so a replayed add
+        # finds its rating and later edits on disk
+        # Time: O(1)
+        self.stores.append(store)
+        store.wal = self
+
+    def touch(self):
+        # A covered store was written: commit within max_delay even if no
+        # record is pending (a rating-only edit logs nothing here)
+        # Time: O(1)
+        with self.lock:
+            self.dirty = True
+            self._schedule()
+
+    def append(self, payload):
+        # Time: O(1) amortized; one fsync per group
+        with self.lock:
+            self.buffer += _frame(payload)
+            self.pending += 1
+            self.records += 1
+            if self.pending >= self.group_size:
+                self._commit()
+            else:
+                self._schedule()
+
+    def commit(self):
+        # Make every buffered record durable now
+        with self.lock:
+            self._commit()
+
+    def replay(self, playlists, resolve=None):
+        # Re-applies logged mutations to the playlists loaded from the last
+        # checkpoint. Stops at the first torn or corrupt frame and truncates it.
+        # `resolve` (song id → stored SongNode or None, e.g. Library.get) gives
+        # a re-added song its latest stored version, edits included, in place
+        # of the copy in the log. Returns the number of records applied.
+        # Time: O(r log n) for r records
+        by_id = {playlist.id: playlist for playlist in playlists}
+        applied = 0
+        appends = {}  # playlist id → consecutive tail appends, added as one batch
+        with open(self.path, "rb") as handle:
+            data = handle.read()
+        offset, end = _FRAME.size + _GENERATION.size, len(data)
+        while offset + _FRAME.size <= end:
+            length, checksum = _FRAME.unpack_from(data, offset)
+            payload = data[offset + _FRAME.size:offset + _FRAME.size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            offset += _FRAME.size + length
+            op = payload[0]
+            fields = _OPS[op].unpack_from(payload)
+            pid = str(uuid.UUID(bytes=fields[1]))
+            playlist = by_id.get(pid)
+            if playlist is None:
+                continue
+            if op == _ADD:
+                position, low, high, seconds, volume, title_len, artist_len = fields[2:]
+                start = _OPS[_ADD].size
+                title = payload[start:start + title_len].decode("utf-8")
+                artist = payload[start + title_len:start + title_len + artist_len].decode("utf-8")
+                song = resolve((high << 64) | low) if resolve is not None else None
+                if song is None:
+                    song = SongNode(title, artist, seconds, volume, (high << 64) | low)
+                batch = appends.setdefault(pid, [])
+                if playlist.find_song(song.id) is None and position == playlist.length + len(batch):
+                    batch.append(song)
+                    applied += 1
+                    continue
+                _flush_appends(playlist, appends)
+                if playlist.find_song(song.id) is None:
+                    playlist.insert_node(min(position, playlist.length), song)
+            else:
+                _flush_appends(playlist, appends)
+                if op == _REMOVE:
+                    song_id = (fields[3] << 64) | fields[2]
+                    if playlist.find_song(song_id) is not None:
+                        playlist.remove_song(song_id)
+                elif op == _MOVE:
+                    playlist.move_song(fields[2], fields[3])
+                elif op == _REVERSE:
+                    playlist.reverse_playlist()
+                elif op == _ORDER:
+                    start = _OPS[_ORDER].size
+                    ids = (_ID.unpack_from(payload, start + i * _ID.size) for i in range(fields[2]))
+                    playlist.reorder([playlist.find_song((high << 64) | low) for low, high in ids])
+                else:
+                    start = _OPS[_SORT].size
+                    playlist.sort_playlist(payload[start:start + fields[3]].decode("utf-8"), fields[2])
+            applied += 1
+        for playlist in playlists:
+            _flush_appends(playlist, appends)
+
+        if offset < end:
+            print(f"[WAL] Dropping {end - offset} bytes of torn log tail.")
+            self.file.flush()
+            os.truncate(self.path, offset)
+        self.records = applied
+        return applied
+
+    def reset(self, generation):
+        # Starts an empty log continuing from checkpoint `generation`
+        # Time: O(1)
+        with self.lock:
+            self._cancel_timer()
+            self.buffer = bytearray()
+            self.pending = 0
+            self.file.close()
+            temp = self.path + ".tmp"
+            with open(temp, "wb") as handle:
+                handle.write(_frame(_GENERATION.pack(generation)))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp, self.path)
+            self.file = open(self.path, "ab")
+            self.generation = generation
+            self.records = 0
+
+    def close(self):
+        self.commit()
+        self.file.close()
+
+    def _schedule(self):
+        # Caller holds the lock. Bounds how long a lone write waits for its group.
+        if self.timer is None and self.max_delay:
+            self.timer = threading.Timer(self.max_delay, self.commit)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _commit(self):
+        # Caller holds the lock
+        self._cancel_timer()
+        if self.dirty:
+            for store in self.stores:
+                store.sync()
+            self.dirty = False
+        if not self.pending:
+            return
+        self.file.write(self.buffer)
+        self._sync()
+        self.buffer = bytearray()
+        self.pending = 0
+        self.commits += 1
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    #----------------playlist event handlers--------------------------------
+
+    def on_song_added(self, playlist, song):
+        self._log_add(playlist, song, playlist.index.rank(song))
+
+    def on_songs_added(self, playlist, songs):
+        # A batch is appended at the tail, so positions are consecutive
+        first = playlist.length - len(songs)
+        for position, song in enumerate(songs, first):
+            self._log_add(playlist, song, position)
+
+    def on_song_removed(self, playlist, song):
+        self.append(_OPS[_REMOVE].pack(_REMOVE, _pid(playlist), song.id & _MASK_64, song.id >> 64))
+
+    def on_song_moved(self, playlist, song, from_index, to_index):
+        self.append(_OPS[_MOVE].pack(_MOVE, _pid(playlist), from_index, to_index))
+
+    def on_reversed(self, playlist):
+        self.append(_OPS[_REVERSE].pack(_REVERSE, _pid(playlist)))
+
+    def on_sorted(self, playlist, criteria, ascending):
+        criteria = criteria.encode("utf-8")
+        self.append(_OPS[_SORT].pack(_SORT, _pid(playlist), ascending, len(criteria)) + criteria)
+
+    def on_reordered(self, playlist, songs):
+        ids = b"".join(_ID.pack(song.id & _MASK_64, song.id >> 64) for song in songs)
+        self.append(_OPS[_ORDER].pack(_ORDER, _pid(playlist), len(songs)) + ids)
+
+    def _log_add(self, playlist, song, position):
+        title, artist = song.title.encode("utf-8"), song.artist.encode("utf-8")
+        header = _OPS[_ADD].pack(_ADD, _pid(playlist), position, song.id & _MASK_64, song.id >> 64,
+                                 song.seconds, song.volume, len(title), len(artist))
+        self.append(header + title + artist)
+
+
+def _frame(payload):
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _pid(playlist):
+    return uuid.UUID(playlist.id).bytes
+
+
+def _read_generation(path):
+    with open(path, "rb") as handle:
+        data = handle.read(_FRAME.size + _GENERATION.size)
+    return _GENERATION.unpack_from(data, _FRAME.size)[0]
+
+
+def _flush_appends(playlist, appends):
+    batch = appends.pop(playlist.id, None)
+    if batch:
+        playlist.add_nodes(batch)
+
+
+def checkpoint(wal, library, playlists, history=None, switcher=None):
+    # Saves a full snapshot, then starts the log over. The snapshot records
+    # the new generation first, so a crash in between never replays twice.
+    # Time: O(n)
+    wal.commit()
+    generation = wal.generation + 1
+    library.state["wal_generation"] = generation
+    library.save(playlists, history, switcher)
+    wal.reset(generation)
+
+
+def recover(wal, library, catalog, rating_tree, history=None, switcher=None):
+    # Startup: the last checkpoint, exactly as saved, plus the log replayed on
+    # top. Returns the playlists, with the log attached to each.
+    # Time: O(n + r log n)
+    playlists = library.load(catalog, rating_tree, history, switcher, exact=True)
+    if wal.generation == library.state.get("wal_generation", 0):
+        applied = wal.replay(playlists, library.get)
+        if applied:
+            print(f"[WAL] Replayed {applied} playlist change(s) since the last save.")
+    else:
+        wal.reset(library.state.get("wal_generation", 0))  # already inside the snapshot
+    for playlist in playlists:
+        wal.attach(playlist)
+    return playlists
+
+
+class LibraryStore:
+    # Where a bounded PlaylistSwitcher keeps the playlists it evicts: the
+    # Library's own order files, 8 bytes per song, with the songs and ratings
+    # already on disk. Evicting checkpoints first, so the log never holds
+    # edits that the evicted playlist's files already include, then drops the
+    # playlist from the catalog, its indexes and the log. Loading decodes it
+    # again and puts it back under the log.
+    def __init__(self, library, catalog, wal=None, history=None):
+        # Time: O(1), Space: O(1)
+        self.library = library
+        self.catalog = catalog
+        self.wal = wal
+        self.history = history
+
+    def load(self, playlist_id, switcher):
+        # Time: O(n) for n songs in the playlist
+        playlist = self.library.load_playlist(playlist_id, self.catalog, self.history)
+        if playlist is not None and self.wal is not None:
+            self.wal.attach(playlist)
+        return playlist
+
+    def unload(self, playlist, switcher):
+        # Time: O(N) for the checkpoint of every resident playlist
+        resident = list(switcher.resident.values()) + [playlist]
+        if self.wal is not None:
+            checkpoint(self.wal, self.library, resident, self.history, switcher)
+            self.wal.detach(playlist)
+        else:
+            self.library.save(resident, self.history, switcher)
+        self.library.unload(playlist, self.catalog)
+
+
+#----------------benchmark--------------------------------
+
+def benchmark(n=20_000, group_sizes=(1, 64, 1024)):
+    # Mutation throughput (adds, moves, deletes) without a log, and with the
+    # log at several group-commit sizes
+    import random
+    import tempfile
+    from playlist_engine import Playlist
+
+    def run(wal):
+        playlist = Playlist(None)
+        if wal is not None:
+            wal.attach(playlist)
+        rng = random.Random(3)
+        start = time.perf_counter()
+        for i in range(n):
+            playlist.add_song(f"Song {i}", f"Artist {i % 100}", 200)
+            if i % 4 == 3:
+                a, b = rng.randrange(playlist.length), rng.randrange(playlist.length)
+                playlist.move_song(a, b if a != b else (b + 1) % playlist.length)
+            if i % 8 == 7:
+                playlist.delete_song(rng.randrange(playlist.length))
+        if wal is not None:
+            wal.commit()
+        return (n + n // 4 + n // 8) / (time.perf_counter() - start)
+
+    print(f"\n--- WAL benchmark ({n} adds + moves + deletes) ---")
+    print(f"{'no log':<16} {run(None):>12,.0f} ops/s")
+    for group_size in group_sizes:
+        path = os.path.join(tempfile.mkdtemp(), "playlists.wal")
+        wal = WriteAheadLog(path, group_size=group_size)
+        rate = run(wal)
+        print(f"{f'group {group_size}':<16} {rate:>12,.0f} ops/s  ({wal.commits} fsyncs)")
+        wal.close()
+        os.remove(path)
+    print("---------------------------------------------\n")
+
+# benchmark()